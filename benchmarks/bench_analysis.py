@@ -0,0 +1,21 @@
+"""Benchmarks for MarketAnalyzer methods."""
+
+import pytest
+
+from src.analysis.analyzer import MarketAnalyzer
+
+METHODS = [
+    "calculate_price_statistics",
+    "calculate_price_trend",
+    "calculate_market_heat",
+    "analyze_by_property_type",
+    "analyze_by_location",
+    "find_price_anomalies",
+]
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_analyzer_method(benchmark, bench_frame, scale, method):
+    """Run one analyzer method over the synthetic frame."""
+    analyzer = MarketAnalyzer(bench_frame)
+    benchmark(getattr(analyzer, method))
@@ -0,0 +1,71 @@
+"""Benchmarks for the JSON API hot paths."""
+
+import itertools
+
+import pytest
+
+from src.scraper.scraper import DemoScraper
+
+_locations = itertools.count()
+
+
+def _get(client, url):
+    """Issue a GET and fail loudly on errors."""
+    response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+def test_properties_first_page(benchmark, bench_client, scale):
+    """Dashboard query: first page of ten listings."""
+    benchmark(_get, bench_client, "/api/properties?per_page=10")
+
+
+def test_properties_deep_page(benchmark, bench_client, scale):
+    """Deep pagination into the listing table."""
+    page = max(1, scale // 20 // 2)
+    benchmark(_get, bench_client, f"/api/properties?page={page}&per_page=20")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "city=Austin",
+        "property_type=condo",
+        "min_price=300000&max_price=600000",
+        "city=Seattle&property_type=house&min_price=500000",
+    ],
+)
+def test_properties_filters(benchmark, bench_client, scale, query):
+    """Structured filters on the listing endpoint."""
+    benchmark(_get, bench_client, f"/api/properties?{query}&per_page=20")
+
+
+def test_properties_analytics_pull(benchmark, bench_client, scale):
+    """Analytics page pull of 1000 listings."""
+    benchmark(_get, bench_client, "/api/properties?per_page=1000")
+
+
+def test_market_summary_city(benchmark, bench_client, scale):
+    """Market summary for a single city."""
+    benchmark(_get, bench_client, "/api/market/summary?city=Austin")
+
+
+def test_market_summary_all(benchmark, bench_client, scale):
+    """Market summary across every city."""
+    benchmark(_get, bench_client, "/api/market/summary")
+
+
+def test_scrape_ingestion_demo(benchmark, bench_client, scale, monkeypatch):
+    """Ingest DemoScraper listings for a fresh location on every round."""
+    monkeypatch.setattr(
+        "src.api.routes.scrape_all_sources",
+        lambda location, **kwargs: DemoScraper().scrape_listings(location),
+    )
+
+    def ingest():
+        location = f"Bench City {next(_locations)}, BC"
+        response = bench_client.post("/api/scrape", json={"location": location})
+        assert response.status_code == 200
+
+    benchmark(ingest)
@@ -0,0 +1,23 @@
+"""Spatial queries over geocoded synthetic listings.
+
+Covers a 5-mile radius search, a city-sized viewport and map clusters at
+state and street zoom levels. Listings are geocoded by the app's startup
+backfill.
+"""
+
+import pytest
+
+QUERIES = {
+    "radius_5mi": "/api/properties/within?near=Austin,%20TX&radius=5",
+    "bbox_city": "/api/properties/within?bbox=37.6,-122.6,37.9,-122.3&limit=500",
+    "clusters_us": "/api/properties/within?bbox=24,-125,50,-66&zoom=4",
+    "clusters_city": "/api/properties/within?bbox=37.6,-122.6,37.9,-122.3&zoom=13",
+}
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_spatial_query(benchmark, seeded_app, scale, name):
+    """One spatial query."""
+    client = seeded_app.test_client()
+    response = benchmark(client.get, QUERIES[name])
+    assert response.status_code == 200
@@ -0,0 +1,29 @@
+"""Zillow listing extraction throughput over the recorded fixture archive.
+
+Replays archived search pages through ``_parse_listings_selenium`` with a
+fake WebDriver; ``extra_info`` carries pages/sec and golden-corpus
+accuracy so parser regressions show up next to timing changes.
+"""
+
+import os
+
+from src.scraper.replay import load_archive, replay_archive, replay_page
+
+ARCHIVE = os.environ.get(
+    "SCRAPER_ARCHIVE", os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "zillow")
+)
+
+
+def test_replay_pages(benchmark):
+    """Parse every archived page once per round."""
+    pages = load_archive(ARCHIVE)
+
+    def parse_all():
+        return sum(len(replay_page(p["html"], p["url"], p["location"])) for p in pages)
+
+    listings = benchmark(parse_all)
+    report = replay_archive(ARCHIVE)
+    benchmark.extra_info.update({"pages": len(pages), "listings": listings, "accuracy": report.get("accuracy")})
+    # No timings are collected under --benchmark-disable
+    if benchmark.stats is not None:
+        benchmark.extra_info["pages_per_sec"] = len(pages) / benchmark.stats.stats.median
@@ -0,0 +1,31 @@
+"""Benchmark cold app startup in a fresh interpreter."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _probe():
+    """Run the startup probe in a subprocess and parse its report."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_probe"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_create_app_startup(benchmark):
+    """Wall time of importing and creating the app; RSS kept in extra_info."""
+    reports = []
+    benchmark.pedantic(lambda: reports.append(_probe()), rounds=5, iterations=1)
+
+    benchmark.extra_info["import_s"] = min(r["import_s"] for r in reports)
+    benchmark.extra_info["create_app_s"] = min(r["create_app_s"] for r in reports)
+    benchmark.extra_info["max_rss_kb"] = max(r["max_rss_kb"] for r in reports)
+    benchmark.extra_info["heavy_modules_loaded"] = reports[-1]["heavy_modules_loaded"]
@@ -0,0 +1,45 @@
+"""Bytes on the wire with and without compression and conditional GET.
+
+Each benchmark records ``bytes_identity``, ``bytes_compressed`` and
+``bytes_revalidated`` in the saved JSON's ``extra_info``; the timed part
+is a dashboard refresh that revalidates with the previous ETag.
+"""
+
+import pytest
+
+ENDPOINTS = [
+    "/api/properties?per_page=20",
+    "/api/properties?per_page=1000",
+    "/api/market/summary?city=Austin",
+    "/api/reports",
+]
+
+
+def _wire_size(response):
+    """Body plus header bytes as sent."""
+    headers = sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+    return len(response.data) + headers
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_wire_bytes(benchmark, bench_client, scale, url):
+    """Full, compressed and revalidated transfer sizes for one endpoint."""
+    identity = bench_client.get(url)
+    compressed = bench_client.get(url, headers={"Accept-Encoding": "br, gzip"})
+    assert identity.status_code == compressed.status_code == 200
+    etag = compressed.headers["ETag"]
+
+    def refresh():
+        response = bench_client.get(url, headers={"Accept-Encoding": "br, gzip", "If-None-Match": etag})
+        assert response.status_code == 304
+        return response
+
+    revalidated = benchmark(refresh)
+    benchmark.extra_info.update(
+        {
+            "bytes_identity": _wire_size(identity),
+            "bytes_compressed": _wire_size(compressed),
+            "bytes_revalidated": _wire_size(revalidated),
+            "encoding": compressed.headers.get("Content-Encoding", "identity"),
+        }
+    )
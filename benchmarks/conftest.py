@@ -0,0 +1,72 @@
+"""Fixtures for the benchmark suite.
+
+Run with ``make bench``; pass ``--bench-scale=10000,100000,1000000`` to
+benchmark larger datasets.
+"""
+
+import os
+
+import pytest
+
+from benchmarks.datasets import generate_frame, seed_database
+
+DEFAULT_SCALES = "10000"
+
+
+def pytest_addoption(parser):
+    """Register benchmark command line options."""
+    parser.addoption(
+        "--bench-scale",
+        default=os.getenv("BENCH_SCALES", DEFAULT_SCALES),
+        help="Comma separated dataset sizes to benchmark (default: 10000)",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize every benchmark that uses ``scale`` over the chosen sizes."""
+    if "scale" in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption("--bench-scale").split(",") if s]
+        metafunc.parametrize("scale", scales, scope="session")
+
+
+def _create_app(database_url: str):
+    """Create the development app against ``database_url``."""
+    from src.app import create_app
+
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = database_url
+    try:
+        return create_app("development")
+    finally:
+        if previous is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous
+
+
+@pytest.fixture(scope="session")
+def seeded_app(scale, tmp_path_factory):
+    """App backed by a file database seeded with ``scale`` synthetic listings.
+
+    The raw seed insert bypasses ingest hooks, so the benchmarked app is
+    created after seeding and its startup backfills fill the derived
+    tables (sketches, rollups, scores, valuations, locations, activity).
+    """
+    from src.app import db
+
+    database_url = f"sqlite:///{tmp_path_factory.mktemp(f'bench-{scale}') / 'bench.db'}"
+    with _create_app(database_url).app_context():
+        seed_database(db, scale)
+    return _create_app(database_url)
+
+
+@pytest.fixture
+def bench_client(seeded_app):
+    """Test client for the seeded app."""
+    return seeded_app.test_client()
+
+
+@pytest.fixture(scope="session")
+def bench_frame(scale):
+    """In-memory synthetic DataFrame of ``scale`` listings."""
+    return generate_frame(scale)
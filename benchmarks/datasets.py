@@ -0,0 +1,86 @@
+"""Synthetic property datasets for benchmarks and load tests."""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+
+CITIES = [
+    ("San Francisco", "CA", 1.9), ("Los Angeles", "CA", 1.4), ("San Diego", "CA", 1.3),
+    ("Seattle", "WA", 1.3), ("Portland", "OR", 1.0), ("Denver", "CO", 1.0),
+    ("Austin", "TX", 0.9), ("Dallas", "TX", 0.8), ("Houston", "TX", 0.7),
+    ("Phoenix", "AZ", 0.8), ("Chicago", "IL", 0.8), ("Detroit", "MI", 0.5),
+    ("Atlanta", "GA", 0.8), ("Miami", "FL", 1.1), ("Tampa", "FL", 0.8),
+    ("Boston", "MA", 1.5), ("New York", "NY", 1.7), ("Philadelphia", "PA", 0.7),
+    ("Nashville", "TN", 0.9), ("Minneapolis", "MN", 0.7),
+]
+PROPERTY_TYPES = ["house", "studio", "apartment", "townhouse", "condo"]
+BASE_PRICES = {"house": 550000, "condo": 380000, "apartment": 280000, "townhouse": 450000, "studio": 350000}
+CHUNK_SIZE = 50000
+
+
+def generate_frame(rows: int, seed: int = 42, days: int = 730) -> pd.DataFrame:
+    """Generate a reproducible DataFrame of synthetic listings."""
+    rng = np.random.default_rng(seed)
+    city_idx = rng.integers(0, len(CITIES), rows)
+    type_idx = rng.integers(0, len(PROPERTY_TYPES), rows)
+
+    multipliers = np.array([c[2] for c in CITIES])[city_idx]
+    base = np.array([BASE_PRICES[t] for t in PROPERTY_TYPES])[type_idx]
+    price = np.round(base * multipliers * rng.lognormal(0.0, 0.25, rows), -2)
+
+    bedrooms = rng.integers(1, 6, rows)
+    bathrooms = rng.integers(1, 4, rows) + rng.choice([0.0, 0.5], rows)
+    square_feet = (500 + bedrooms * 350 + rng.integers(-200, 400, rows)).astype(int)
+
+    start = datetime.utcnow() - timedelta(days=days)
+    scraped_at = pd.to_datetime(start) + pd.to_timedelta(rng.integers(0, days * 86400, rows), unit="s")
+
+    cities = np.array([c[0] for c in CITIES], dtype=object)[city_idx]
+    states = np.array([c[1] for c in CITIES], dtype=object)[city_idx]
+    zip_codes = (10000 + city_idx * 100 + rng.integers(0, 100, rows)).astype(str)
+
+    return pd.DataFrame(
+        {
+            "url": [f"https://bench.local/property/{seed}-{i}" for i in range(rows)],
+            "address": [f"{n} Bench Street" for n in rng.integers(100, 9999, rows)],
+            "city": cities,
+            "state": states,
+            "zip_code": zip_codes,
+            "price": price,
+            "bedrooms": bedrooms,
+            "bathrooms": bathrooms,
+            "square_feet": square_feet,
+            "property_type": np.array(PROPERTY_TYPES, dtype=object)[type_idx],
+            "description": [f"Synthetic {t} listing" for t in np.array(PROPERTY_TYPES)[type_idx]],
+            "source": "benchmark",
+            "scraped_at": scraped_at,
+            "updated_at": scraped_at,
+        }
+    )
+
+
+def iter_records(frame: pd.DataFrame, chunk_size: int = CHUNK_SIZE) -> Iterator[List[Dict]]:
+    """Yield the frame as lists of insert-ready dictionaries."""
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        records = chunk.to_dict("records")
+        for record in records:
+            record["scraped_at"] = record["scraped_at"].to_pydatetime()
+            record["updated_at"] = record["updated_at"].to_pydatetime()
+            record["bedrooms"] = int(record["bedrooms"])
+            record["square_feet"] = int(record["square_feet"])
+        yield records
+
+
+def seed_database(db, rows: int, seed: int = 42) -> pd.DataFrame:
+    """Bulk insert a synthetic dataset using chunked multi-row inserts."""
+    from src.database.models import Property
+
+    frame = generate_frame(rows, seed)
+    for records in iter_records(frame):
+        db.session.execute(insert(Property), records)
+        db.session.commit()
+    return frame
@@ -0,0 +1,286 @@
+"""Closed-loop load test of the API under a local WSGI server.
+
+Seeds a synthetic SQLite database, starts the app in a separate process
+(threaded werkzeug server, so the load generator does not share its GIL)
+and runs a fixed number of simulated users at each concurrency level.
+Each user repeatedly picks a scenario from the weighted mix, runs its
+requests back to back and starts the next one as soon as it finishes.
+
+Usage:
+    python -m benchmarks.loadtest --rows 10000 --concurrency 1,2,4,8,16 --duration 20
+    python -m benchmarks.loadtest --mix dashboard=70,analytics=5,detail=25,scrape=0 --json out.json
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.datasets import CITIES
+
+# Scenario name -> (default weight, description)
+SCENARIOS = {
+    "dashboard": (60, "GET /api/properties?per_page=10"),
+    "analytics": (10, "GET /api/properties?per_page=1000"),
+    "detail": (28, "GET /api/properties/<id> + 2x GET /api/market/summary"),
+    "scrape": (2, "POST /api/scrape (DemoScraper)"),
+}
+# Throughput gains below this fraction mark the saturation point
+SATURATION_GAIN = 0.05
+
+_scrape_locations = itertools.count()
+
+Request = Tuple[str, str, str, bytes]  # label, method, path, body
+
+
+def scenario_requests(name: str, rows: int, rng: random.Random) -> List[Request]:
+    """The requests one user issues for one pass through a scenario."""
+    if name == "dashboard":
+        return [("properties?per_page=10", "GET", "/api/properties?per_page=10", b"")]
+    if name == "analytics":
+        return [("properties?per_page=1000", "GET", "/api/properties?per_page=1000", b"")]
+    if name == "detail":
+        city = rng.choice(CITIES)[0].replace(" ", "%20")
+        return [
+            ("properties/<id>", "GET", f"/api/properties/{rng.randint(1, rows)}", b""),
+            ("market/summary?city=", "GET", f"/api/market/summary?city={city}", b""),
+            ("market/summary", "GET", "/api/market/summary", b""),
+        ]
+    if name == "scrape":
+        body = json.dumps({"location": f"Load City {next(_scrape_locations)}, LC"}).encode()
+        return [("scrape", "POST", "/api/scrape", body)]
+    raise ValueError(f"unknown scenario {name}")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse ``name=weight,...``; unspecified scenarios keep their defaults."""
+    mix = {name: float(weight) for name, (weight, _) in SCENARIOS.items()}
+    for part in filter(None, text.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name}")
+        mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class Worker(threading.Thread):
+    """One simulated user holding a keep-alive connection."""
+
+    def __init__(self, port: int, rows: int, mix: Dict[str, float], stop_at: float, record: Callable, seed: int):
+        """Prepare a user that runs until ``stop_at``."""
+        super().__init__(daemon=True)
+        self.port = port
+        self.rows = rows
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.stop_at = stop_at
+        self.record = record
+        self.rng = random.Random(seed)
+        self.conn = None
+
+    def _request(self, method: str, path: str, body: bytes) -> int:
+        """Send one request, reconnecting once if the server closed the socket."""
+        for attempt in (0, 1):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+            try:
+                headers = {"Content-Type": "application/json"} if body else {}
+                self.conn.request(method, path, body=body or None, headers=headers)
+                response = self.conn.getresponse()
+                response.read()
+                if response.getheader("Connection", "").lower() == "close" or response.version == 10:
+                    self.conn.close()
+                    self.conn = None
+                return response.status
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    return 0
+        return 0
+
+    def run(self):
+        """Run scenarios back to back until the stage ends."""
+        while time.monotonic() < self.stop_at:
+            name = self.rng.choices(self.names, self.weights)[0]
+            for label, method, path, body in scenario_requests(name, self.rows, self.rng):
+                start = time.perf_counter()
+                status = self._request(method, path, body)
+                self.record(label, time.perf_counter() - start, status, time.monotonic())
+        if self.conn is not None:
+            self.conn.close()
+
+
+def run_stage(port: int, rows: int, mix: Dict[str, float], concurrency: int, duration: float, warmup: float) -> Dict:
+    """Drive ``concurrency`` users and summarize requests finished after warmup."""
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def record(label, latency, status, finished_at):
+        if finished_at < measure_from or finished_at > stop_at:
+            return
+        with lock:
+            samples[label].append(latency)
+            if not 200 <= status < 400:
+                errors[label] += 1
+
+    workers = [Worker(port, rows, mix, stop_at, record, seed=concurrency * 1000 + i) for i in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    endpoints = {}
+    for label, latencies in sorted(samples.items()):
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        endpoints[label] = {
+            "requests": len(latencies),
+            "errors": errors[label],
+            "rps": len(latencies) / duration,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "requests": total,
+        "errors": sum(errors.values()),
+        "rps": total / duration,
+        "endpoints": endpoints,
+    }
+
+
+def saturation_point(stages: List[Dict]) -> int:
+    """Lowest concurrency after which throughput stops growing meaningfully."""
+    for previous, current in zip(stages, stages[1:]):
+        if current["rps"] < previous["rps"] * (1 + SATURATION_GAIN):
+            return previous["concurrency"]
+    return stages[-1]["concurrency"] if stages else 0
+
+
+def print_report(stages: List[Dict]):
+    """Print a per-stage, per-endpoint table."""
+    header = f"{'conc':>5} {'endpoint':<26} {'req':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for stage in stages:
+        for label, e in stage["endpoints"].items():
+            print(
+                f"{stage['concurrency']:>5} {label:<26} {e['requests']:>7} {e['errors']:>5} {e['rps']:>8.1f} "
+                f"{e['p50_ms']:>9.1f} {e['p95_ms']:>9.1f} {e['p99_ms']:>9.1f}"
+            )
+        print(f"{stage['concurrency']:>5} {'TOTAL':<26} {stage['requests']:>7} {stage['errors']:>5} {stage['rps']:>8.1f}")
+        print()
+    print(f"Throughput stops scaling at concurrency ~{saturation_point(stages)}")
+
+
+def serve(database_url: str, port: int):
+    """Child process: run the app on a threaded werkzeug server."""
+    os.environ["DATABASE_URL"] = database_url
+    from werkzeug.serving import make_server
+
+    from src.app import create_app
+    from src.scraper.scraper import DemoScraper
+
+    app = create_app("development")
+    # Background scrapes use generated listings instead of a browser
+    import src.api.routes
+
+    src.api.routes.scrape_all_sources = lambda location, **kwargs: DemoScraper().scrape_listings(location)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+def seed(database_url: str, rows: int):
+    """Create the schema and bulk insert synthetic listings."""
+    os.environ["DATABASE_URL"] = database_url
+    from benchmarks.datasets import seed_database
+    from src.app import create_app, db
+
+    app = create_app("development")
+    with app.app_context():
+        seed_database(db, rows)
+
+
+def wait_for_server(port: int, process: subprocess.Popen, timeout: float = 300.0):
+    """Poll /api/health until the server answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server process exited during startup")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start in time")
+
+
+def main(argv=None):
+    """Seed, start the server, run every concurrency stage and report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="synthetic listings to seed")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma separated user counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per stage")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds per stage")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(""), help="scenario weights, e.g. dashboard=60,scrape=0")
+    parser.add_argument("--port", type=int, default=5077)
+    parser.add_argument("--database-url", help="use an existing database instead of seeding a temporary one")
+    parser.add_argument("--json", help="write the full report to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.database_url, args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url
+        if not database_url:
+            database_url = f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+            print(f"Seeding {args.rows} listings...")
+            seed(database_url, args.rows)
+
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.loadtest", "--serve", "--port", str(args.port), "--database-url", database_url]
+        )
+        try:
+            wait_for_server(args.port, process)
+            print(f"Mix: {', '.join(f'{n}={w:g}' for n, w in args.mix.items())}")
+            stages = []
+            for concurrency in [int(c) for c in args.concurrency.split(",") if c]:
+                stages.append(run_stage(args.port, args.rows, args.mix, concurrency, args.duration, args.warmup))
+                print(f"  concurrency {concurrency}: {stages[-1]['rps']:.1f} req/s")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print()
+    print_report(stages)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": args.rows, "mix": args.mix, "stages": stages}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
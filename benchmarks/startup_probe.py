@@ -0,0 +1,42 @@
+"""Measure app import time, create_app() time and peak RSS in a fresh process.
+
+Usage: python -m benchmarks.startup_probe  (prints one JSON object)
+"""
+
+import json
+import resource
+import sys
+import time
+
+HEAVY_MODULES = ["selenium", "webdriver_manager", "requests", "bs4", "plotly", "pandas"]
+
+
+def main():
+    """Import the app, build it and report timings as JSON."""
+    start = time.perf_counter()
+    from src.app import create_app
+
+    imported = time.perf_counter()
+    create_app("testing")
+    created = time.perf_counter()
+
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_kb = max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+    print(
+        json.dumps(
+            {
+                "import_s": imported - start,
+                "create_app_s": created - imported,
+                "total_s": created - start,
+                "max_rss_kb": rss_kb,
+                "modules": len(sys.modules),
+                "heavy_modules_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
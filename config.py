@@ -10,6 +10,43 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # SQLite tuning, applied as PRAGMAs on every new connection
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': -64000,  # negative means KiB, i.e. 64 MB
+        'mmap_size': 268435456,  # 256 MB
+        'temp_store': 'MEMORY',
+    }
+    
+    # Connection pool sizing for server databases (PostgreSQL)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    
+    # Monitoring
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+    
+    # Directory for memory-mapped columnar snapshots shared by workers (disabled when unset)
+    COLUMNAR_SNAPSHOT_DIR = os.getenv('COLUMNAR_SNAPSHOT_DIR')
+    # Seconds to wait after a write before exporting; later writes join that export
+    COLUMNAR_SNAPSHOT_DELAY = float(os.getenv('COLUMNAR_SNAPSHOT_DELAY', 5))
+    
+    # Price history retention: daily after N days, weekly after N days, archived after N days
+    PRICE_HISTORY_DAILY_AFTER_DAYS = int(os.getenv('PRICE_HISTORY_DAILY_AFTER_DAYS', 30))
+    PRICE_HISTORY_WEEKLY_AFTER_DAYS = int(os.getenv('PRICE_HISTORY_WEEKLY_AFTER_DAYS', 180))
+    PRICE_HISTORY_ARCHIVE_AFTER_DAYS = int(os.getenv('PRICE_HISTORY_ARCHIVE_AFTER_DAYS', 365))
+    PRICE_HISTORY_ARCHIVE_DIR = os.getenv('PRICE_HISTORY_ARCHIVE_DIR')
+    
+    # Zip/city centroid CSV for offline geocoding (defaults to the bundled gazetteer)
+    GAZETTEER_PATH = os.getenv('GAZETTEER_PATH')
+    
+    # Response compression (brotli when installed, else gzip) above this many bytes
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    
     # Session config
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     SESSION_COOKIE_SECURE = True
@@ -24,7 +61,7 @@ class DevelopmentConfig(Config):
     TESTING = False
     SQLALCHEMY_DATABASE_URI = os.getenv(
         'DATABASE_URL',
-        'sqlite:///dev.db'
+        'sqlite:///real_estate.db'
     )
     SESSION_COOKIE_SECURE = False
 
@@ -35,6 +72,9 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PROFILING_ENABLED = False
+    COLUMNAR_SNAPSHOT_DIR = None
+    PRICE_HISTORY_ARCHIVE_DIR = None
 
 
 class ProductionConfig(Config):
@@ -18,6 +18,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/your-username/real-estate-analyzer",
     packages=find_packages(),
+    package_data={"src.database": ["gazetteer.csv"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: 3.9",
@@ -35,6 +36,7 @@ setup(
         "dev": [
             "pytest>=7.0",
             "pytest-cov>=3.0",
+            "pytest-benchmark>=4.0",
             "flake8>=4.0",
             "black>=22.0",
             "mypy>=0.950",
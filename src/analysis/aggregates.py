@@ -0,0 +1,318 @@
+"""Mergeable partial aggregates for chunked and parallel market analysis.
+
+Each aggregate state can be updated with a chunk of prices and merged
+with another state built from a disjoint chunk, so reports over tables
+larger than memory can be computed by streaming rows or by splitting the
+table across worker processes.
+"""
+
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, func, select
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50000
+DEFAULT_COMPRESSION = 200.0
+# Buffered points per unit of compression before centroids are rebuilt
+BUFFER_FACTOR = 5
+
+
+class MomentState:
+    """Count, mean and sum of squared deviations, merged with Chan's formula."""
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        """Initialize moment state."""
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, values: np.ndarray):
+        """Add a chunk of values."""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        self.merge(MomentState(len(values), chunk_mean, chunk_m2))
+
+    def merge(self, other: "MomentState"):
+        """Fold another state into this one."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+
+    @property
+    def total(self) -> float:
+        """Sum of all values."""
+        return self.mean * self.count
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, as pandas)."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else float("nan")
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary."""
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MomentState":
+        """Build a state from ``to_dict`` output."""
+        return cls(data["count"], data["mean"], data["m2"])
+
+
+class TDigest:
+    """Mergeable t-digest quantile sketch.
+
+    Centroids are rebuilt in one vectorized pass: points are sorted and
+    grouped by the integer part of the arcsine scale function, which keeps
+    centroids small near the tails and bounded by ``compression``.
+    """
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        """Initialize an empty digest."""
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._buffered = 0
+
+    def __len__(self):
+        return int(self.weights.sum()) + self._buffered
+
+    def update(self, values: Iterable[float]):
+        """Add a chunk of values."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._add_centroids(values, np.ones(len(values)))
+
+    def merge(self, other: "TDigest"):
+        """Fold another digest into this one."""
+        other._compress()
+        if len(other.weights) == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._add_centroids(other.means, other.weights)
+
+    def _add_centroids(self, means: np.ndarray, weights: np.ndarray):
+        """Buffer centroids and rebuild once the buffer is large."""
+        self._buffer.append((means, weights))
+        self._buffered += len(means)
+        if self._buffered > BUFFER_FACTOR * self.compression:
+            self._compress()
+
+    def _compress(self):
+        """Merge buffered points into the centroid list."""
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [m for m, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = np.floor(self.compression / (2 * math.pi) * np.arcsin(2 * q - 1))
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(k)) + 1))
+
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        """Estimate one quantile (or an array of quantiles) in [0, 1]."""
+        self._compress()
+        if len(self.weights) == 0:
+            return float("nan") if np.isscalar(q) else np.full(len(q), np.nan)
+        positions = (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+        xp = np.concatenate(([0.0], positions, [1.0]))
+        fp = np.concatenate(([self.min], self.means, [self.max]))
+        result = np.interp(q, xp, fp)
+        return float(result) if np.isscalar(q) else result
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary."""
+        self._compress()
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": self.min if self.weights.size else None,
+            "max": self.max if self.weights.size else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TDigest":
+        """Build a digest from ``to_dict`` output."""
+        digest = cls(data.get("compression", DEFAULT_COMPRESSION))
+        digest.means = np.asarray(data["means"], dtype=float)
+        digest.weights = np.asarray(data["weights"], dtype=float)
+        if digest.weights.size:
+            digest.min = data["min"]
+            digest.max = data["max"]
+        return digest
+
+
+class PriceAggregate:
+    """Moments plus a quantile sketch for one group of prices."""
+
+    def __init__(self, moments: Optional[MomentState] = None, digest: Optional[TDigest] = None):
+        """Initialize aggregate state."""
+        self.moments = moments or MomentState()
+        self.digest = digest or TDigest()
+
+    def update(self, prices: np.ndarray):
+        """Add a chunk of prices."""
+        prices = np.asarray(prices, dtype=float)
+        prices = prices[~np.isnan(prices)]
+        self.moments.update(prices)
+        self.digest.update(prices)
+
+    def merge(self, other: "PriceAggregate"):
+        """Fold another aggregate into this one."""
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+
+    def summary(self) -> Dict:
+        """Report statistics in the shape used by MarketAnalyzer."""
+        return {
+            "count": self.moments.count,
+            "avg_price": self.moments.mean if self.moments.count else None,
+            "median_price": self.digest.quantile(0.5) if self.moments.count else None,
+            "std": self.moments.std,
+            "min": self.digest.min if self.moments.count else None,
+            "max": self.digest.max if self.moments.count else None,
+        }
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary."""
+        return {"moments": self.moments.to_dict(), "digest": self.digest.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PriceAggregate":
+        """Build an aggregate from ``to_dict`` output."""
+        return cls(MomentState.from_dict(data["moments"]), TDigest.from_dict(data["digest"]))
+
+
+class GroupedAggregates:
+    """Price aggregates keyed by a tuple of grouping column values."""
+
+    def __init__(self, by: Sequence[str] = ("city",)):
+        """Initialize empty grouped state."""
+        self.by = tuple(by)
+        self.groups: Dict[Tuple, PriceAggregate] = {}
+
+    def update_frame(self, frame: pd.DataFrame):
+        """Add a chunk of rows holding the grouping columns and ``price``."""
+        if frame.empty:
+            return
+        prices = frame["price"].to_numpy(dtype=float)
+        grouped = frame.groupby(list(self.by), sort=False, observed=True, dropna=False)
+        for key, index in grouped.indices.items():
+            key = key if isinstance(key, tuple) else (key,)
+            self.groups.setdefault(key, PriceAggregate()).update(prices[index])
+
+    def merge(self, other: "GroupedAggregates"):
+        """Fold another grouped state into this one."""
+        for key, aggregate in other.groups.items():
+            if key in self.groups:
+                self.groups[key].merge(aggregate)
+            else:
+                self.groups[key] = aggregate
+
+    def report(self) -> Dict:
+        """Summaries keyed by group value (or tuple for multi-column groups)."""
+        return {
+            (key[0] if len(self.by) == 1 else key): aggregate.summary()
+            for key, aggregate in self.groups.items()
+        }
+
+    def to_dict(self) -> Dict:
+        """Convert to a picklable dictionary."""
+        return {"by": list(self.by), "groups": [[list(k), a.to_dict()] for k, a in self.groups.items()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "GroupedAggregates":
+        """Build grouped state from ``to_dict`` output."""
+        grouped = cls(data["by"])
+        grouped.groups = {tuple(k): PriceAggregate.from_dict(a) for k, a in data["groups"]}
+        return grouped
+
+
+def _aggregate_query(conn_or_session, by: Sequence[str], id_range=None, chunk_size: int = CHUNK_SIZE):
+    """Stream grouping columns and prices from the properties table."""
+    from src.database.models import Property
+
+    grouped = GroupedAggregates(by)
+    query = select(*[getattr(Property, c) for c in by], Property.price)
+    if id_range is not None:
+        query = query.where(Property.id >= id_range[0], Property.id < id_range[1])
+    result = conn_or_session.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        grouped.update_frame(pd.DataFrame(partition, columns=list(by) + ["price"]))
+    return grouped
+
+
+def stream_aggregates(session, by: Sequence[str] = ("city",), chunk_size: int = CHUNK_SIZE) -> GroupedAggregates:
+    """Aggregate the properties table in chunks without loading it whole."""
+    return _aggregate_query(session, by, chunk_size=chunk_size)
+
+
+def _aggregate_range(args) -> Dict:
+    """Worker entry point: aggregate one id range on a private engine."""
+    database_uri, by, id_range, chunk_size = args
+    engine = create_engine(database_uri)
+    try:
+        with engine.connect() as conn:
+            return _aggregate_query(conn, by, id_range, chunk_size).to_dict()
+    finally:
+        engine.dispose()
+
+
+def parallel_aggregates(
+    database_uri: str,
+    by: Sequence[str] = ("city",),
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> GroupedAggregates:
+    """Split the properties table by id range across processes and merge."""
+    from src.database.models import Property
+
+    workers = workers or os.cpu_count() or 1
+    engine = create_engine(database_uri)
+    try:
+        with engine.connect() as conn:
+            low, high = conn.execute(select(func.min(Property.id), func.max(Property.id))).one()
+            if low is None or workers == 1 or ":memory:" in database_uri:
+                return _aggregate_query(conn, by, chunk_size=chunk_size)
+    finally:
+        engine.dispose()
+
+    bounds = np.linspace(low, high + 1, workers + 1).astype(int)
+    tasks = [(database_uri, tuple(by), (int(a), int(b)), chunk_size) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    merged = GroupedAggregates(by)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_aggregate_range, tasks):
+            merged.merge(GroupedAggregates.from_dict(partial))
+    logger.info(f"Merged {len(tasks)} partial aggregates over {len(merged.groups)} groups")
+    return merged
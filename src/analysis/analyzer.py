@@ -2,8 +2,15 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import logging
+from datetime import datetime
+
+from src.analysis.anomalies import DEFAULT_THRESHOLD, find_anomalies
+from src.analysis.aggregates import GroupedAggregates, parallel_aggregates, stream_aggregates
+from src.analysis.columnar import ColumnarSnapshot, ColumnarTable
+from src.analysis.trends import bucket_series, trend_direction
+from src.analysis.velocity import heat_level, heat_score
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +18,16 @@ logger = logging.getLogger(__name__)
 class MarketAnalyzer:
     """Analyze market trends and generate statistics."""
 
-    def __init__(self, properties_df: pd.DataFrame):
-        """Initialize analyzer with properties data."""
+    def __init__(self, properties_df: Union[pd.DataFrame, ColumnarTable, ColumnarSnapshot]):
+        """Initialize analyzer with properties data.
+
+        Accepts a DataFrame or a memory-mapped columnar snapshot; mapped
+        numeric columns are used without copying.
+        """
+        if isinstance(properties_df, ColumnarSnapshot):
+            properties_df = properties_df.properties
+        if isinstance(properties_df, ColumnarTable):
+            properties_df = properties_df.to_frame()
         self.df = properties_df
 
     def calculate_price_statistics(self) -> Dict:
@@ -26,37 +41,30 @@ class MarketAnalyzer:
             "count": len(self.df),
         }
 
-    def calculate_price_trend(self, time_column: str = "scraped_at") -> Dict:
-        """Calculate price trends over time."""
-        df_sorted = self.df.sort_values(time_column)
-
-        # Calculate weekly average prices
-        df_sorted["week"] = pd.to_datetime(df_sorted[time_column]).dt.to_period("W")
-        weekly_avg = df_sorted.groupby("week")["price"].mean()
+    def calculate_price_trend(self, time_column: str = "scraped_at", granularity: str = "week") -> Dict:
+        """Calculate average price per day, week or month.
 
-        # Determine trend direction
-        if len(weekly_avg) > 1:
-            price_change = weekly_avg.iloc[-1] - weekly_avg.iloc[0]
-            trend = "up" if price_change > 0 else "down"
-        else:
-            trend = "stable"
+        Keys of ``data`` are ISO dates of each period's first day.
+        """
+        buckets = bucket_series(self.df[time_column], granularity)
+        averages = self.df["price"].groupby(buckets.to_numpy()).mean().sort_index()
 
         return {
-            "trend": trend,
-            "data": weekly_avg.to_dict(),
+            "trend": trend_direction(averages.tolist()),
+            "data": {bucket.isoformat(): float(price) for bucket, price in averages.items()},
         }
 
-    def calculate_market_heat(self) -> str:
-        """Calculate market heat based on inventory and price trends."""
-        # Simplified market heat calculation
-        avg_price = self.df["price"].mean()
+    def calculate_market_heat(self, time_column: str = "scraped_at", now: Optional[datetime] = None) -> str:
+        """Calculate market heat from the median days on market of the listings.
 
-        if avg_price > 500000:
-            return "hot"
-        elif avg_price > 300000:
-            return "warm"
-        else:
-            return "cool"
+        Scored like the velocity counters in ``src.analysis.velocity``, which
+        also weigh price cuts and delistings for the live tables.
+        """
+        now = pd.Timestamp(now or datetime.utcnow())
+        days = ((now - pd.to_datetime(self.df[time_column])).dt.total_seconds() / 86400).clip(lower=0)
+        median = days.median()
+        score = heat_score(median_days_on_market=None if pd.isna(median) else float(median))
+        return heat_level(score) or "cool"
 
     def analyze_by_property_type(self) -> Dict:
         """Analyze market by property type."""
@@ -86,14 +94,30 @@ class MarketAnalyzer:
 
         return results
 
-    def find_price_anomalies(self, threshold: float = 2.0) -> List[Dict]:
-        """Find properties with anomalous prices."""
-        mean = self.df["price"].mean()
-        std = self.df["price"].std()
-
-        anomalies = self.df[
-            (self.df["price"] > mean + threshold * std)
-            | (self.df["price"] < mean - threshold * std)
-        ]
-
-        return anomalies.to_dict("records")
+    def find_price_anomalies(self, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+        """Find properties with anomalous price per square foot.
+
+        Each listing is scored against the median/MAD of its (city,
+        property_type) group; returns ids and robust z-scores.
+        """
+        return find_anomalies(self.df, threshold)
+
+    def partial_aggregates(self, by=("city",)) -> GroupedAggregates:
+        """Build mergeable aggregate state for this frame."""
+        aggregates = GroupedAggregates(by)
+        aggregates.update_frame(self.df[list(by) + ["price"]])
+        return aggregates
+
+    @staticmethod
+    def table_report(session=None, database_uri: Optional[str] = None, by=("city",), workers: int = 1) -> Dict:
+        """Report by city, state or any columns without loading the table.
+
+        With ``workers > 1`` and a ``database_uri`` the table is split across
+        a process pool; otherwise it is streamed in chunks through ``session``,
+        or through one connection to ``database_uri`` when no session is given.
+        """
+        if session is None and database_uri is None:
+            raise ValueError("table_report needs a session or a database_uri")
+        if database_uri is not None and (workers != 1 or session is None):
+            return parallel_aggregates(database_uri, by, workers).report()
+        return stream_aggregates(session, by).report()
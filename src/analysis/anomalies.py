@@ -0,0 +1,151 @@
+"""Grouped, robust price anomaly detection.
+
+Listings are compared by price per square foot against the median and
+median absolute deviation (MAD) of their (city, property_type) group, so
+an expensive city does not make every listing in it an outlier. Scores
+are robust z-scores, 0.6745 * (x - median) / MAD; |score| > 3.5 is the
+usual outlier cut-off.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.refits import GroupRefits
+from src.app import db
+from src.database.ingest import group_criteria
+from src.database.models import AnomalyBaseline, AnomalyScore, Property
+
+logger = logging.getLogger(__name__)
+
+GROUP_COLUMNS = ["city", "property_type"]
+MAD_SCALE = 0.6745
+# Scale making the mean absolute deviation comparable to the MAD when MAD is 0
+MEAN_AD_TO_MAD = 0.6745 * 1.253314
+DEFAULT_THRESHOLD = 3.5
+MIN_GROUP_SIZE = 5
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize group keys and add ``price_per_sqft``."""
+    frame = df.copy()
+    for column in GROUP_COLUMNS:
+        frame[column] = frame[column].astype(object).where(frame[column].notna(), "")
+    sqft = pd.to_numeric(frame["square_feet"], errors="coerce").astype(float)
+    frame["price_per_sqft"] = np.where(sqft > 0, frame["price"].astype(float) / sqft, np.nan)
+    return frame
+
+
+def fit_baselines(frame: pd.DataFrame) -> pd.DataFrame:
+    """Median and MAD of price per square foot for each group."""
+    valid = frame.dropna(subset=["price_per_sqft"])
+    if valid.empty:
+        return pd.DataFrame(columns=["median", "mad", "count"])
+    grouped = valid.groupby(GROUP_COLUMNS, sort=False)["price_per_sqft"]
+    deviation = (valid["price_per_sqft"] - grouped.transform("median")).abs()
+    by_group = deviation.groupby([valid[c] for c in GROUP_COLUMNS], sort=False)
+
+    baselines = pd.DataFrame(
+        {"median": grouped.median(), "mad": by_group.median(), "count": grouped.size()}
+    )
+    baselines["mad"] = baselines["mad"].where(baselines["mad"] > 0, by_group.mean() * MEAN_AD_TO_MAD)
+    return baselines[baselines["count"] >= MIN_GROUP_SIZE]
+
+
+def score_frame(frame: pd.DataFrame, baselines: pd.DataFrame) -> pd.DataFrame:
+    """Robust z-scores for each row whose group has a baseline."""
+    if baselines.empty:
+        return frame.iloc[0:0].assign(median=[], mad=[], count=[], score=[])
+    joined = frame.join(baselines, on=GROUP_COLUMNS, how="inner")
+    joined = joined.dropna(subset=["price_per_sqft"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = MAD_SCALE * (joined["price_per_sqft"] - joined["median"]) / joined["mad"]
+    joined["score"] = np.where(joined["mad"] > 0, score, 0.0)
+    return joined
+
+
+class AnomalyRefits(GroupRefits):
+    """Robust baselines per (city, property_type), refitted as groups grow."""
+
+    fit_model = AnomalyBaseline
+    result_model = AnomalyScore
+    group_columns = GROUP_COLUMNS
+    watched_columns = ["price", "square_feet"] + GROUP_COLUMNS
+    label = "anomaly baselines"
+
+    def load_frame(self, *criteria) -> pd.DataFrame:
+        """Load the columns the detector needs for matching properties."""
+        rows = db.session.query(
+            Property.id, Property.city, Property.property_type, Property.price, Property.square_feet
+        ).filter(*criteria)
+        return prepare_frame(
+            pd.DataFrame(rows.all(), columns=["id", "city", "property_type", "price", "square_feet"])
+        )
+
+    def fit(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Baselines of every group with enough data."""
+        return fit_baselines(frame)
+
+    def score(self, frame: pd.DataFrame, fits: pd.DataFrame) -> pd.DataFrame:
+        """Robust z-scores against ``fits``."""
+        return score_frame(frame, fits)
+
+    def cached(self, key, stored: AnomalyBaseline) -> pd.DataFrame:
+        """A stored baseline as a one-row baselines frame."""
+        return pd.DataFrame(
+            {"median": [stored.median_ppsf], "mad": [stored.mad_ppsf], "count": [stored.count]},
+            index=pd.MultiIndex.from_tuples([key], names=GROUP_COLUMNS),
+        )
+
+    def group_criteria(self, key) -> List:
+        """The group's rows, with an empty type matching NULL."""
+        return [group_criteria(*key)]
+
+    def save_fits(self, fits: pd.DataFrame):
+        """Upsert baseline rows."""
+        for key, row in fits.iterrows():
+            self.store_fit(
+                key, median_ppsf=float(row["median"]), mad_ppsf=float(row["mad"]), count=int(row["count"])
+            )
+
+    def result_row(self, row, now: datetime) -> Dict:
+        """Stored score of one scored row."""
+        return {
+            "property_id": int(row.id),
+            "city": row.city,
+            "property_type": row.property_type,
+            "price_per_sqft": float(row.price_per_sqft),
+            "score": float(row.score),
+            "abs_score": abs(float(row.score)),
+            "scored_at": now,
+        }
+
+
+REFITS = AnomalyRefits()
+
+
+def rebuild_anomaly_scores():
+    """Refit every baseline and rescore the whole table."""
+    REFITS.rebuild()
+
+
+def find_anomalies(frame: pd.DataFrame, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Ids and scores of rows whose |robust z| exceeds ``threshold``."""
+    prepared = prepare_frame(frame)
+    if "id" not in prepared:
+        prepared["id"] = prepared.index
+    scored = score_frame(prepared, fit_baselines(prepared))
+    flagged = scored[scored["score"].abs() > threshold]
+    flagged = flagged.iloc[np.argsort(-flagged["score"].abs().to_numpy(), kind="stable")]
+    return [
+        {"id": int(i), "score": float(s)}
+        for i, s in zip(flagged["id"], flagged["score"])
+    ]
+
+
+def init_anomaly_scores(app):
+    """Score new and updated listings through hooks; backfill scores once if missing."""
+    REFITS.init(app)
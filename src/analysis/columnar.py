@@ -0,0 +1,313 @@
+"""Memory-mapped columnar snapshots of the properties and price_history tables.
+
+Each snapshot is a directory of raw NumPy ``.npy`` column files. String
+columns are dictionary encoded (integer codes plus a JSON list of
+categories). A ``CURRENT`` file names the live snapshot and is replaced
+atomically, so prefork workers can map the same files zero-copy and pick
+up a refreshed snapshot on their next read. Ingests only schedule a
+refresh; writes within COLUMNAR_SNAPSHOT_DELAY seconds share one
+background export.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+SNAPSHOT_PREFIX = "snapshot-"
+CHUNK_SIZE = 50000
+MMAP_MODE = "c"
+
+# Storage kind -> in-memory dtype; categories are stored as int32 codes
+STORAGE_DTYPES = {
+    "int": np.int64,
+    "float": float,
+    "category": np.int32,
+    "datetime": "datetime64[ns]",
+}
+
+# Column name -> storage kind ("int", "float", "category" or "datetime")
+PROPERTY_COLUMNS = {
+    "id": "int",
+    "price": "float",
+    "bedrooms": "float",
+    "bathrooms": "float",
+    "square_feet": "float",
+    "city": "category",
+    "state": "category",
+    "zip_code": "category",
+    "property_type": "category",
+    "source": "category",
+    "scraped_at": "datetime",
+    "updated_at": "datetime",
+}
+PRICE_HISTORY_COLUMNS = {
+    "id": "int",
+    "property_id": "int",
+    "price": "float",
+    "recorded_at": "datetime",
+}
+
+
+def _table_schemas() -> Dict:
+    """Map table names to (model, column schema)."""
+    from src.database.models import Property, PriceHistory
+
+    return {
+        "properties": (Property, PROPERTY_COLUMNS),
+        "price_history": (PriceHistory, PRICE_HISTORY_COLUMNS),
+    }
+
+
+def _encode(kind: str, values, lookup: Optional[Dict]) -> np.ndarray:
+    """Convert one chunk of raw values to the column's storage dtype."""
+    if kind == "datetime":
+        return pd.to_datetime(pd.Series(values, dtype=object)).to_numpy("datetime64[ns]")
+    if kind == "category":
+        return np.fromiter(
+            (-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values),
+            dtype=np.int32,
+            count=len(values),
+        )
+    # None becomes NaN for floats
+    return np.asarray(values, dtype=STORAGE_DTYPES[kind])
+
+
+def _read_columns(session, model, schema: Dict) -> Tuple[Dict[str, np.ndarray], Dict[str, List]]:
+    """Stream a table chunk by chunk into preallocated per-column arrays.
+
+    Returns the arrays and the categories of each category column.
+    """
+    capacity = session.scalar(select(func.count()).select_from(model)) or 0
+    arrays = {name: np.empty(capacity, dtype=STORAGE_DTYPES[kind]) for name, kind in schema.items()}
+    lookups: Dict[str, Dict] = {name: {} for name, kind in schema.items() if kind == "category"}
+    size = 0
+
+    columns = [getattr(model, name) for name in schema]
+    result = session.execute(select(*columns).execution_options(yield_per=CHUNK_SIZE))
+    for partition in result.partitions():
+        end = size + len(partition)
+        if end > capacity:
+            # Rows committed after the count (no snapshot isolation); grow
+            capacity = max(end, 2 * capacity)
+            arrays = {name: np.resize(array, capacity) for name, array in arrays.items()}
+        for (name, kind), values in zip(schema.items(), zip(*partition)):
+            arrays[name][size:end] = _encode(kind, values, lookups.get(name))
+        size = end
+
+    arrays = {name: array[:size] for name, array in arrays.items()}
+    categories = {name: [str(value) for value in lookup] for name, lookup in lookups.items()}
+    return arrays, categories
+
+
+def _write_column(path: str, name: str, array: np.ndarray, categories: Optional[List[str]] = None):
+    """Save one column as .npy (plus categories for strings)."""
+    if categories is None:
+        np.save(os.path.join(path, f"{name}.npy"), array)
+        return
+    np.save(os.path.join(path, f"{name}.codes.npy"), array)
+    with open(os.path.join(path, f"{name}.categories.json"), "w") as fh:
+        json.dump(categories, fh)
+
+
+def export_snapshot(session, directory: str, keep: int = 2) -> str:
+    """Export both tables to a new snapshot and atomically make it current."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"{SNAPSHOT_PREFIX}{time.time_ns()}-{os.getpid()}"
+    building = os.path.join(directory, f".building-{name}")
+    os.makedirs(building)
+
+    for table, (model, schema) in _table_schemas().items():
+        table_path = os.path.join(building, table)
+        os.makedirs(table_path)
+        arrays, categories = _read_columns(session, model, schema)
+        for column, array in arrays.items():
+            _write_column(table_path, column, array, categories.get(column))
+
+    os.rename(building, os.path.join(directory, name))
+
+    # Atomic pointer swap: readers see either the old or the new snapshot
+    pointer_tmp = os.path.join(directory, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(pointer_tmp, "w") as fh:
+        fh.write(name)
+    os.replace(pointer_tmp, os.path.join(directory, CURRENT_FILE))
+
+    _prune_snapshots(directory, keep)
+    logger.info(f"Exported columnar snapshot {name}")
+    return os.path.join(directory, name)
+
+
+def _prune_snapshots(directory: str, keep: int):
+    """Delete all but the newest ``keep`` snapshots.
+
+    Workers that still map a deleted snapshot keep reading it until they
+    reload; POSIX keeps unlinked mapped files alive.
+    """
+    snapshots = sorted(
+        (d for d in os.listdir(directory) if d.startswith(SNAPSHOT_PREFIX)),
+        key=lambda d: int(d[len(SNAPSHOT_PREFIX):].split("-")[0]),
+    )
+    for stale in snapshots[:-keep] if keep else snapshots:
+        shutil.rmtree(os.path.join(directory, stale), ignore_errors=True)
+
+
+class ColumnarTable:
+    """Memory-mapped view of one exported table.
+
+    Files are mapped copy-on-write: pages stay shared between processes
+    unless a pandas operation writes to them, in which case only that
+    process gets a private copy and the file is never modified.
+    """
+
+    def __init__(self, path: str, schema: Dict):
+        """Map every column file of the table."""
+        self.path = path
+        self.schema = schema
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, List[str]] = {}
+        for name, kind in schema.items():
+            if kind == "category":
+                self.arrays[name] = np.load(os.path.join(path, f"{name}.codes.npy"), mmap_mode=MMAP_MODE)
+                with open(os.path.join(path, f"{name}.categories.json")) as fh:
+                    self.categories[name] = json.load(fh)
+            else:
+                self.arrays[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=MMAP_MODE)
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()))) if self.arrays else 0
+
+    def column(self, name: str):
+        """Return a column as a mapped array (or Categorical over mapped codes)."""
+        if name in self.categories:
+            return pd.Categorical.from_codes(self.arrays[name], self.categories[name])
+        return self.arrays[name]
+
+    def to_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Build a DataFrame whose columns share memory with the mapped files."""
+        names = columns or list(self.schema)
+        return pd.DataFrame({name: self.column(name) for name in names}, copy=False)
+
+
+class ColumnarSnapshot:
+    """A consistent set of mapped tables from one export."""
+
+    def __init__(self, path: str):
+        """Map the tables stored under ``path``."""
+        self.path = path
+        self.version = os.path.basename(path)
+        self.tables = {
+            table: ColumnarTable(os.path.join(path, table), schema)
+            for table, (_, schema) in _table_schemas().items()
+        }
+
+    @property
+    def properties(self) -> ColumnarTable:
+        """Mapped properties table."""
+        return self.tables["properties"]
+
+    @property
+    def price_history(self) -> ColumnarTable:
+        """Mapped price_history table."""
+        return self.tables["price_history"]
+
+
+# Per-process cache of the mapped snapshot, keyed by directory
+_mapped: Dict[str, ColumnarSnapshot] = {}
+
+
+def current_version(directory: str) -> Optional[str]:
+    """Return the name of the live snapshot, if any."""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as fh:
+            return fh.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot(directory: str) -> Optional[ColumnarSnapshot]:
+    """Return the live snapshot, remapping only when CURRENT has changed."""
+    version = current_version(directory)
+    if version is None:
+        return None
+    cached = _mapped.get(directory)
+    if cached is not None and cached.version == version:
+        return cached
+    snapshot = ColumnarSnapshot(os.path.join(directory, version))
+    _mapped[directory] = snapshot
+    return snapshot
+
+
+class SnapshotRefresher:
+    """Coalesces refresh requests into one background export per delay window."""
+
+    def __init__(self, app, directory: str, delay: float):
+        """Bind the refresher to an app and snapshot directory."""
+        self.app = app
+        self.directory = directory
+        self.delay = delay
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+    def schedule(self, changes=None):
+        """Ingest/update hook: export after ``delay`` unless already pending."""
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.delay, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        """Timer callback: clear the pending export, then run it."""
+        with self._lock:
+            self._timer = None
+        self.export()
+
+    def export(self):
+        """Export a snapshot now in a fresh app context and session."""
+        from src.app import db
+
+        # Writes committed while exporting schedule the next export
+        with self._export_lock, self.app.app_context():
+            try:
+                export_snapshot(db.session, self.directory)
+            except Exception as e:
+                logger.error(f"Columnar snapshot export failed: {e}")
+            finally:
+                db.session.remove()
+
+    def flush(self):
+        """Run a pending export immediately (tests and shutdown)."""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+            self.export()
+
+
+def init_snapshots(app):
+    """Export a snapshot at startup if missing and schedule a refresh after each ingest."""
+    from src.app import db
+    from src.database.ingest import register_ingest_hook, register_update_hook
+
+    directory = app.config["COLUMNAR_SNAPSHOT_DIR"]
+    refresher = SnapshotRefresher(app, directory, app.config.get("COLUMNAR_SNAPSHOT_DELAY", 5.0))
+    app.extensions["columnar_snapshots"] = refresher
+
+    register_ingest_hook(app, refresher.schedule)
+    register_update_hook(app, refresher.schedule)
+
+    if current_version(directory) is None:
+        with app.app_context():
+            export_snapshot(db.session, directory)
@@ -0,0 +1,189 @@
+"""Nearest-neighbour index of comparable properties, partitioned by city.
+
+Each city partition holds a KD-tree over standardized log price, log
+square feet, bedrooms and bathrooms plus a one-hot property type. New
+listings go into a small delta buffer that is searched by brute force
+and folded into the tree once it grows past a fraction of the tree size.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from src.app import db
+from src.database.ingest import changed_ids
+from src.database.models import Property
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_FEATURES = ["price", "square_feet", "bedrooms", "bathrooms"]
+PROPERTY_TYPES = ["house", "condo", "apartment", "townhouse", "studio"]
+# Distance added for a property-type mismatch, in standard deviations
+TYPE_WEIGHT = 1.5
+# Rebuild a partition's tree once its delta exceeds this fraction (or size)
+DELTA_FRACTION = 0.1
+MIN_DELTA_REBUILD = 256
+# Rebuild partitions at least this often to pick up edits and deletions
+REBUILD_SECONDS = 600
+
+
+class CityPartition:
+    """KD-tree plus delta buffer for one city's listings."""
+
+    def __init__(self, city: str, ids: np.ndarray, raw: np.ndarray, types: List[Optional[str]]):
+        """Fit feature scaling and build the tree."""
+        self.city = city
+        self.built_at = time.monotonic()
+        self.last_id = int(ids.max()) if len(ids) else 0
+
+        logged = self._log_features(raw)
+        self.center = np.nanmedian(logged, axis=0) if len(ids) else np.zeros(len(NUMERIC_FEATURES))
+        self.center = np.where(np.isnan(self.center), 0.0, self.center)
+        scale = np.nanstd(logged, axis=0) if len(ids) > 1 else np.ones(len(NUMERIC_FEATURES))
+        self.scale = np.where((scale > 0) & ~np.isnan(scale), scale, 1.0)
+
+        self.ids = ids
+        self.tree = cKDTree(self.features(raw, types)) if len(ids) else None
+        self.delta_ids = np.empty(0, dtype=np.int64)
+        self.delta_points = np.empty((0, len(NUMERIC_FEATURES) + len(PROPERTY_TYPES)))
+
+    def __len__(self):
+        return len(self.ids) + len(self.delta_ids)
+
+    @staticmethod
+    def _log_features(raw: np.ndarray) -> np.ndarray:
+        """Log-transform price and square feet."""
+        logged = raw.astype(float).copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            logged[:, :2] = np.log(np.where(logged[:, :2] > 0, logged[:, :2], np.nan))
+        return logged
+
+    def features(self, raw: np.ndarray, types: List[Optional[str]]) -> np.ndarray:
+        """Standardize numeric features, impute missing ones and add type one-hots."""
+        numeric = (self._log_features(raw) - self.center) / self.scale
+        numeric = np.where(np.isnan(numeric), 0.0, numeric)
+        one_hot = np.zeros((len(types), len(PROPERTY_TYPES)))
+        for row, property_type in enumerate(types):
+            if property_type in PROPERTY_TYPES:
+                one_hot[row, PROPERTY_TYPES.index(property_type)] = TYPE_WEIGHT / np.sqrt(2)
+        return np.hstack([numeric, one_hot])
+
+    def add(self, ids: np.ndarray, raw: np.ndarray, types: List[Optional[str]]):
+        """Append listings to the delta buffer."""
+        if len(ids) == 0:
+            return
+        self.delta_ids = np.concatenate([self.delta_ids, ids])
+        self.delta_points = np.vstack([self.delta_points, self.features(raw, types)])
+        self.last_id = max(self.last_id, int(ids.max()))
+
+    def needs_rebuild(self) -> bool:
+        """True when the delta is large or the tree is old."""
+        delta = len(self.delta_ids)
+        return (
+            delta > max(MIN_DELTA_REBUILD, DELTA_FRACTION * len(self.ids))
+            or time.monotonic() - self.built_at > REBUILD_SECONDS
+        )
+
+    def query(self, point: np.ndarray, k: int, exclude: int) -> List[Tuple[int, float]]:
+        """Top-k (id, distance) from the tree and the delta buffer."""
+        candidates = []
+        if self.tree is not None:
+            count = min(k + 1, len(self.ids))
+            distances, index = self.tree.query(point, k=count)
+            distances, index = np.atleast_1d(distances), np.atleast_1d(index)
+            candidates.extend(zip(self.ids[index].tolist(), distances.tolist()))
+        if len(self.delta_ids):
+            distances = np.sqrt(((self.delta_points - point) ** 2).sum(axis=1))
+            nearest = np.argsort(distances)[: k + 1]
+            candidates.extend(zip(self.delta_ids[nearest].tolist(), distances[nearest].tolist()))
+
+        candidates = [c for c in candidates if c[0] != exclude]
+        candidates.sort(key=lambda c: c[1])
+        return candidates[:k]
+
+
+class ComparablesIndex:
+    """Per-process registry of city partitions, loaded lazily."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.partitions: Dict[str, CityPartition] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(*criteria):
+        """Load ids, numeric features and types for matching properties."""
+        rows = (
+            db.session.query(Property.id, Property.property_type, *[getattr(Property, f) for f in NUMERIC_FEATURES])
+            .filter(*criteria)
+            .order_by(Property.id)
+            .all()
+        )
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        types = [r[1] for r in rows]
+        raw = np.array([r[2:] for r in rows], dtype=float).reshape(len(rows), len(NUMERIC_FEATURES))
+        return ids, raw, types
+
+    def partition(self, city: str) -> CityPartition:
+        """Return a fresh partition for ``city``, building or catching it up."""
+        with self._lock:
+            partition = self.partitions.get(city)
+            if partition is None or partition.needs_rebuild():
+                partition = CityPartition(city, *self._load(Property.city == city))
+                self.partitions[city] = partition
+                logger.info(f"Built comparables index for {city} ({len(partition)} listings)")
+            else:
+                # Rows written by other workers since our last look
+                partition.add(*self._load(Property.id > partition.last_id, Property.city == city))
+            return partition
+
+    def add_properties(self, property_ids: List[int]):
+        """Ingest hook: push new listings into already loaded partitions."""
+        with self._lock:
+            if not self.partitions:
+                return
+            cities = {
+                city
+                for (city,) in db.session.query(Property.city)
+                .filter(Property.id.in_(property_ids), Property.city.in_(list(self.partitions)))
+                .distinct()
+            }
+            for city in cities:
+                partition = self.partitions[city]
+                partition.add(*self._load(Property.id > partition.last_id, Property.city == city))
+
+    def drop_properties(self, previous: Dict[int, Dict]):
+        """Update hook: forget partitions holding changed listings; they reload on next use."""
+        ids = changed_ids(previous, ["city", "property_type"] + NUMERIC_FEATURES)
+        with self._lock:
+            if not self.partitions or not ids:
+                return
+            cities = {city for (city,) in db.session.query(Property.city).filter(Property.id.in_(ids)).distinct()}
+            cities.update(previous[i]["city"] for i in ids if "city" in previous[i])
+            for city in cities:
+                self.partitions.pop(city, None)
+
+    def comparables(self, property_obj: Property, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k comparable (id, distance) pairs within the property's city."""
+        partition = self.partition(property_obj.city)
+        raw = np.array([[getattr(property_obj, f) for f in NUMERIC_FEATURES]], dtype=float)
+        point = partition.features(raw, [property_obj.property_type])[0]
+        return partition.query(point, k, exclude=property_obj.id)
+
+
+def get_comparables_index(app) -> ComparablesIndex:
+    """Return the app's comparables index."""
+    return app.extensions["comparables_index"]
+
+
+def init_comparables(app):
+    """Create the app's index and keep it current on ingest."""
+    from src.database.ingest import register_ingest_hook, register_update_hook
+
+    index = app.extensions["comparables_index"] = ComparablesIndex()
+    register_ingest_hook(app, index.add_properties)
+    register_update_hook(app, index.drop_properties)
@@ -0,0 +1,147 @@
+"""Percentile ranks of listings within their city and property type.
+
+Each (city, property_type) group keeps sorted arrays of price, price per
+square foot and size, so ranking a property is a ``searchsorted`` call.
+Groups are reloaded when their row count or highest id changes (one
+grouped query per lookup covers writes from other workers) or when the
+cached arrays are older than ``MAX_AGE_SECONDS``.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from src.app import db
+from src.database.ingest import affected_groups, register_update_hook
+from src.database.models import Property
+from src.monitoring.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("price", "price_per_sqft", "square_feet")
+# Reload groups at least this often to pick up edited prices
+MAX_AGE_SECONDS = 300
+
+GroupKey = Tuple[Optional[str], Optional[str]]
+
+
+class GroupArrays:
+    """Sorted metric arrays for one (city, property_type) group."""
+
+    def __init__(self, signature: Tuple[int, int], rows: List[Tuple]):
+        """Sort each metric, dropping missing values."""
+        self.signature = signature
+        self.loaded_at = time.monotonic()
+
+        values = np.array(rows, dtype=float).reshape(len(rows), 2)
+        price, sqft = values[:, 0], values[:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ppsf = np.where(sqft > 0, price / sqft, np.nan)
+        self.sorted = {
+            name: np.sort(column[~np.isnan(column)])
+            for name, column in zip(METRICS, (price, ppsf, sqft))
+        }
+
+    def percentile(self, metric: str, value: Optional[float]) -> Optional[float]:
+        """Mid-rank percentile of ``value`` (ties count half)."""
+        column = self.sorted[metric]
+        if value is None or np.isnan(value) or len(column) == 0:
+            return None
+        below = np.searchsorted(column, value, side="left")
+        at_or_below = np.searchsorted(column, value, side="right")
+        return round(100.0 * (below + at_or_below) / (2 * len(column)), 2)
+
+
+def _group_filter(city: Optional[str], property_type: Optional[str]):
+    """SQL criteria selecting one group (None matches NULL)."""
+    return (
+        Property.city.is_(None) if city is None else Property.city == city,
+        Property.property_type.is_(None) if property_type is None else Property.property_type == property_type,
+    )
+
+
+class PercentileRanks:
+    """Per-process cache of sorted group arrays."""
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self.groups: Dict[GroupKey, GroupArrays] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signatures(keys: Iterable[GroupKey]) -> Dict[GroupKey, Tuple[int, int]]:
+        """Row count and highest id of each requested group, in one query."""
+        keys = set(keys)
+        rows = (
+            db.session.query(Property.city, Property.property_type, func.count(Property.id), func.max(Property.id))
+            .filter(Property.city.in_({city for city, _ in keys if city is not None}))
+            .group_by(Property.city, Property.property_type)
+        )
+        return {(city, t): (count, max_id) for city, t, count, max_id in rows if (city, t) in keys}
+
+    def arrays(self, keys: Iterable[GroupKey]) -> Dict[GroupKey, GroupArrays]:
+        """Fresh arrays for each group, reloading only stale ones."""
+        signatures = self._signatures(keys)
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for key, signature in signatures.items():
+                cached = self.groups.get(key)
+                hit = (
+                    cached is not None
+                    and cached.signature == signature
+                    and now - cached.loaded_at < MAX_AGE_SECONDS
+                )
+                record_cache("percentile_ranks", hit)
+                if not hit:
+                    rows = db.session.query(Property.price, Property.square_feet).filter(*_group_filter(*key)).all()
+                    cached = self.groups[key] = GroupArrays(signature, rows)
+                result[key] = cached
+        return result
+
+    def drop_groups(self, previous: Dict[int, Dict]):
+        """Update hook: forget groups whose members or their prices and sizes changed."""
+        groups = affected_groups(previous, ("price", "square_feet", "city", "property_type"))
+        with self._lock:
+            for city, property_type in groups:
+                self.groups.pop((city, property_type), None)
+                self.groups.pop((city, property_type or None), None)
+
+    def rank(self, properties: List[Property]) -> List[Dict]:
+        """Percentile ranks for each property within its city and type."""
+        groups = self.arrays((p.city, p.property_type) for p in properties)
+        ranked = []
+        for property_obj in properties:
+            group = groups.get((property_obj.city, property_obj.property_type))
+            price, sqft = property_obj.price, property_obj.square_feet
+            values = {
+                "price": price,
+                "price_per_sqft": price / sqft if price is not None and sqft else None,
+                "square_feet": sqft,
+            }
+            ranked.append(
+                {
+                    "group_size": len(group.sorted["price"]) if group else 0,
+                    "percentiles": {
+                        metric: group.percentile(metric, value) if group else None
+                        for metric, value in values.items()
+                    },
+                    "price_per_sqft": values["price_per_sqft"],
+                }
+            )
+        return ranked
+
+
+def get_percentile_ranks(app) -> PercentileRanks:
+    """Return the app's percentile rank cache."""
+    return app.extensions["percentile_ranks"]
+
+
+def init_percentile_ranks(app):
+    """Create the app's percentile rank cache; updated listings invalidate their groups."""
+    ranks = app.extensions["percentile_ranks"] = PercentileRanks()
+    register_update_hook(app, ranks.drop_groups)
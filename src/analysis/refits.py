@@ -0,0 +1,152 @@
+"""Refit scheduling for models fitted per group of listings.
+
+Anomaly baselines and valuation models are both fitted per group and
+stored with the ``count`` of rows they were fitted on and a ``pending``
+count of rows scored against them since. New rows are scored with the
+stored fit until the group has grown by REFIT_FRACTION, when it is
+refitted and rescored as a whole; each property's result row is replaced
+on rescoring; and an empty result table is backfilled once at startup.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import insert
+
+from src.app import db
+from src.database.ingest import changed_ids, register_ingest_hook, register_update_hook
+from src.database.models import Property
+
+logger = logging.getLogger(__name__)
+
+# Refit a group once this fraction of new rows has been scored against its fit
+REFIT_FRACTION = 0.1
+# Ids per DELETE, below SQLite's bound parameter limit
+DELETE_CHUNK = 900
+
+
+class GroupRefits:
+    """Incremental scoring, refits and backfill for one per-group model.
+
+    Subclasses name the stored fit and result models, the group columns and
+    the property columns a result depends on, and implement loading,
+    fitting, scoring and storage of their own fit format.
+    """
+
+    fit_model = None
+    result_model = None
+    group_columns: Sequence[str] = ()
+    watched_columns: Sequence[str] = ()
+    label = "groups"
+
+    def load_frame(self, *criteria) -> pd.DataFrame:
+        """Load the columns the model needs for matching properties."""
+        raise NotImplementedError
+
+    def fit(self, frame: pd.DataFrame):
+        """Fit every group in ``frame`` with enough data."""
+        raise NotImplementedError
+
+    def score(self, frame: pd.DataFrame, fits) -> pd.DataFrame:
+        """Score the rows of ``frame`` whose group has a fit."""
+        raise NotImplementedError
+
+    def cached(self, key: Tuple, stored):
+        """One stored fit row in the format ``score`` expects."""
+        raise NotImplementedError
+
+    def save_fits(self, fits):
+        """Store fitted groups, usually through ``store_fit``."""
+        raise NotImplementedError
+
+    def result_row(self, row, now: datetime) -> Dict:
+        """Result table values for one scored row."""
+        raise NotImplementedError
+
+    def group_criteria(self, key: Tuple) -> List:
+        """SQL filters selecting one group."""
+        return [getattr(Property, name) == value for name, value in zip(self.group_columns, key)]
+
+    def _stored(self, key: Tuple):
+        """A group's stored fit row, or None."""
+        return self.fit_model.query.filter_by(**dict(zip(self.group_columns, key))).first()
+
+    def store_fit(self, key: Tuple, **values):
+        """Upsert one group's fit, resetting its pending counter."""
+        stored = self._stored(key)
+        if stored is None:
+            stored = self.fit_model(**dict(zip(self.group_columns, key)))
+            db.session.add(stored)
+        for name, value in values.items():
+            setattr(stored, name, value)
+        stored.pending = 0
+        stored.fitted_at = datetime.utcnow()
+
+    def delete_results(self, ids: List[int]):
+        """Delete the stored results of ``ids``."""
+        column = self.result_model.property_id
+        for start in range(0, len(ids), DELETE_CHUNK):
+            self.result_model.query.filter(column.in_(ids[start:start + DELETE_CHUNK])).delete(synchronize_session=False)
+
+    def save_results(self, scored: pd.DataFrame, replace: bool = True):
+        """Store results for the scored properties with one bulk insert, replacing old ones."""
+        if scored.empty:
+            return
+        if replace:
+            self.delete_results(scored["id"].astype(int).tolist())
+        now = datetime.utcnow()
+        db.session.execute(insert(self.result_model), [self.result_row(row, now) for row in scored.itertuples()])
+
+    def score_new(self, property_ids: List[int]):
+        """Ingest hook: score new rows with stored fits.
+
+        Groups without a fit, or that have grown by REFIT_FRACTION since
+        their last fit, are refitted and rescored as a whole.
+        """
+        new_rows = self.load_frame(Property.id.in_(property_ids))
+        scored = []
+        for key, rows in new_rows.groupby(list(self.group_columns), sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            stored = self._stored(key)
+            if stored is None or stored.pending + len(rows) > REFIT_FRACTION * stored.count:
+                group = self.load_frame(*self.group_criteria(key))
+                fits = self.fit(group)
+                self.save_fits(fits)
+                scored.append(self.score(group, fits))
+            else:
+                stored.pending += len(rows)
+                scored.append(self.score(rows, self.cached(key, stored)))
+
+        if scored:
+            self.save_results(pd.concat(scored))
+        db.session.commit()
+
+    def rescore_updated(self, previous: Dict[int, Dict]):
+        """Update hook: rescore listings whose watched columns changed."""
+        ids = changed_ids(previous, self.watched_columns)
+        if ids:
+            # Rows that can no longer be scored must not keep their old result
+            self.delete_results(ids)
+            self.score_new(ids)
+
+    def rebuild(self):
+        """Refit every group and rescore the whole table."""
+        frame = self.load_frame()
+        fits = self.fit(frame)
+        self.fit_model.query.delete()
+        self.result_model.query.delete()
+        self.save_fits(fits)
+        self.save_results(self.score(frame, fits), replace=False)
+        db.session.commit()
+        logger.info(f"Refitted {len(fits)} {self.label} over {len(frame)} properties")
+
+    def init(self, app):
+        """Score new and updated listings through hooks; backfill once if empty."""
+        register_ingest_hook(app, self.score_new)
+        register_update_hook(app, self.rescore_updated)
+
+        with app.app_context():
+            if self.result_model.query.first() is None and Property.query.first() is not None:
+                self.rebuild()
@@ -0,0 +1,136 @@
+"""Incrementally maintained price sketches per (city, property_type).
+
+Sketches are merged with newly ingested prices after each ingest commit,
+so medians and percentiles are answered from a handful of rows instead of
+a scan and sort of the properties table.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+
+from src.analysis.aggregates import GroupedAggregates, PriceAggregate, stream_aggregates
+from src.app import db
+from src.database.engine import upsert_insert
+from src.database.ingest import affected_groups, group_criteria
+from src.database.models import PriceSketch, Property
+
+logger = logging.getLogger(__name__)
+
+SKETCH_GROUPS = ("city", "property_type")
+
+
+def _save_groups(grouped: GroupedAggregates, replace: bool = False):
+    """Merge grouped aggregates into the persisted sketches.
+
+    Rows are created with INSERT ... ON CONFLICT, so concurrent ingests that
+    open the same new group do not collide on ``uq_price_sketch_group``; an
+    existing row is locked before the digests are merged.
+    """
+    connection = db.session.connection()
+    now = datetime.utcnow()
+    rows, aggregates = [], []
+    for (city, property_type), aggregate in grouped.groups.items():
+        if city is None or pd.isna(city):
+            continue
+        property_type = "" if property_type is None or pd.isna(property_type) else property_type
+        rows.append({"city": city, "property_type": property_type, "state": aggregate.to_dict(),
+                     "count": aggregate.moments.count, "updated_at": now})
+        aggregates.append(aggregate)
+
+    statement = upsert_insert(connection, PriceSketch.__table__)
+    if replace and rows:
+        statement = statement.on_conflict_do_update(
+            index_elements=SKETCH_GROUPS,
+            set_={name: statement.excluded[name] for name in ("state", "count", "updated_at")},
+        )
+        connection.execute(statement, rows)
+    elif rows:
+        statement = statement.on_conflict_do_nothing(index_elements=SKETCH_GROUPS)
+        for row, aggregate in zip(rows, aggregates):
+            if connection.execute(statement, row).rowcount:
+                continue
+            stored = (
+                PriceSketch.query.filter_by(city=row["city"], property_type=row["property_type"])
+                .with_for_update()
+                .populate_existing()
+                .one()
+            )
+            merged = PriceAggregate.from_dict(stored.state)
+            merged.merge(aggregate)
+            stored.state = merged.to_dict()
+            stored.count = merged.moments.count
+    db.session.commit()
+
+
+def update_price_sketches(property_ids):
+    """Ingest hook: fold the prices of new properties into their sketches."""
+    rows = (
+        db.session.query(Property.city, Property.property_type, Property.price)
+        .filter(Property.id.in_(property_ids))
+        .all()
+    )
+    grouped = GroupedAggregates(SKETCH_GROUPS)
+    grouped.update_frame(pd.DataFrame(rows, columns=list(SKETCH_GROUPS) + ["price"]))
+    _save_groups(grouped)
+
+
+def refresh_price_sketches(previous: Dict[int, Dict]):
+    """Update hook: recompute the sketches of groups whose prices or members changed.
+
+    Digests cannot forget a value, so affected groups are rebuilt from their rows.
+    """
+    for city, property_type in affected_groups(previous, ("price",) + SKETCH_GROUPS):
+        prices = [price for (price,) in db.session.query(Property.price).filter(group_criteria(city, property_type))]
+        if not prices:
+            PriceSketch.query.filter_by(city=city, property_type=property_type).delete()
+            continue
+        grouped = GroupedAggregates(SKETCH_GROUPS)
+        grouped.update_frame(pd.DataFrame({"city": city, "property_type": property_type, "price": prices}))
+        _save_groups(grouped, replace=True)
+    db.session.commit()
+
+
+def rebuild_price_sketches():
+    """Recompute every sketch from the properties table in one streaming pass."""
+    PriceSketch.query.delete()
+    _save_groups(stream_aggregates(db.session, SKETCH_GROUPS), replace=True)
+    logger.info("Rebuilt price sketches")
+
+
+def sketch_summary(city: Optional[str] = None, property_type: Optional[str] = None) -> Dict:
+    """Median, p10/p90 and IQR merged from the matching sketches."""
+    query = PriceSketch.query
+    if city:
+        query = query.filter_by(city=city)
+    if property_type:
+        query = query.filter_by(property_type=property_type)
+
+    merged = PriceAggregate()
+    for row in query:
+        merged.merge(PriceAggregate.from_dict(row.state))
+
+    if merged.moments.count == 0:
+        return {"median_price": None, "p10_price": None, "p90_price": None, "iqr": None}
+
+    p10, p25, median, p75, p90 = merged.digest.quantile([0.1, 0.25, 0.5, 0.75, 0.9])
+    return {
+        "median_price": float(median),
+        "p10_price": float(p10),
+        "p90_price": float(p90),
+        "iqr": float(p75 - p25),
+    }
+
+
+def init_price_sketches(app):
+    """Keep sketches current on ingest; backfill them once if missing."""
+    from src.database.ingest import register_ingest_hook, register_update_hook
+
+    register_ingest_hook(app, update_price_sketches)
+    register_update_hook(app, refresh_price_sketches)
+
+    with app.app_context():
+        if PriceSketch.query.first() is None and Property.query.first() is not None:
+            rebuild_price_sketches()
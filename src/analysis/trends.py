@@ -0,0 +1,264 @@
+"""Price trend engine backed by incrementally maintained rollup tables.
+
+Every ingest folds new listing prices into day, week and month rollups per
+(city, property_type). Trend queries merge the rollup rows of the
+requested granularity, so a multi-year series reads a few hundred rows
+instead of the properties table.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, tuple_
+
+from src.analysis.aggregates import PriceAggregate
+from src.app import db
+from src.database.engine import upsert_insert
+from src.database.ingest import changed_ids, group_criteria
+from src.database.models import PriceRollup, Property
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("day", "week", "month")
+SERIES_COLUMNS = ("city", "property_type")
+CHUNK_SIZE = 50000
+ROLLUP_KEY = ("period", "bucket", "city", "property_type")
+# Rollup keys per lookup, below SQLite's bound parameter limit
+KEY_CHUNK = 200
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the period containing ``day`` (weeks start on Monday)."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_series(timestamps: pd.Series, granularity: str) -> pd.Series:
+    """Vectorized ``bucket_start`` over a datetime series."""
+    days = pd.to_datetime(timestamps).dt.normalize()
+    if granularity == "week":
+        days = days - pd.to_timedelta(days.dt.weekday, unit="D")
+    elif granularity == "month":
+        days = days.dt.to_period("M").dt.start_time
+    return days.dt.date
+
+
+def _rollup_frame(frame: pd.DataFrame) -> Dict:
+    """Group rows of (scraped_at, city, property_type, price) into rollup aggregates."""
+    frame = frame.dropna(subset=["scraped_at", "city", "price"])
+    frame = frame.assign(property_type=frame["property_type"].fillna(""))
+    prices = frame["price"].to_numpy(dtype=float)
+
+    rollups = {}
+    for granularity in GRANULARITIES:
+        keyed = frame.assign(bucket=bucket_series(frame["scraped_at"], granularity))
+        for key, index in keyed.groupby(["bucket", "city", "property_type"], sort=False).indices.items():
+            aggregate = PriceAggregate()
+            aggregate.update(prices[index])
+            rollups[(granularity,) + tuple(key)] = aggregate
+    return rollups
+
+
+def _save_rollups(rollups: Dict, replace: bool = False):
+    """Merge aggregates into their rollup rows, or overwrite them with ``replace``.
+
+    Missing rows are created with INSERT ... ON CONFLICT, so concurrent
+    ingests opening the same bucket do not collide on ``uq_price_rollup``;
+    rows that already existed are locked and merged, loaded a chunk of keys
+    per query.
+    """
+    if not rollups:
+        return
+    connection = db.session.connection()
+    table = PriceRollup.__table__
+    rows = [
+        {"period": granularity, "bucket": bucket, "city": city, "property_type": property_type,
+         "state": aggregate.to_dict(), "count": aggregate.moments.count}
+        for (granularity, bucket, city, property_type), aggregate in rollups.items()
+    ]
+    statement = upsert_insert(connection, table)
+    if replace:
+        statement = statement.on_conflict_do_update(
+            index_elements=ROLLUP_KEY, set_={"state": statement.excluded.state, "count": statement.excluded.count}
+        )
+        connection.execute(statement, rows)
+        return
+
+    statement = statement.on_conflict_do_nothing(index_elements=ROLLUP_KEY).returning(
+        *(table.c[name] for name in ROLLUP_KEY)
+    )
+    inserted = {tuple(row) for row in connection.execute(statement, rows)}
+    existing = [key for key in rollups if key not in inserted]
+    key_columns = tuple_(*(getattr(PriceRollup, name) for name in ROLLUP_KEY))
+    for start in range(0, len(existing), KEY_CHUNK):
+        stored = PriceRollup.query.filter(key_columns.in_(existing[start:start + KEY_CHUNK]))
+        for row in stored.with_for_update().populate_existing():
+            merged = PriceAggregate.from_dict(row.state)
+            merged.merge(rollups[(row.period, row.bucket, row.city, row.property_type)])
+            row.state = merged.to_dict()
+            row.count = merged.moments.count
+
+
+def _load_rows(*criteria) -> pd.DataFrame:
+    """Load the columns rollups need for matching properties."""
+    rows = db.session.query(
+        Property.scraped_at, Property.city, Property.property_type, Property.price
+    ).filter(*criteria)
+    return pd.DataFrame(rows.all(), columns=["scraped_at", "city", "property_type", "price"])
+
+
+def update_rollups(property_ids: List[int]):
+    """Ingest hook: fold new listings into day, week and month rollups."""
+    _save_rollups(_rollup_frame(_load_rows(Property.id.in_(property_ids))))
+    db.session.commit()
+
+
+def _bucket_end(bucket: date, granularity: str) -> date:
+    """First day after the period starting at ``bucket``."""
+    if granularity == "week":
+        return bucket + timedelta(days=7)
+    if granularity == "month":
+        return (bucket + timedelta(days=32)).replace(day=1)
+    return bucket + timedelta(days=1)
+
+
+def refresh_rollups(previous: Dict[int, Dict]):
+    """Update hook: recompute the rollup buckets updated listings left or joined."""
+    ids = changed_ids(previous, ("price",) + SERIES_COLUMNS)
+    targets = defaultdict(set)
+    rows = db.session.query(Property.id, Property.city, Property.property_type, Property.scraped_at).filter(
+        Property.id.in_(ids)
+    ) if ids else []
+    for property_id, city, property_type, scraped_at in rows:
+        if scraped_at is None:
+            continue
+        old = previous[property_id]
+        for group in {(city, property_type or ""), (old.get("city", city), old.get("property_type", property_type) or "")}:
+            targets[group].update((g, bucket_start(scraped_at.date(), g)) for g in GRANULARITIES)
+
+    for (city, property_type), buckets in targets.items():
+        # Load whole periods so every target bucket is recomputed from all its rows
+        start = min(bucket for _, bucket in buckets)
+        end = max(_bucket_end(bucket, g) for g, bucket in buckets)
+        frame = _load_rows(
+            group_criteria(city, property_type),
+            Property.scraped_at >= datetime.combine(start, time.min),
+            Property.scraped_at < datetime.combine(end, time.min),
+        )
+        rollups = _rollup_frame(frame)
+        keys = {(g, bucket, city, property_type) for g, bucket in buckets}
+        _save_rollups({key: rollups[key] for key in keys if key in rollups}, replace=True)
+        for granularity, bucket, _, _ in keys - set(rollups):
+            PriceRollup.query.filter_by(
+                period=granularity, bucket=bucket, city=city, property_type=property_type
+            ).delete()
+    db.session.commit()
+
+
+def rebuild_rollups():
+    """Recompute all rollups from the properties table in chunks."""
+    PriceRollup.query.delete()
+    db.session.commit()
+
+    columns = (Property.scraped_at, Property.city, Property.property_type, Property.price)
+    result = db.session.execute(select(*columns).execution_options(yield_per=CHUNK_SIZE))
+    for partition in result.partitions():
+        frame = pd.DataFrame(partition, columns=["scraped_at", "city", "property_type", "price"])
+        _save_rollups(_rollup_frame(frame))
+        db.session.flush()
+    db.session.commit()
+    logger.info("Rebuilt price rollups")
+
+
+def price_trend(
+    granularity: str = "week",
+    city: Optional[str] = None,
+    property_type: Optional[str] = None,
+    group_by: Optional[str] = None,
+    window: int = 4,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Dict:
+    """Price series from the rollup tables.
+
+    Returns one series (or one per ``group_by`` value) of per-bucket count,
+    average and median, plus a rolling median merged over ``window`` buckets.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if group_by is not None and group_by not in SERIES_COLUMNS:
+        raise ValueError(f"group_by must be one of {', '.join(SERIES_COLUMNS)}")
+
+    query = PriceRollup.query.filter_by(period=granularity)
+    if city:
+        query = query.filter_by(city=city)
+    if property_type:
+        query = query.filter_by(property_type=property_type)
+    if start:
+        query = query.filter(PriceRollup.bucket >= bucket_start(start, granularity))
+    if end:
+        query = query.filter(PriceRollup.bucket <= end)
+
+    series: Dict[str, Dict[date, PriceAggregate]] = {}
+    for row in query.order_by(PriceRollup.bucket):
+        name = getattr(row, group_by) if group_by else "all"
+        buckets = series.setdefault(name, {})
+        aggregate = PriceAggregate.from_dict(row.state)
+        if row.bucket in buckets:
+            buckets[row.bucket].merge(aggregate)
+        else:
+            buckets[row.bucket] = aggregate
+
+    return {
+        "granularity": granularity,
+        "window": window,
+        "series": {name: _series_points(buckets, window) for name, buckets in series.items()},
+    }
+
+
+def _series_points(buckets: Dict[date, PriceAggregate], window: int) -> Dict:
+    """Serialize one series with a rolling median and trend direction."""
+    keys = sorted(buckets)
+    points = []
+    for i, bucket in enumerate(keys):
+        rolling = PriceAggregate()
+        for previous in keys[max(0, i - window + 1):i + 1]:
+            rolling.merge(buckets[previous])
+        summary = buckets[bucket].summary()
+        points.append(
+            {
+                "period": bucket.isoformat(),
+                "count": summary["count"],
+                "avg_price": summary["avg_price"],
+                "median_price": summary["median_price"],
+                "rolling_median_price": rolling.digest.quantile(0.5),
+            }
+        )
+    return {"trend": trend_direction([p["avg_price"] for p in points]), "points": points}
+
+
+def trend_direction(values: List[float]) -> str:
+    """Classify a series as "up", "down" or "stable" from its endpoints."""
+    values = [v for v in values if v is not None and not np.isnan(v)]
+    if len(values) < 2 or values[-1] == values[0]:
+        return "stable"
+    return "up" if values[-1] > values[0] else "down"
+
+
+def init_rollups(app):
+    """Keep rollups current on ingest; backfill them once if missing."""
+    from src.database.ingest import register_ingest_hook, register_update_hook
+
+    register_ingest_hook(app, update_rollups)
+    register_update_hook(app, refresh_rollups)
+
+    with app.app_context():
+        if PriceRollup.query.first() is None and Property.query.first() is not None:
+            rebuild_rollups()
@@ -0,0 +1,168 @@
+"""Per-city hedonic valuation with cached coefficients.
+
+Each city gets a log-linear regression of price on log square feet,
+bedrooms, bathrooms and property type, fitted with NumPy least squares.
+Coefficients are stored in ``valuation_models``; scoring gathers each
+row's city coefficients and evaluates every row in one vectorized pass.
+"""
+
+import logging
+import warnings
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.refits import GroupRefits
+from src.app import db
+from src.database.models import Property, Valuation, ValuationModel
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ["square_feet", "bedrooms", "bathrooms"]
+# First level is the baseline; unknown types are valued as the baseline
+TYPE_LEVELS = ["house", "condo", "apartment", "townhouse", "studio"]
+DESIGN_COLUMNS = ["intercept", "log_square_feet", "bedrooms", "bathrooms"] + [
+    f"type_{t}" for t in TYPE_LEVELS[1:]
+]
+MIN_CITY_SIZE = 20
+# Price more than this fraction above/below fair value is flagged
+FLAG_MARGIN = 0.15
+
+
+def design_matrix(frame: pd.DataFrame, medians: np.ndarray) -> np.ndarray:
+    """Regression design matrix; ``medians`` holds per-row imputation values."""
+    raw = frame[FEATURES].to_numpy(dtype=float)
+    missing = np.isnan(raw)
+    missing[:, 0] |= ~(raw[:, 0] > 0)
+    raw = np.where(missing, medians, raw)
+
+    types = frame["property_type"].to_numpy(dtype=object)
+    dummies = np.column_stack([types == t for t in TYPE_LEVELS[1:]]).astype(float)
+    return np.column_stack([np.ones(len(frame)), np.log(raw[:, 0]), raw[:, 1], raw[:, 2], dummies])
+
+
+def fit_city(frame: pd.DataFrame) -> Optional[Dict]:
+    """Fit one city's model, or None when it has too few priced rows."""
+    frame = frame[frame["price"] > 0]
+    if len(frame) < MIN_CITY_SIZE:
+        return None
+
+    raw = frame[FEATURES].to_numpy(dtype=float)
+    raw[:, 0] = np.where(raw[:, 0] > 0, raw[:, 0], np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        medians = np.nanmedian(raw, axis=0)
+    # A feature missing for the whole city becomes a constant absorbed by the intercept
+    medians = np.where(np.isnan(medians), [1.0, 0.0, 0.0], medians)
+
+    X = design_matrix(frame, medians)
+    y = np.log(frame["price"].to_numpy(dtype=float))
+    coefficients, *_ = np.linalg.lstsq(X, y, rcond=None)
+
+    residuals = y - X @ coefficients
+    total = ((y - y.mean()) ** 2).sum()
+    return {
+        "coefficients": coefficients.tolist(),
+        "medians": medians.tolist(),
+        # Duan's smearing factor corrects the bias of exp() on a log-scale fit
+        "smearing": float(np.exp(residuals).mean()),
+        "r_squared": float(1 - (residuals ** 2).sum() / total) if total > 0 else None,
+        "count": len(frame),
+    }
+
+
+def fit_models(frame: pd.DataFrame) -> Dict[str, Dict]:
+    """Fit a model for every city with enough data."""
+    models = {}
+    for city, rows in frame.groupby("city", sort=False):
+        model = fit_city(rows)
+        if model is not None:
+            models[city] = model
+    return models
+
+
+def score_frame(frame: pd.DataFrame, models: Dict[str, Dict]) -> pd.DataFrame:
+    """Fair value, price gap and flag for each row whose city has a model."""
+    cities = list(models)
+    frame = frame[frame["city"].isin(cities) & (frame["price"] > 0)]
+    if frame.empty:
+        return frame.assign(fair_value=[], price_gap=[], flag=[])
+
+    codes = pd.Categorical(frame["city"], categories=cities).codes
+    coefficients = np.array([models[c]["coefficients"] for c in cities])[codes]
+    medians = np.array([models[c]["medians"] for c in cities])[codes]
+    smearing = np.array([models[c]["smearing"] for c in cities])[codes]
+
+    X = design_matrix(frame, medians)
+    fair_value = np.exp(np.einsum("ij,ij->i", X, coefficients)) * smearing
+    price_gap = frame["price"].to_numpy(dtype=float) / fair_value - 1
+    flag = np.where(price_gap > FLAG_MARGIN, "over", np.where(price_gap < -FLAG_MARGIN, "under", "fair"))
+    return frame.assign(fair_value=fair_value, price_gap=price_gap, flag=flag)
+
+
+class ValuationRefits(GroupRefits):
+    """Hedonic models per city, refitted as cities grow."""
+
+    fit_model = ValuationModel
+    result_model = Valuation
+    group_columns = ["city"]
+    watched_columns = ["price", "city", "property_type"] + FEATURES
+    label = "valuation models"
+
+    def load_frame(self, *criteria) -> pd.DataFrame:
+        """Load the columns the model needs for matching properties."""
+        columns = ["id", "city", "property_type", "price"] + FEATURES
+        rows = db.session.query(*[getattr(Property, c) for c in columns]).filter(*criteria)
+        frame = pd.DataFrame(rows.all(), columns=columns)
+        frame["price"] = pd.to_numeric(frame["price"], errors="coerce")
+        return frame
+
+    def fit(self, frame: pd.DataFrame) -> Dict[str, Dict]:
+        """Models of every city with enough data."""
+        return fit_models(frame)
+
+    def score(self, frame: pd.DataFrame, fits: Dict[str, Dict]) -> pd.DataFrame:
+        """Fair values against ``fits``."""
+        return score_frame(frame, fits)
+
+    def cached(self, key, stored: ValuationModel) -> Dict[str, Dict]:
+        """A stored model row in the shape ``score_frame`` expects."""
+        return {key[0]: {"coefficients": stored.coefficients, "medians": stored.medians, "smearing": stored.smearing}}
+
+    def save_fits(self, fits: Dict[str, Dict]):
+        """Upsert model rows."""
+        for city, fitted in fits.items():
+            self.store_fit(
+                (city,),
+                coefficients=fitted["coefficients"],
+                medians=fitted["medians"],
+                smearing=fitted["smearing"],
+                r_squared=fitted["r_squared"],
+                count=fitted["count"],
+            )
+
+    def result_row(self, row, now: datetime) -> Dict:
+        """Stored valuation of one scored row."""
+        return {
+            "property_id": int(row.id),
+            "city": row.city,
+            "fair_value": float(row.fair_value),
+            "price_gap": float(row.price_gap),
+            "flag": row.flag,
+            "valued_at": now,
+        }
+
+
+REFITS = ValuationRefits()
+
+
+def rebuild_valuations():
+    """Refit every city and revalue the whole table."""
+    REFITS.rebuild()
+
+
+def init_valuations(app):
+    """Value new and updated listings through hooks; backfill valuations once if missing."""
+    REFITS.init(app)
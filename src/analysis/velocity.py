@@ -0,0 +1,297 @@
+"""Market heat from listing velocity, kept as weekly per-city counters.
+
+``market_activity`` holds, per city and week, the listings first seen,
+delisted and repriced that week, the days on market of that week's
+delistings, and how many listings first seen that week are still listed.
+New listings are counted by an ingest hook; delistings (deleted properties)
+and price changes are counted in the transaction that makes them, by a
+session hook and by the bulk importer. Heat for every city is then a read
+of its counter rows instead of a scan of ``properties``.
+
+Heat blends three signals, each scaled from 0 (cool) to 1 (hot):
+
+* median days on market of the current inventory;
+* the share of the inventory with a price cut in the window;
+* months of inventory at the window's delisting pace, for cities where
+  delistings have been seen at all.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, inspect
+
+from src.analysis.trends import bucket_series, bucket_start
+from src.app import db
+from src.database.engine import upsert_insert
+from src.database.history import read_price_history
+from src.database.models import MarketActivity, Property
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("new_listings", "delistings", "price_cuts", "price_increases", "dom_days", "active")
+DEFAULT_WEEKS = 4
+MAX_HISTORY = 104
+WEEKS_PER_MONTH = 52 / 12
+# Signal values scored as fully cool and fully hot
+DOM_COOL_DAYS, DOM_HOT_DAYS = 90.0, 14.0
+CUT_SHARE_COOL, CUT_SHARE_HOT = 0.3, 0.0
+MONTHS_COOL, MONTHS_HOT = 6.0, 2.0
+HEAT_LEVELS = ((2 / 3, "hot"), (1 / 3, "warm"), (0.0, "cool"))
+
+Deltas = Dict[Tuple[str, date], Dict[str, float]]
+
+
+def week_of(moment) -> date:
+    """Monday of the week containing ``moment``."""
+    return bucket_start(moment.date() if isinstance(moment, datetime) else moment, "week")
+
+
+def activity_deltas() -> Deltas:
+    """Empty per-(city, week) counter deltas."""
+    return defaultdict(lambda: defaultdict(int))
+
+
+def bump_activity(connection, deltas: Deltas):
+    """Add counter deltas on ``connection`` with one atomic upsert per week."""
+    rows = [
+        dict({name: counts.get(name, 0) for name in COUNTERS}, city=city, week=week)
+        for (city, week), counts in deltas.items()
+        if city and any(counts.values())
+    ]
+    if not rows:
+        return
+    table = MarketActivity.__table__
+    statement = upsert_insert(connection, table)
+    statement = statement.on_conflict_do_update(
+        index_elements=["city", "week"],
+        set_={name: table.c[name] + statement.excluded[name] for name in COUNTERS},
+    )
+    connection.execute(statement, rows)
+
+
+def add_listing_update(
+    deltas: Deltas, listed, old_city: str, new_city: str, old_price, new_price, when: datetime
+):
+    """Count a price change and move a listing between cities if its city changed."""
+    if old_city != new_city:
+        deltas[(old_city, week_of(listed))]["active"] -= 1
+        deltas[(new_city, week_of(listed))]["active"] += 1
+    if old_price is not None and new_price is not None and new_price != old_price:
+        deltas[(new_city, week_of(when))]["price_cuts" if new_price < old_price else "price_increases"] += 1
+
+
+def add_delisting(deltas: Deltas, city: str, listed, when: datetime):
+    """Count a listing leaving the market."""
+    listed = listed or when
+    deltas[(city, week_of(when))]["delistings"] += 1
+    deltas[(city, week_of(when))]["dom_days"] += max((when - listed).total_seconds() / 86400, 0.0)
+    deltas[(city, week_of(listed))]["active"] -= 1
+
+
+def _before(state, key: str):
+    """An attribute's value before this flush."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.dict.get(key)
+
+
+def _after_flush(session, flush_context):
+    """Count delisted and repriced properties written in this flush."""
+    now = datetime.utcnow()
+    deltas = activity_deltas()
+    for obj in session.deleted:
+        if isinstance(obj, Property):
+            state = inspect(obj)
+            add_delisting(deltas, _before(state, "city"), state.dict.get("scraped_at"), now)
+    for obj in session.dirty:
+        if isinstance(obj, Property):
+            state = inspect(obj)
+            if state.attrs.price.history.deleted or state.attrs.city.history.deleted:
+                add_listing_update(
+                    deltas, state.dict.get("scraped_at") or now,
+                    _before(state, "city"), state.dict.get("city"),
+                    _before(state, "price"), state.dict.get("price"), now,
+                )
+    bump_activity(session.connection(), deltas)
+
+
+def count_new_listings(property_ids):
+    """Ingest hook: count new properties in the week they were first seen."""
+    deltas = activity_deltas()
+    rows = db.session.query(Property.city, Property.scraped_at).filter(Property.id.in_(property_ids))
+    for city, scraped_at in rows:
+        week = week_of(scraped_at or datetime.utcnow())
+        deltas[(city, week)]["new_listings"] += 1
+        deltas[(city, week)]["active"] += 1
+    bump_activity(db.session.connection(), deltas)
+    db.session.commit()
+
+
+def rebuild_market_activity():
+    """Recompute the counters from ``properties`` and the price history, archive included.
+
+    Deleted properties leave no trace, so a rebuild starts with no delistings.
+    """
+    MarketActivity.query.delete()
+    listed = pd.DataFrame(db.session.query(Property.city, Property.scraped_at).all(), columns=["city", "scraped_at"])
+    listed = listed.dropna()
+    deltas = activity_deltas()
+    if not listed.empty:
+        weeks = bucket_series(listed["scraped_at"], "week")
+        for (city, week), count in listed.groupby([listed["city"], weeks]).size().items():
+            deltas[(city, week)]["new_listings"] += int(count)
+            deltas[(city, week)]["active"] += int(count)
+
+    # Archived months are read back too, so their price cuts are not lost
+    changes = read_price_history()
+    cities = dict(db.session.query(Property.id, Property.city).filter(Property.city.isnot(None)))
+    changes = changes.assign(city=changes["property_id"].map(cities)).dropna(subset=["city"])
+    if not changes.empty:
+        step = changes.groupby("property_id")["price"].diff()
+        changes = changes.assign(
+            week=bucket_series(changes["recorded_at"], "week"),
+            price_cuts=(step < 0).astype(int),
+            price_increases=(step > 0).astype(int),
+        )
+        sums = changes.groupby(["city", "week"])[["price_cuts", "price_increases"]].sum()
+        for (city, week), row in sums.iterrows():
+            deltas[(city, week)]["price_cuts"] += int(row["price_cuts"])
+            deltas[(city, week)]["price_increases"] += int(row["price_increases"])
+
+    bump_activity(db.session.connection(), deltas)
+    db.session.commit()
+    logger.info(f"Rebuilt market activity for {len({city for city, _ in deltas})} cities")
+
+
+def _scale(value: float, cool: float, hot: float) -> float:
+    """Map a signal onto 0 (at or past ``cool``) .. 1 (at or past ``hot``)."""
+    return float(np.clip((value - cool) / (hot - cool), 0.0, 1.0))
+
+
+def heat_score(
+    median_days_on_market: Optional[float] = None,
+    price_cut_share: Optional[float] = None,
+    months_of_inventory: Optional[float] = None,
+) -> Optional[float]:
+    """Mean of the available signals on a 0 (cool) .. 1 (hot) scale."""
+    signals = []
+    if median_days_on_market is not None:
+        signals.append(_scale(median_days_on_market, DOM_COOL_DAYS, DOM_HOT_DAYS))
+    if price_cut_share is not None:
+        signals.append(_scale(price_cut_share, CUT_SHARE_COOL, CUT_SHARE_HOT))
+    if months_of_inventory is not None:
+        signals.append(_scale(months_of_inventory, MONTHS_COOL, MONTHS_HOT))
+    return float(np.mean(signals)) if signals else None
+
+
+def heat_level(score: Optional[float]) -> Optional[str]:
+    """"hot", "warm" or "cool" for a heat score."""
+    if score is None:
+        return None
+    return next(level for bound, level in HEAT_LEVELS if score >= bound)
+
+
+def _weighted_median(values: np.ndarray, weights: np.ndarray) -> Optional[float]:
+    """Median of ``values`` repeated ``weights`` times."""
+    if weights.sum() <= 0:
+        return None
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    return float(values[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+
+def _window_metrics(rows: pd.DataFrame, end: date, weeks: int, inventory: float, delisting_seen: bool) -> Dict:
+    """Velocity over the ``weeks`` weeks ending with week ``end``."""
+    window = rows[(rows["week"] > end - timedelta(weeks=weeks)) & (rows["week"] <= end)]
+    new, delisted, cuts, increases, dom_days = (float(window[name].sum()) for name in COUNTERS[:5])
+    months = None
+    if delisting_seen:
+        pace = delisted / weeks * WEEKS_PER_MONTH
+        months = inventory / pace if pace else float("inf")
+    return {
+        "inventory": int(inventory),
+        "new_listings": int(new),
+        "new_listing_rate": new / weeks,
+        "delistings": int(delisted),
+        "delisting_rate": delisted / weeks,
+        "price_cuts": int(cuts),
+        "price_increases": int(increases),
+        "price_cut_share": cuts / inventory if inventory else None,
+        "avg_days_on_market_delisted": dom_days / delisted if delisted else None,
+        "months_of_inventory": months,
+    }
+
+
+def _json_months(metrics: Dict) -> Dict:
+    """Infinite months of inventory (no delistings) serialize as null."""
+    if metrics["months_of_inventory"] == float("inf"):
+        metrics["months_of_inventory"] = None
+    return metrics
+
+
+def market_heat(
+    city: Optional[str] = None, weeks: int = DEFAULT_WEEKS, history: int = 0, now: Optional[datetime] = None
+) -> Dict:
+    """Heat and velocity per city over the last ``weeks`` weeks, hottest first.
+
+    Median days on market is accurate to about half a week. ``history`` adds that many
+    weekly points per city; those score on price cuts and months of inventory
+    only, since the counters keep listing ages for the current inventory alone.
+    """
+    weeks = max(1, weeks)
+    history = max(0, min(history, MAX_HISTORY))
+    today = (now or datetime.utcnow()).date()
+    current = week_of(today)
+
+    query = db.session.query(MarketActivity.city, MarketActivity.week, *(getattr(MarketActivity, c) for c in COUNTERS))
+    if city:
+        query = query.filter(MarketActivity.city == city)
+    frame = pd.DataFrame(query.all(), columns=["city", "week", *COUNTERS])
+
+    cities = []
+    for name, rows in frame.groupby("city"):
+        rows = rows.sort_values("week")
+        active = rows["active"].clip(lower=0).to_numpy(float)
+        ages = np.array([max((today - week).days - 3, 0) for week in rows["week"]], dtype=float)
+        delisting_seen = bool(rows["delistings"].sum())
+
+        metrics = _window_metrics(rows, current, weeks, active.sum(), delisting_seen)
+        metrics["median_days_on_market"] = _weighted_median(ages, active)
+        score = heat_score(metrics["median_days_on_market"], metrics["price_cut_share"], metrics["months_of_inventory"])
+        entry = dict(_json_months(metrics), city=name, score=score, level=heat_level(score))
+
+        if history:
+            net = (rows["new_listings"] - rows["delistings"]).cumsum().clip(lower=0).to_numpy(float)
+            points = []
+            for back in range(history - 1, -1, -1):
+                end = current - timedelta(weeks=back)
+                seen = (rows["week"] <= end).to_numpy()
+                inventory = net[seen][-1] if seen.any() else 0.0
+                point = _window_metrics(rows, end, weeks, inventory, delisting_seen)
+                point_score = heat_score(None, point["price_cut_share"], point["months_of_inventory"])
+                point.update(week=end.isoformat(), score=point_score, level=heat_level(point_score))
+                points.append(_json_months(point))
+            entry["history"] = points
+        cities.append(entry)
+
+    cities.sort(key=lambda entry: (entry["score"] is None, -(entry["score"] or 0), entry["city"]))
+    return {"as_of": today.isoformat(), "weeks": weeks, "cities": cities}
+
+
+def init_market_velocity(app):
+    """Keep velocity counters current on ingest and writes; backfill them once if missing."""
+    from src.database.ingest import register_ingest_hook
+
+    register_ingest_hook(app, count_new_listings)
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+
+    with app.app_context():
+        if MarketActivity.query.first() is None and Property.query.first() is not None:
+            rebuild_market_activity()
@@ -0,0 +1,97 @@
+"""Conditional GET and response compression for API payloads."""
+
+import gzip
+import hashlib
+import logging
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from src.database.versions import table_versions
+
+try:  # optional: brotli is preferred over gzip when installed
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+
+
+def conditional(*tables):
+    """Answer with 304 before running the view when ``tables`` are unchanged.
+
+    The ETag hashes the path, query string and the tables' write counters,
+    so checking it costs one primary-key lookup instead of the view's query.
+    Only an ETag match answers 304; ``Last-Modified`` is informational.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = table_versions(tables)
+            digest = hashlib.blake2b(digest_size=12)
+            digest.update(request.full_path.encode())
+            for name in tables:
+                digest.update(f"|{name}:{versions.get(name, (0, None))[0]}".encode())
+            etag = digest.hexdigest()
+            stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+            last_modified = max(stamps).replace(microsecond=0) if stamps else None
+
+            # If-Modified-Since is not honoured: at one-second resolution it
+            # cannot tell a write later in the same second from no write
+            if request.if_none_match and request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _compress(response):
+    """Compress eligible responses with brotli or gzip."""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    accepted = request.accept_encodings
+    body = response.get_data()
+    if len(body) < current_app.config.get("COMPRESS_MIN_SIZE", 1024):
+        return response
+
+    level = current_app.config.get("COMPRESS_LEVEL", 6)
+    if brotli is not None and accepted["br"]:
+        response.set_data(brotli.compress(body, quality=min(level, 11)))
+        response.headers["Content-Encoding"] = "br"
+    elif accepted["gzip"]:
+        response.set_data(gzip.compress(body, compresslevel=level))
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        return response
+
+    if response.get_etag()[0] and not response.get_etag()[1]:
+        # A strong ETag names exact bytes; mark it weak once they change
+        response.set_etag(response.get_etag()[0], weak=True)
+    return response
+
+
+def init_http(app):
+    """Compress API responses above ``COMPRESS_MIN_SIZE`` bytes."""
+    app.after_request(_compress)
@@ -1,27 +1,60 @@
 """API routes for Real Estate Market Analyzer."""
 
-from flask import Blueprint, jsonify, request
-from src.database.models import Property, MarketReport
-from src.app import db
-from src.scraper.scraper import scrape_all_sources
+from datetime import date, datetime
+
+import numpy as np
+from flask import Blueprint, current_app, jsonify, request
 from sqlalchemy import func
 
+from src.database.models import Property, MarketReport, ScrapeRun, AnomalyScore, Valuation, PropertyLink
+from src.app import db
+from src.scraper import scrape_all_sources
+from src.scraper.instrumentation import summarize_runs
+from src.database.ingest import ingest_listings, run_ingest_hooks
+from src.database.search import search_properties
+from src.database.history import read_price_history
+from src.database.geo import KM_PER_MILE, cluster_bbox, locations_in_bbox, locations_near, parse_bbox, resolve_point
+from src.database.changes import DEFAULT_LIMIT as DEFAULT_CHANGES_LIMIT, changes_since
+from src.database.versions import table_versions
+from src.database.bulk import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, ImportFormatError, bulk_import, iter_rows
+from src.api.http import conditional
+from src.visualization.specs import (
+    DEFAULT_BINS,
+    DEFAULT_MAX_POINTS,
+    MAX_BINS,
+    data_key,
+    get_spec_cache,
+    group_bar_spec,
+    histogram_spec,
+    trend_spec,
+)
+from src.analysis.sketches import sketch_summary
+from src.analysis.anomalies import DEFAULT_THRESHOLD
+from src.analysis.trends import price_trend
+from src.analysis.velocity import DEFAULT_WEEKS as DEFAULT_HEAT_WEEKS, market_heat
+from src.analysis.comparables import get_comparables_index
+from src.analysis.ranks import get_percentile_ranks
+
 api_bp = Blueprint("api", __name__)
 
+MAX_COMPARE = 50
+DISTRIBUTION_TABLES = ("properties", "property_links")
+MAX_WITHIN = 1000
 
-@api_bp.route("/properties", methods=["GET"])
-def get_properties():
-    """Get all properties with optional filtering."""
-    # Get query parameters
+
+def _filter_properties(query):
+    """Apply the structured filters shared by listing and search."""
     city = request.args.get("city")
     min_price = request.args.get("min_price", type=float)
     max_price = request.args.get("max_price", type=float)
     property_type = request.args.get("property_type")
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 20, type=int)
+    distinct = request.args.get("distinct", "").lower() in ("1", "true", "yes")
 
-    # Build query
-    query = Property.query
+    if distinct:
+        # Only canonical listings; unlinked rows count as their own canonical
+        query = query.outerjoin(PropertyLink, PropertyLink.property_id == Property.id).filter(
+            (PropertyLink.canonical_id == Property.id) | PropertyLink.canonical_id.is_(None)
+        )
 
     if city:
         query = query.filter_by(city=city)
@@ -31,6 +64,18 @@ def get_properties():
         query = query.filter(Property.price <= max_price)
     if property_type:
         query = query.filter_by(property_type=property_type)
+    return query
+
+
+@api_bp.route("/properties", methods=["GET"])
+@conditional("properties", "property_links")
+def get_properties():
+    """Get all properties with optional filtering."""
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 20, type=int)
+
+    # Build query
+    query = _filter_properties(Property.query)
 
     # Paginate
     paginated = query.paginate(page=page, per_page=per_page)
@@ -48,13 +93,200 @@ def get_properties():
     )
 
 
+@api_bp.route("/properties/search", methods=["GET"])
+def search():
+    """Full-text search over address, city and description, best match first."""
+    q = (request.args.get("q") or request.args.get("query") or "").strip()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 20, type=int)
+
+    query = search_properties(_filter_properties(Property.query), q)
+    paginated = query.paginate(page=page, per_page=per_page)
+
+    return (
+        jsonify(
+            {
+                "query": q,
+                "total": paginated.total,
+                "pages": paginated.pages,
+                "current_page": page,
+                "properties": [p.to_dict() for p in paginated.items],
+            }
+        ),
+        200,
+    )
+
+
 @api_bp.route("/properties/<int:property_id>", methods=["GET"])
+@conditional("properties")
 def get_property(property_id):
     """Get a specific property."""
     property_obj = Property.query.get_or_404(property_id)
     return jsonify(property_obj.to_dict()), 200
 
 
+@api_bp.route("/properties/<int:property_id>/duplicates", methods=["GET"])
+def get_duplicates(property_id):
+    """Get the other listings linked to the same canonical property."""
+    Property.query.get_or_404(property_id)
+    link = db.session.get(PropertyLink, property_id)
+    canonical_id = link.canonical_id if link else property_id
+
+    duplicates = (
+        Property.query.join(PropertyLink, PropertyLink.property_id == Property.id)
+        .filter(PropertyLink.canonical_id == canonical_id, Property.id != property_id)
+        .order_by(Property.id)
+        .all()
+    )
+
+    return (
+        jsonify(
+            {
+                "id": property_id,
+                "canonical_id": canonical_id,
+                "duplicates": [p.to_dict() for p in duplicates],
+            }
+        ),
+        200,
+    )
+
+
+@api_bp.route("/properties/<int:property_id>/comparables", methods=["GET"])
+def get_comparables(property_id):
+    """Get the k most similar listings in the same city."""
+    property_obj = Property.query.get_or_404(property_id)
+    k = max(1, min(request.args.get("k", 5, type=int), 100))
+
+    neighbours = get_comparables_index(current_app).comparables(property_obj, k)
+    by_id = {
+        p.id: p
+        for p in Property.query.filter(Property.id.in_([i for i, _ in neighbours]))
+    }
+
+    comparables = []
+    for neighbour_id, distance in neighbours:
+        if neighbour_id in by_id:
+            comparable = by_id[neighbour_id].to_dict()
+            comparable["distance"] = round(distance, 4)
+            comparables.append(comparable)
+
+    return jsonify({"property_id": property_id, "k": k, "comparables": comparables}), 200
+
+
+@api_bp.route("/properties/<int:property_id>/price-history", methods=["GET"])
+def get_price_history(property_id):
+    """Get a property's price change points from the hot table and the archive."""
+    Property.query.get_or_404(property_id)
+    try:
+        start = request.args.get("start")
+        end = request.args.get("end")
+        history = read_price_history(
+            [property_id],
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    points = [
+        {"price": float(price), "recorded_at": recorded_at.isoformat()}
+        for price, recorded_at in zip(history["price"], history["recorded_at"])
+    ]
+    return jsonify({"property_id": property_id, "history": points}), 200
+
+
+@api_bp.route("/properties/within", methods=["GET"])
+def properties_within():
+    """Get listings in a map viewport (``bbox``) or within ``radius`` of ``near``.
+
+    With ``zoom`` and ``bbox`` the response holds map clusters instead of listings.
+    """
+    limit = max(1, min(request.args.get("limit", 100, type=int), MAX_WITHIN))
+    try:
+        if request.args.get("bbox"):
+            bbox = parse_bbox(request.args["bbox"])
+            zoom = request.args.get("zoom", type=int)
+            if zoom is not None:
+                return jsonify({"bbox": list(bbox), "zoom": zoom, "clusters": cluster_bbox(bbox, zoom)}), 200
+            located = locations_in_bbox(bbox, limit)
+        elif request.args.get("near"):
+            lat, lon = resolve_point(request.args["near"])
+            radius = request.args.get("radius", 5.0, type=float)
+            if radius <= 0:
+                raise ValueError("radius must be positive")
+            unit = request.args.get("unit", "mi")
+            if unit not in ("mi", "km"):
+                raise ValueError("unit must be mi or km")
+            located = locations_near(lat, lon, radius * KM_PER_MILE if unit == "mi" else radius, limit)
+        else:
+            raise ValueError("bbox or near is required")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    by_id = {p.id: p for p in Property.query.filter(Property.id.in_([l["id"] for l in located]))}
+    properties = []
+    for location in located:
+        if location["id"] in by_id:
+            item = by_id[location["id"]].to_dict()
+            item.update({k: v for k, v in location.items() if k != "id"})
+            properties.append(item)
+    return jsonify({"properties": properties, "count": len(properties)}), 200
+
+
+@api_bp.route("/properties/compare", methods=["POST"])
+def compare_properties():
+    """Compare properties side by side with percentile ranks in their city and type."""
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids")
+    # bool is a subclass of int; true/false are not property ids
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return jsonify({"error": "ids must be a non-empty list of integers"}), 400
+    if len(ids) > MAX_COMPARE:
+        return jsonify({"error": f"at most {MAX_COMPARE} properties can be compared"}), 400
+
+    by_id = {p.id: p for p in Property.query.filter(Property.id.in_(ids))}
+    found = [by_id[i] for i in dict.fromkeys(ids) if i in by_id]
+    ranks = get_percentile_ranks(current_app).rank(found)
+
+    properties = []
+    for property_obj, rank in zip(found, ranks):
+        compared = property_obj.to_dict()
+        compared.update(rank)
+        properties.append(compared)
+
+    return (
+        jsonify(
+            {
+                "properties": properties,
+                "missing": [i for i in ids if i not in by_id],
+            }
+        ),
+        200,
+    )
+
+
+@api_bp.route("/properties/bulk", methods=["POST"])
+def bulk_create_properties():
+    """Import many properties from a JSON array, NDJSON or CSV upload."""
+    batch_size = max(1, min(request.args.get("batch_size", DEFAULT_BATCH_SIZE, type=int), MAX_BATCH_SIZE))
+    upsert = request.args.get("upsert", "").lower() in ("1", "true", "yes")
+
+    try:
+        rows = iter_rows(request.stream, request.mimetype)
+    except ImportFormatError as e:
+        return jsonify({"error": str(e)}), 415
+
+    try:
+        result = bulk_import(rows, batch_size=batch_size, upsert=upsert)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify(result), 400 if result.get("aborted") and not result["inserted"] else 200
+
+
 @api_bp.route("/properties", methods=["POST"])
 def create_property():
     """Create a new property listing."""
@@ -76,42 +308,220 @@ def create_property():
 
         db.session.add(new_property)
         db.session.commit()
-
-        return jsonify(new_property.to_dict()), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
 
+    # The listing is committed; hook failures are logged, not reported
+    run_ingest_hooks([new_property.id])
+    return jsonify(new_property.to_dict()), 201
+
 
 @api_bp.route("/market/summary", methods=["GET"])
+@conditional("properties", "price_sketches")
 def market_summary():
-    """Get market summary statistics."""
+    """Get market summary statistics.
+
+    Median, p10/p90 and IQR come from the persisted price sketches.
+    """
     location = request.args.get("city")
+    property_type = request.args.get("property_type")
 
     query = Property.query
     if location:
         query = query.filter_by(city=location)
+    if property_type:
+        query = query.filter_by(property_type=property_type)
 
     total = query.count()
     avg_price = (
-        db.session.query(func.avg(Property.price)).filter_by(city=location).scalar()
+        query.with_entities(func.avg(Property.price)).scalar()
         if location
         else None
     )
 
+    summary = {
+        "total_listings": total,
+        "average_price": avg_price,
+        "location": location,
+        "property_type": property_type,
+    }
+    summary.update(sketch_summary(location, property_type))
+
+    return jsonify(summary), 200
+
+
+@api_bp.route("/market/trends", methods=["GET"])
+def market_trends():
+    """Get price trends by day, week or month from the rollup tables."""
+    try:
+        start = request.args.get("start")
+        end = request.args.get("end")
+        trend = price_trend(
+            granularity=request.args.get("granularity", "week"),
+            city=request.args.get("city"),
+            property_type=request.args.get("property_type"),
+            group_by=request.args.get("group_by"),
+            window=request.args.get("window", 4, type=int),
+            start=date.fromisoformat(start) if start else None,
+            end=date.fromisoformat(end) if end else None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(trend), 200
+
+
+@api_bp.route("/market/heatmap", methods=["GET"])
+def market_heatmap():
+    """Get market heat per city from the listing-velocity counters."""
+    heat = market_heat(
+        city=request.args.get("city"),
+        weeks=request.args.get("weeks", DEFAULT_HEAT_WEEKS, type=int),
+        history=request.args.get("history", 0, type=int),
+    )
+    return jsonify(heat), 200
+
+
+@api_bp.route("/market/anomalies", methods=["GET"])
+def market_anomalies():
+    """Get paged ids and robust scores of anomalously priced properties."""
+    city = request.args.get("city")
+    property_type = request.args.get("property_type")
+    min_score = request.args.get("min_score", DEFAULT_THRESHOLD, type=float)
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 50, type=int)
+
+    query = AnomalyScore.query.filter(AnomalyScore.abs_score >= min_score)
+    if city:
+        query = query.filter_by(city=city)
+    if property_type:
+        query = query.filter_by(property_type=property_type)
+
+    paginated = query.order_by(AnomalyScore.abs_score.desc()).paginate(
+        page=page, per_page=per_page
+    )
+
+    return (
+        jsonify(
+            {
+                "total": paginated.total,
+                "pages": paginated.pages,
+                "current_page": page,
+                "anomalies": [a.to_dict() for a in paginated.items],
+            }
+        ),
+        200,
+    )
+
+
+@api_bp.route("/market/valuations", methods=["GET"])
+def market_valuations():
+    """Get paged fair-value estimates, most over- or under-priced first."""
+    city = request.args.get("city")
+    flag = request.args.get("flag")
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 50, type=int)
+
+    query = Valuation.query
+    if city:
+        query = query.filter_by(city=city)
+    if flag:
+        query = query.filter_by(flag=flag)
+
+    order = Valuation.price_gap.asc() if flag == "under" else Valuation.price_gap.desc()
+    paginated = query.order_by(order).paginate(page=page, per_page=per_page)
+
     return (
         jsonify(
             {
-                "total_listings": total,
-                "average_price": avg_price,
-                "location": location,
+                "total": paginated.total,
+                "pages": paginated.pages,
+                "current_page": page,
+                "valuations": [v.to_dict() for v in paginated.items],
             }
         ),
         200,
     )
 
 
+def _spec_response(rendered):
+    """Return a pre-serialized chart spec."""
+    return current_app.response_class(rendered, mimetype="application/json"), 200
+
+
+@api_bp.route("/charts/price-distribution", methods=["GET"])
+def chart_price_distribution():
+    """Get a price histogram spec binned on the server."""
+    bins = max(1, min(request.args.get("bins", DEFAULT_BINS, type=int), MAX_BINS))
+    # Keyed on the tables' write counters, so prices are loaded only when they changed
+    versions = table_versions(DISTRIBUTION_TABLES)
+    key = data_key(
+        "price-distribution", bins, sorted(request.args.items()),
+        {name: versions.get(name, (0, None))[0] for name in DISTRIBUTION_TABLES},
+    )
+
+    def render():
+        prices = np.array(
+            [price for (price,) in _filter_properties(Property.query).with_entities(Property.price)],
+            dtype=float,
+        )
+        return histogram_spec(prices, bins)
+
+    return _spec_response(get_spec_cache(current_app).get_or_render(key, render))
+
+
+@api_bp.route("/charts/price-trend", methods=["GET"])
+def chart_price_trend():
+    """Get a price trend spec from the rollups, downsampled with LTTB."""
+    max_points = max(3, request.args.get("max_points", DEFAULT_MAX_POINTS, type=int))
+    try:
+        trend = price_trend(
+            granularity=request.args.get("granularity", "week"),
+            city=request.args.get("city"),
+            property_type=request.args.get("property_type"),
+            group_by=request.args.get("group_by"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    key = data_key("price-trend", max_points, trend)
+    return _spec_response(get_spec_cache(current_app).get_or_render(key, lambda: trend_spec(trend["series"], max_points)))
+
+
+def _grouped_prices(column):
+    """Listing count and average price per value of ``column``."""
+    rows = (
+        _filter_properties(Property.query)
+        .with_entities(column, func.count(Property.id), func.avg(Property.price))
+        .group_by(column)
+        .order_by(column)
+    )
+    return [{"name": name, "count": count, "avg_price": avg} for name, count, avg in rows]
+
+
+@api_bp.route("/charts/property-types", methods=["GET"])
+def chart_property_types():
+    """Get an average-price-by-type bar chart spec."""
+    groups = _grouped_prices(Property.property_type)
+    key = data_key("property-types", groups)
+    return _spec_response(
+        get_spec_cache(current_app).get_or_render(key, lambda: group_bar_spec(groups, "Average Price by Property Type", "Property Type"))
+    )
+
+
+@api_bp.route("/charts/locations", methods=["GET"])
+def chart_locations():
+    """Get an average-price-by-city bar chart spec."""
+    groups = _grouped_prices(Property.city)
+    key = data_key("locations", groups)
+    return _spec_response(
+        get_spec_cache(current_app).get_or_render(key, lambda: group_bar_spec(groups, "Market Comparison by Location", "Location"))
+    )
+
+
 @api_bp.route("/reports", methods=["GET"])
+@conditional("market_reports")
 def get_reports():
     """Get all market reports."""
     page = request.args.get("page", 1, type=int)
@@ -130,6 +540,14 @@ def get_reports():
     )
 
 
+@api_bp.route("/changes", methods=["GET"])
+def get_changes():
+    """Get change-log entries after a sequence number, oldest first."""
+    since = request.args.get("since", 0, type=int)
+    limit = request.args.get("limit", DEFAULT_CHANGES_LIMIT, type=int)
+    return jsonify(changes_since(since, limit)), 200
+
+
 @api_bp.route("/health", methods=["GET"])
 def health():
     """Health check endpoint."""
@@ -147,43 +565,16 @@ def scrape_properties():
         if not location or not isinstance(location, str):
             location = "San Francisco"
 
-        # Scrape listings from all sources
-        listings = scrape_all_sources(location)
+        # Scrape listings from all sources, keeping each scraper's run record
+        runs = []
+        listings = scrape_all_sources(location, runs=runs, known_urls=_known_urls)
+        _save_scrape_runs(runs)
 
         if not listings:
             return jsonify({"error": "No listings found", "location": location}), 404
 
         # Save to database
-        saved_count = 0
-        for listing in listings:
-            # Check if property already exists
-            existing = Property.query.filter_by(url=listing.get("url")).first()
-            if not existing:
-                property_obj = Property(
-                    url=listing.get("url"),
-                    address=listing.get("address"),
-                    city=listing.get("city"),
-                    state=listing.get("state"),
-                    zip_code=listing.get("zip_code"),
-                    price=listing.get("price"),
-                    bedrooms=listing.get("bedrooms"),
-                    bathrooms=listing.get("bathrooms"),
-                    square_feet=listing.get("square_feet"),
-                    property_type=listing.get("property_type"),
-                    description=listing.get("description"),
-                    image_url=listing.get("image_url"),
-                    source=listing.get("source"),
-                )
-                # Handle multiple images
-                images = listing.get("images", [])
-                if images:
-                    property_obj.set_images(images)
-                    if not property_obj.image_url and images:
-                        property_obj.image_url = images[0]
-                db.session.add(property_obj)
-                saved_count += 1
-
-        db.session.commit()
+        saved_count = ingest_listings(listings)["saved"]
 
         return (
             jsonify(
@@ -200,3 +591,68 @@ def scrape_properties():
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
+
+
+def _known_urls(urls):
+    """The subset of ``urls`` already stored."""
+    return {url for (url,) in db.session.query(Property.url).filter(Property.url.in_(urls))}
+
+
+def _save_scrape_runs(runs):
+    """Persist scraper run records to the scrape_runs ledger."""
+    for run in runs:
+        db.session.add(
+            ScrapeRun(
+                source=run["source"],
+                location=run.get("location"),
+                started_at=run.get("started_at"),
+                duration_ms=run.get("duration_ms"),
+                phases=run.get("phases"),
+                cards_found=run.get("cards_found"),
+                listings_count=run.get("listings_count"),
+                used_fallback=run.get("used_fallback", False),
+                errors=run.get("errors"),
+            )
+        )
+    db.session.commit()
+
+
+@api_bp.route("/scrape/runs", methods=["GET"])
+def get_scrape_runs():
+    """Get recorded scrape runs, newest first."""
+    source = request.args.get("source")
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 20, type=int)
+
+    query = ScrapeRun.query
+    if source:
+        query = query.filter_by(source=source)
+
+    paginated = query.order_by(ScrapeRun.started_at.desc()).paginate(
+        page=page, per_page=per_page
+    )
+
+    return (
+        jsonify(
+            {
+                "total": paginated.total,
+                "runs": [r.to_dict() for r in paginated.items],
+            }
+        ),
+        200,
+    )
+
+
+@api_bp.route("/scrape/runs/summary", methods=["GET"])
+def scrape_runs_summary():
+    """Get per-source duration percentiles over the most recent runs."""
+    source = request.args.get("source")
+    limit = request.args.get("limit", 500, type=int)
+
+    query = ScrapeRun.query
+    if source:
+        query = query.filter_by(source=source)
+
+    runs = query.order_by(ScrapeRun.started_at.desc()).limit(limit).all()
+
+    return jsonify({"sources": summarize_runs([r.to_dict() for r in runs])}), 200
@@ -5,29 +5,62 @@ from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
 import os
 
+# Before importing config, whose settings read the environment at class definition
 load_dotenv()
 
+from config import get_config  # noqa: E402
+from src.database.engine import (  # noqa: E402
+    engine_options,
+    is_sqlite,
+    normalize_database_uri,
+    register_sqlite_pragmas,
+)
+
 db = SQLAlchemy()
 
 
-def create_app(config_name="development"):
-    """Application factory function."""
+def create_app(config_name=None):
+    """Application factory function.
+
+    ``config_name`` selects a profile from ``config.py`` ("development",
+    "testing" or "production"); it defaults to ``FLASK_ENV``.
+    """
     app = Flask(__name__)
 
     # Configuration
-    app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
-        "DATABASE_URL", "sqlite:///real_estate.db"
+    app.config.from_object(get_config(config_name))
+    if not app.config.get("TESTING"):
+        # Read at app creation so DATABASE_URL can change after import
+        app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
+            "DATABASE_URL", app.config["SQLALCHEMY_DATABASE_URI"]
+        )
+    app.config["SQLALCHEMY_DATABASE_URI"] = normalize_database_uri(
+        app.config["SQLALCHEMY_DATABASE_URI"]
     )
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
 
     # Initialize database
     db.init_app(app)
+    if is_sqlite(app.config["SQLALCHEMY_DATABASE_URI"]):
+        with app.app_context():
+            register_sqlite_pragmas(db.engine, app.config["SQLITE_PRAGMAS"])
+
+    # Instrumentation: latency/SQL metrics at /metrics, ?profile=1 when enabled
+    from src.monitoring.metrics import init_metrics
+
+    with app.app_context():
+        init_metrics(app, db.engine)
 
     # Register blueprints
     from src.api.routes import api_bp
 
     app.register_blueprint(api_bp, url_prefix="/api")
 
+    # gzip/brotli for large responses
+    from src.api.http import init_http
+
+    init_http(app)
+
     # Routes
     @app.route("/")
     def index():
@@ -63,6 +96,77 @@ def create_app(config_name="development"):
     with app.app_context():
         db.create_all()
 
+    # Per-table write counters behind conditional GET
+    from src.database.versions import init_versions
+
+    init_versions(app)
+
+    # Append-only change feed behind /api/changes, written with each flush
+    from src.database.changes import init_changes
+
+    init_changes(app)
+
+    # Full-text index (SQLite FTS5 / PostgreSQL tsvector) kept in sync by the database
+    from src.database.search import init_search
+
+    init_search(app)
+
+    # Cross-source duplicate links to a canonical property id
+    from src.database.dedup import init_dedup
+
+    init_dedup(app)
+
+    # Per-city/type price sketches for O(1) medians and percentiles
+    from src.analysis.sketches import init_price_sketches
+
+    init_price_sketches(app)
+
+    # Grouped robust anomaly scores, updated for newly ingested rows
+    from src.analysis.anomalies import init_anomaly_scores
+
+    init_anomaly_scores(app)
+
+    # Day/week/month price rollups behind /api/market/trends
+    from src.analysis.trends import init_rollups
+
+    init_rollups(app)
+
+    # Per-city hedonic fair-value estimates, refitted as cities change
+    from src.analysis.valuation import init_valuations
+
+    init_valuations(app)
+
+    # LRU cache of rendered chart specs
+    from src.visualization.specs import init_spec_cache
+
+    init_spec_cache(app)
+
+    # In-memory per-city nearest-neighbour index for comparables
+    from src.analysis.comparables import init_comparables
+
+    init_comparables(app)
+
+    # Cached sorted arrays for percentile ranks in /api/properties/compare
+    from src.analysis.ranks import init_percentile_ranks
+
+    init_percentile_ranks(app)
+
+    # Offline geocoding with a grid/R*Tree index for map and radius queries
+    from src.database.geo import init_geo
+
+    init_geo(app)
+
+    # Weekly per-city listing velocity counters behind market heat
+    from src.analysis.velocity import init_market_velocity
+
+    init_market_velocity(app)
+
+    # Shared memory-mapped columnar snapshot for analytics across workers
+    if app.config.get("COLUMNAR_SNAPSHOT_DIR"):
+        from src.analysis.columnar import init_snapshots
+
+        init_snapshots(app)
+
     return app
 
 
@@ -0,0 +1,280 @@
+"""Bulk property import from JSON arrays, NDJSON and CSV streams.
+
+Rows are parsed incrementally from the request stream and handled one
+batch at a time: validated, matched against existing URLs with one query,
+inserted (or upserted) with multi-row statements and committed, so memory
+is bounded by the batch size rather than the upload size.
+"""
+
+import codecs
+import csv
+import io
+import json
+import logging
+import math
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+
+from src.analysis.velocity import activity_deltas, add_listing_update, bump_activity
+from src.app import db
+from src.database.changes import record_changes
+from src.database.ingest import run_ingest_hooks, run_update_hooks
+from src.database.models import PriceHistory, Property
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+READ_SIZE = 64 * 1024
+# Per-row errors reported back; the total is always counted
+MAX_ERRORS = 1000
+
+REQUIRED = ("url", "address", "city", "state", "price")
+STRING_LIMITS = {
+    "url": 255, "address": 255, "city": 100, "state": 50, "zip_code": 10,
+    "property_type": 50, "image_url": 255, "source": 100,
+}
+NUMERIC = {"price": float, "bedrooms": int, "bathrooms": float, "square_feet": int}
+TEXT = ("description",)
+UPDATABLE = ("address", "city", "state", "zip_code", "price", "bedrooms", "bathrooms",
+             "square_feet", "property_type", "description", "image_url", "source")
+
+
+class ImportFormatError(ValueError):
+    """The upload cannot be parsed any further."""
+
+
+def iter_json_array(stream) -> Iterator[object]:
+    """Yield the elements of a JSON array without reading it whole."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    eof = False
+    while True:
+        stripped = buffer.lstrip()
+        if not started:
+            if not stripped and not eof:
+                buffer = _read(stream, text)
+                eof = not buffer
+                continue
+            if not stripped.startswith("["):
+                raise ImportFormatError("expected a JSON array")
+            buffer, started = stripped[1:], True
+            continue
+
+        stripped = stripped.lstrip(", \t\r\n")
+        if stripped.startswith("]"):
+            return
+        try:
+            value, end = decoder.raw_decode(stripped)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ImportFormatError(f"invalid JSON: {e.msg}") from e
+            chunk = _read(stream, text)
+            eof = not chunk
+            buffer = stripped + chunk
+            continue
+        yield value
+        buffer = stripped[end:]
+
+
+def _read(stream, text) -> str:
+    """Read one chunk of text; ``text`` carries characters split across chunks."""
+    while True:
+        chunk = stream.read(READ_SIZE)
+        if not isinstance(chunk, bytes):
+            return chunk
+        decoded = text.decode(chunk, final=not chunk)
+        if decoded or not chunk:
+            return decoded
+
+
+def iter_ndjson(stream) -> Iterator[object]:
+    """Yield one parsed object (or an error string) per non-empty line."""
+    for line in io.TextIOWrapper(stream, encoding="utf-8"):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f"invalid JSON: {e.msg}"
+
+
+def iter_csv(stream) -> Iterator[Dict]:
+    """Yield CSV rows as dictionaries, with empty cells as missing."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+    for row in reader:
+        yield {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def _format_errors(rows: Iterator[object]) -> Iterator[object]:
+    """Raise undecodable bytes and malformed CSV as ImportFormatError."""
+    try:
+        yield from rows
+    except UnicodeDecodeError as e:
+        raise ImportFormatError(f"invalid UTF-8: {e.reason}") from e
+    except csv.Error as e:
+        raise ImportFormatError(f"invalid CSV: {e}") from e
+
+
+def iter_rows(stream, mimetype: str) -> Iterator[object]:
+    """Pick the parser for an upload's content type."""
+    if mimetype in ("application/x-ndjson", "application/jsonl", "application/ndjson"):
+        return _format_errors(iter_ndjson(stream))
+    if mimetype == "text/csv":
+        return _format_errors(iter_csv(stream))
+    if mimetype == "application/json":
+        return _format_errors(iter_json_array(stream))
+    raise ImportFormatError(f"unsupported content type {mimetype or 'none'}")
+
+
+def validate_row(row: object) -> Tuple[Optional[Dict], Optional[str]]:
+    """Return (clean row, None) or (None, error message)."""
+    if isinstance(row, str):
+        return None, row
+    if not isinstance(row, dict):
+        return None, "row must be an object"
+
+    missing = [field for field in REQUIRED if row.get(field) in (None, "")]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+
+    clean = {}
+    for field, limit in STRING_LIMITS.items():
+        value = row.get(field)
+        if value is None:
+            continue
+        value = str(value).strip()
+        if len(value) > limit:
+            return None, f"{field} longer than {limit} characters"
+        clean[field] = value
+    for field in TEXT:
+        if row.get(field) is not None:
+            clean[field] = str(row[field])
+    for field, kind in NUMERIC.items():
+        value = row.get(field)
+        if value is None:
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None, f"{field} must be a number"
+        if not math.isfinite(number):
+            return None, f"{field} must be a number"
+        clean[field] = kind(number)
+        if clean[field] < 0:
+            return None, f"{field} must not be negative"
+    if clean["price"] == 0:
+        return None, "price must be positive"
+    return clean, None
+
+
+def _import_batch(batch: List[Tuple[int, object]], upsert: bool, result: Dict):
+    """Validate, write and commit one batch of (row number, row) pairs."""
+    valid = {}
+    for number, row in batch:
+        clean, error = validate_row(row)
+        if error:
+            _add_error(result, number, error)
+        elif clean["url"] in valid:
+            _add_error(result, number, "duplicate url in upload")
+        else:
+            valid[clean["url"]] = clean
+
+    stored_columns = [Property.url, Property.id, Property.scraped_at] + [getattr(Property, f) for f in UPDATABLE]
+    existing = {
+        stored.url: stored
+        for stored in db.session.query(*stored_columns).filter(Property.url.in_(list(valid)))
+    } if valid else {}
+
+    now = datetime.utcnow()
+    new_rows = [dict(row, scraped_at=now, updated_at=now) for url, row in valid.items() if url not in existing]
+    new_ids = []
+    if new_rows:
+        new_ids = list(db.session.scalars(insert(Property).returning(Property.id, sort_by_parameter_order=True), new_rows))
+        record_changes(db.session.connection(), "properties", "insert", zip(new_ids, new_rows))
+
+    changed = []
+    previous = {}
+    if upsert and existing:
+        updates = []
+        activity = activity_deltas()
+        for url, stored in existing.items():
+            row = valid[url]
+            # Only columns that differ are written and logged; identical rows are skipped
+            diff = {f: row[f] for f in UPDATABLE if f in row and row[f] != getattr(stored, f)}
+            if not diff:
+                result["skipped"] += 1
+                continue
+            updates.append(dict(diff, id=stored.id, updated_at=now))
+            previous[stored.id] = {f: getattr(stored, f) for f in diff}
+            if "price" in diff:
+                changed.append({"property_id": stored.id, "price": row["price"], "recorded_at": now})
+            add_listing_update(
+                activity, stored.scraped_at or now, stored.city, row["city"], stored.price, row["price"], now
+            )
+        if updates:
+            db.session.execute(update(Property), updates)
+            record_changes(
+                db.session.connection(), "properties", "update",
+                [(row["id"], {k: v for k, v in row.items() if k != "id"}) for row in updates],
+            )
+        bump_activity(db.session.connection(), activity)
+        if changed:
+            history_ids = db.session.scalars(
+                insert(PriceHistory).returning(PriceHistory.id, sort_by_parameter_order=True), changed
+            )
+            record_changes(db.session.connection(), "price_history", "insert", zip(history_ids, changed))
+        result["updated"] += len(updates)
+    else:
+        result["skipped"] += len(existing)
+
+    db.session.commit()
+    result["inserted"] += len(new_ids)
+    if new_ids:
+        run_ingest_hooks(new_ids)
+    if previous:
+        run_update_hooks(previous)
+
+
+def _add_error(result: Dict, row: int, error: str):
+    """Count an error and keep the first MAX_ERRORS of them."""
+    result["error_count"] += 1
+    if len(result["errors"]) < MAX_ERRORS:
+        result["errors"].append({"row": row, "error": error})
+
+
+def bulk_import(rows: Iterable[object], batch_size: int = DEFAULT_BATCH_SIZE, upsert: bool = False) -> Dict:
+    """Import rows in batches; returns counts and per-row errors (1-based row numbers)."""
+    result = {"received": 0, "inserted": 0, "updated": 0, "skipped": 0, "error_count": 0, "errors": []}
+    rows = iter(rows)
+    batch = []
+    aborted = None
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            break
+        except ImportFormatError as e:
+            aborted = e
+            break
+        result["received"] += 1
+        batch.append((result["received"], row))
+        if len(batch) >= batch_size:
+            _import_batch(batch, upsert, result)
+            batch = []
+    if batch:
+        _import_batch(batch, upsert, result)
+
+    if aborted is not None:
+        # Rows before the parse error are kept; the rest of the upload is not read
+        _add_error(result, result["received"] + 1, str(aborted))
+        result["aborted"] = True
+    logger.info(
+        f"Bulk import: {result['inserted']} inserted, {result['updated']} updated, "
+        f"{result['error_count']} errors"
+    )
+    return result
@@ -0,0 +1,113 @@
+"""Append-only change feed for ``properties`` and ``price_history``.
+
+An ``after_flush`` hook writes one ``change_log`` row per inserted, updated
+or deleted object on the flush's own connection, so an entry commits or
+rolls back with the change it describes. Bulk statements bypass the unit
+of work and call ``record_changes`` themselves (see ``bulk.py``); retention
+deletes by ``src.database.history`` are not changes and are not logged.
+
+Sequence numbers are never reused. On PostgreSQL writers take a
+transaction-level advisory lock before logging, so entries commit in
+sequence order and a consumer resuming from ``since=<seq>`` cannot skip
+an entry that was still in flight.
+"""
+
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, insert, text
+
+from src.app import db
+from src.database.models import ChangeLog
+
+logger = logging.getLogger(__name__)
+
+TRACKED_TABLES = ("properties", "price_history")
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+# Arbitrary constant naming the change-log advisory lock on PostgreSQL
+ADVISORY_LOCK_KEY = 0x63686C67
+
+
+def _json_value(value):
+    """Make a column value JSON serializable."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _row_data(obj, changed_only: bool = False) -> Dict:
+    """Column values of an ORM object, or only the columns this flush changed."""
+    state = inspect(obj)
+    data = {}
+    for column in state.mapper.column_attrs:
+        if changed_only:
+            added = state.attrs[column.key].history.added
+            if not added:
+                continue
+            data[column.key] = _json_value(added[0])
+        elif column.key in state.dict:
+            data[column.key] = _json_value(state.dict[column.key])
+    return data
+
+
+def record_changes(connection, table: str, op: str, rows: Iterable[Tuple[int, Optional[Dict]]]):
+    """Append (row id, data) entries for ``table`` on ``connection``."""
+    now = datetime.utcnow()
+    entries = [
+        {
+            "table_name": table,
+            "row_id": row_id,
+            "op": op,
+            "data": {key: _json_value(value) for key, value in data.items()} if data else None,
+            "changed_at": now,
+        }
+        for row_id, data in rows
+    ]
+    if not entries:
+        return
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    connection.execute(insert(ChangeLog.__table__), entries)
+
+
+def _after_flush(session, flush_context):
+    """Log tracked objects written in this flush."""
+    entries: Dict[Tuple[str, str], List] = {}
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            table = getattr(getattr(obj, "__table__", None), "name", None)
+            if table not in TRACKED_TABLES:
+                continue
+            if op == "update":
+                data = _row_data(obj, changed_only=True)
+                if not data:
+                    continue
+            else:
+                data = _row_data(obj) if op == "insert" else None
+            state = inspect(obj)
+            row_id = state.dict.get(state.mapper.get_property_by_column(state.mapper.primary_key[0]).key)
+            entries.setdefault((table, op), []).append((row_id, data))
+
+    for (table, op), rows in entries.items():
+        record_changes(session.connection(), table, op, rows)
+
+
+def changes_since(since: int = 0, limit: int = DEFAULT_LIMIT) -> Dict:
+    """Entries after sequence ``since`` and the cursor to resume from."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    rows = ChangeLog.query.filter(ChangeLog.seq > since).order_by(ChangeLog.seq).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "changes": [row.to_dict() for row in rows],
+        "next": rows[-1].seq if rows else since,
+        "has_more": has_more,
+    }
+
+
+def init_changes(app):
+    """Install the change-log session hook."""
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
@@ -0,0 +1,268 @@
+"""Cross-source duplicate listing detection.
+
+New listings are linked to a canonical property when an earlier listing
+in the same block (city and normalized street) has the same normalized
+address and a compatible zip code, or when MinHash/LSH finds an earlier
+listing in the same city with a near-identical description and matching
+size. Only rows sharing a block or an LSH bucket are compared, so each
+ingest costs time proportional to the batch, not the table.
+"""
+
+import hashlib
+import logging
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+
+from src.app import db
+from src.database.ingest import changed_ids
+from src.database.models import MinHashBand, Property, PropertyLink
+
+logger = logging.getLogger(__name__)
+
+STREET_SUFFIXES = {
+    "street": "st", "avenue": "ave", "av": "ave", "road": "rd", "drive": "dr",
+    "boulevard": "blvd", "lane": "ln", "court": "ct", "place": "pl", "terrace": "ter",
+    "parkway": "pkwy", "highway": "hwy", "circle": "cir", "square": "sq",
+}
+DIRECTIONS = {
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+}
+UNIT_WORDS = {"apt", "apartment", "unit", "suite", "ste", "#"}
+
+NUM_HASHES = 64
+BANDS = 16  # 16 bands of 4 rows: pairs above ~0.5 Jaccard usually share a bucket
+SHINGLE_WORDS = 3
+# One-line boilerplate descriptions are not distinctive enough to match on
+MIN_SHINGLES = 12
+DESCRIPTION_THRESHOLD = 0.8
+SQFT_TOLERANCE = 0.05
+CHUNK_SIZE = 5000
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240101)
+_A = _rng.integers(1, _PRIME, NUM_HASHES).astype(np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_HASHES).astype(np.uint64)
+
+
+def normalize_address(address: Optional[str]) -> Tuple[str, str]:
+    """(street, unit) with lowercase tokens and abbreviated suffixes."""
+    if not address:
+        return "", ""
+    # Drop city/state/zip parts but keep a unit written after a comma
+    parts = address.lower().split(",")
+    street = parts[0] + "".join(" " + p for p in parts[1:] if re.match(r"\s*(#|(apt|apartment|unit|suite|ste)\b)", p))
+    tokens = re.findall(r"[a-z0-9]+|#", street)
+    unit = ""
+    for i, token in enumerate(tokens):
+        if token in UNIT_WORDS:
+            unit = " ".join(t for t in tokens[i + 1:] if t not in UNIT_WORDS)
+            tokens = tokens[:i]
+            break
+    street = " ".join(DIRECTIONS.get(t, STREET_SUFFIXES.get(t, t)) for t in tokens)
+    return street, unit
+
+
+def minhash(text: Optional[str]) -> Optional[np.ndarray]:
+    """MinHash signature of word shingles, or None for short text."""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def band_buckets(signature: np.ndarray, city: str) -> List[int]:
+    """Signed 64-bit LSH bucket per band, scoped to the city."""
+    rows = NUM_HASHES // BANDS
+    buckets = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(f"{city.lower()}|{band}|".encode())
+        digest.update(signature[band * rows:(band + 1) * rows].tobytes())
+        buckets.append(int.from_bytes(digest.digest(), "big", signed=True))
+    return buckets
+
+
+def _record(row) -> Dict:
+    """Matching keys and attributes of one property row."""
+    property_id, city, zip_code, address, description, bedrooms, square_feet = row
+    street, unit = normalize_address(address)
+    signature = minhash(description)
+    return {
+        "id": property_id,
+        "block_key": f"{(city or '').strip().lower()}|{street}" if street else None,
+        "address_key": f"{street}|{unit}",
+        "zip": (zip_code or "").strip()[:5],
+        "signature": signature,
+        "buckets": band_buckets(signature, city or "") if signature is not None else [],
+        "bedrooms": bedrooms,
+        "square_feet": square_feet,
+    }
+
+
+def _same_address(a: Dict, b: Dict) -> bool:
+    """Same street and unit; zip codes must agree when both are known."""
+    return a["address_key"] == b["address_key"] and (not a["zip"] or not b["zip"] or a["zip"] == b["zip"])
+
+
+def _same_description(a: Dict, b: Dict) -> bool:
+    """Near-identical descriptions on listings of matching size."""
+    if a["signature"] is None or b["signature"] is None:
+        return False
+    if a["bedrooms"] is not None and b["bedrooms"] is not None and a["bedrooms"] != b["bedrooms"]:
+        return False
+    if not a["square_feet"] or not b["square_feet"]:
+        return False
+    if abs(a["square_feet"] - b["square_feet"]) > SQFT_TOLERANCE * max(a["square_feet"], b["square_feet"]):
+        return False
+    return float((a["signature"] == b["signature"]).mean()) >= DESCRIPTION_THRESHOLD
+
+
+_COLUMNS = (
+    Property.id, Property.city, Property.zip_code, Property.address,
+    Property.description, Property.bedrooms, Property.square_feet,
+)
+MATCH_COLUMNS = [column.key for column in _COLUMNS[1:]]
+
+
+def link_duplicates(property_ids: List[int]):
+    """Ingest hook: link new listings to the canonical id of their duplicates."""
+    records = [_record(row) for row in db.session.query(*_COLUMNS).filter(Property.id.in_(property_ids)).order_by(Property.id)]
+    if not records:
+        return
+
+    # Earlier listings sharing a block or an LSH bucket with the batch
+    blocks = {r["block_key"] for r in records if r["block_key"]}
+    buckets = {b for r in records for b in r["buckets"]}
+    candidate_ids = set()
+    if blocks:
+        candidate_ids.update(i for (i,) in db.session.query(PropertyLink.property_id).filter(PropertyLink.block_key.in_(blocks)))
+    by_bucket = defaultdict(list)
+    if buckets:
+        for bucket, property_id in db.session.query(MinHashBand.bucket, MinHashBand.property_id).filter(MinHashBand.bucket.in_(buckets)):
+            by_bucket[bucket].append(property_id)
+            candidate_ids.add(property_id)
+
+    known: Dict[int, Dict] = {}
+    canonical: Dict[int, int] = {}
+    by_block = defaultdict(list)
+    if candidate_ids:
+        rows = (
+            db.session.query(*_COLUMNS, PropertyLink.canonical_id)
+            .join(PropertyLink, PropertyLink.property_id == Property.id)
+            .filter(Property.id.in_(candidate_ids))
+        )
+        for row in rows:
+            record = _record(row[:-1])
+            known[record["id"]] = record
+            canonical[record["id"]] = row[-1]
+            if record["block_key"]:
+                by_block[record["block_key"]].append(record["id"])
+
+    links, bands, merges = [], [], []
+    for record in records:
+        address_matches = {i for i in by_block.get(record["block_key"], []) if _same_address(record, known[i])}
+        description_matches = {
+            i
+            for bucket in record["buckets"]
+            for i in by_bucket.get(bucket, [])
+            if i in known and i not in address_matches and _same_description(record, known[i])
+        }
+        matched = {canonical[i] for i in address_matches | description_matches}
+        target = min(matched) if matched else record["id"]
+
+        # A listing matching two clusters joins them under the older id
+        for other in matched - {target}:
+            merges.append((other, target))
+            for i, c in canonical.items():
+                if c == other:
+                    canonical[i] = target
+
+        canonical[record["id"]] = target
+        known[record["id"]] = record
+        if record["block_key"]:
+            by_block[record["block_key"]].append(record["id"])
+        for bucket in record["buckets"]:
+            by_bucket[bucket].append(record["id"])
+            bands.append({"property_id": record["id"], "bucket": bucket})
+        links.append(
+            {
+                "property_id": record["id"],
+                "block_key": record["block_key"],
+                "address_key": record["address_key"],
+                "match": "address" if address_matches else "description" if description_matches else None,
+            }
+        )
+
+    for old, new in merges:
+        PropertyLink.query.filter_by(canonical_id=old).update({"canonical_id": new}, synchronize_session=False)
+    for link in links:
+        link["canonical_id"] = canonical[link["property_id"]]
+    db.session.execute(insert(PropertyLink), links)
+    if bands:
+        db.session.execute(insert(MinHashBand), bands)
+    db.session.commit()
+
+    duplicates = sum(1 for link in links if link["match"])
+    if duplicates:
+        logger.info(f"Linked {duplicates} of {len(links)} new listings to existing properties")
+
+
+def relink_properties(previous: Dict[int, Dict]):
+    """Update hook: match listings again when their address, description or size changed.
+
+    Listings that were linked to a relinked one follow it to its new canonical id.
+    """
+    ids = changed_ids(previous, MATCH_COLUMNS)
+    if not ids:
+        return
+    MinHashBand.query.filter(MinHashBand.property_id.in_(ids)).delete(synchronize_session=False)
+    PropertyLink.query.filter(PropertyLink.property_id.in_(ids)).delete(synchronize_session=False)
+    link_duplicates(ids)
+
+    moved = db.session.query(PropertyLink.property_id, PropertyLink.canonical_id).filter(
+        PropertyLink.property_id.in_(ids), PropertyLink.property_id != PropertyLink.canonical_id
+    )
+    for old, new in moved.all():
+        PropertyLink.query.filter_by(canonical_id=old).update({"canonical_id": new}, synchronize_session=False)
+    db.session.commit()
+
+
+def rebuild_links():
+    """Relink the whole table in id order, one chunk at a time."""
+    MinHashBand.query.delete()
+    PropertyLink.query.delete()
+    db.session.commit()
+
+    last_id = 0
+    while True:
+        ids = [
+            i for (i,) in db.session.query(Property.id)
+            .filter(Property.id > last_id)
+            .order_by(Property.id)
+            .limit(CHUNK_SIZE)
+        ]
+        if not ids:
+            break
+        link_duplicates(ids)
+        last_id = ids[-1]
+    logger.info("Rebuilt duplicate links")
+
+
+def init_dedup(app):
+    """Link duplicates on ingest; backfill links once if missing."""
+    from src.database.ingest import register_ingest_hook, register_update_hook
+
+    register_ingest_hook(app, link_duplicates)
+    register_update_hook(app, relink_properties)
+
+    with app.app_context():
+        if PropertyLink.query.first() is None and Property.query.first() is not None:
+            rebuild_links()
@@ -0,0 +1,62 @@
+"""Engine profiles for SQLite and PostgreSQL."""
+
+import logging
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_database_uri(uri: str) -> str:
+    """Accept the legacy ``postgres://`` scheme used by some hosting providers."""
+    if uri.startswith("postgres://"):
+        return "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def is_sqlite(uri: str) -> bool:
+    """Return True if the URI points at SQLite."""
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def upsert_insert(connection, table):
+    """INSERT into ``table`` supporting ``ON CONFLICT`` on SQLite and PostgreSQL."""
+    insert = postgresql_insert if connection.dialect.name == "postgresql" else sqlite_insert
+    return insert(table)
+
+
+def engine_options(config) -> Dict:
+    """Build SQLALCHEMY_ENGINE_OPTIONS for the configured database."""
+    uri = config["SQLALCHEMY_DATABASE_URI"]
+    backend = make_url(uri).get_backend_name()
+
+    if backend == "sqlite":
+        # Pragmas are set per connection in register_sqlite_pragmas
+        return {}
+
+    return {
+        "pool_pre_ping": True,
+        "pool_size": config.get("DB_POOL_SIZE", 10),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 20),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+    }
+
+
+def register_sqlite_pragmas(engine, pragmas: Dict):
+    """Apply PRAGMAs (WAL, synchronous, cache, mmap) to each new SQLite connection."""
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite pragmas registered: {pragmas}")
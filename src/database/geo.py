@@ -0,0 +1,411 @@
+"""Offline geocoding and spatial queries over property locations.
+
+Properties are geocoded from a bundled gazetteer of zip and city
+centroids (``gazetteer.csv``; set ``GAZETTEER_PATH`` to a fuller file with
+the same columns) into ``property_locations``. Every location carries a
+fixed 0.1 degree grid cell, indexed with its coordinates, and on SQLite
+an R*Tree mirrors the coordinates through triggers for boxes spanning too
+many cells. ``location_cells`` keeps a count and
+coordinate sums per grid cell, so clusters for low map zoom levels are
+built from cell rows instead of every listing.
+"""
+
+import csv
+import logging
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import Integer, cast, column, func, insert, inspect, select, table, text
+from sqlalchemy.exc import OperationalError
+
+from src.app import db
+from src.database.engine import upsert_insert
+from src.database.ingest import changed_ids, register_ingest_hook, register_update_hook
+from src.database.models import LocationCell, Property, PropertyLocation
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(__file__), "gazetteer.csv")
+CELL_DEGREES = 0.1
+GRID_COLUMNS = int(360 / CELL_DEGREES)
+GRID_ROWS = int(180 / CELL_DEGREES)
+# Above this many grid cells a bounding box is filtered by coordinates alone
+MAX_GRID_CELLS = 2500
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+KM_PER_MILE = 1.609344
+# Cluster cells per side of a 256px map tile
+CLUSTERS_PER_TILE = 4
+MAX_ZOOM = 22
+CHUNK_SIZE = 50000
+
+RTREE_TABLE = "property_locations_rtree"
+_rtree = table(RTREE_TABLE, column("id"), column("min_lat"), column("max_lat"), column("min_lon"), column("max_lon"))
+# R*Tree coordinates are 32-bit floats; widen the box and filter exactly afterwards
+RTREE_SLACK = 1e-4
+
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    f"""CREATE TRIGGER IF NOT EXISTS property_locations_rtree_insert AFTER INSERT ON property_locations BEGIN
+        INSERT INTO {RTREE_TABLE} VALUES (new.property_id, new.lat, new.lat, new.lon, new.lon);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS property_locations_rtree_delete AFTER DELETE ON property_locations BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = old.property_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS property_locations_rtree_update
+        AFTER UPDATE OF lat, lon ON property_locations BEGIN
+        UPDATE {RTREE_TABLE} SET min_lat = new.lat, max_lat = new.lat, min_lon = new.lon, max_lon = new.lon
+        WHERE id = new.property_id;
+    END""",
+]
+
+
+def _place_key(city: Optional[str], state: Optional[str] = None) -> str:
+    """Case- and punctuation-insensitive city/state key."""
+    return re.sub(r"[^a-z0-9]+", " ", f"{city or ''}|{state or ''}".lower()).strip()
+
+
+class Gazetteer:
+    """Zip and city centroid lookups."""
+
+    def __init__(self, rows):
+        """Index ``zip_code, city, state, lat, lon`` rows."""
+        self.zips: Dict[str, Tuple[float, float, str]] = {}
+        self.places: Dict[str, Tuple[float, float]] = {}
+        self.cities: Dict[str, Tuple[float, float]] = {}
+        for row in rows:
+            point = (float(row["lat"]), float(row["lon"]))
+            if row.get("zip_code"):
+                self.zips.setdefault(row["zip_code"].strip()[:5], point + (_place_key(row["state"]),))
+            else:
+                self.places.setdefault(_place_key(row["city"], row["state"]), point)
+                # City alone resolves to the first (largest) place of that name
+                self.cities.setdefault(_place_key(row["city"]), point)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "Gazetteer":
+        """Load a gazetteer CSV."""
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(csv.DictReader(f))
+
+    def geocode(self, zip_code: Optional[str], city: Optional[str], state: Optional[str]) -> Optional[Tuple[float, float, str]]:
+        """(lat, lon, precision) from the zip code, else the city, or None.
+
+        A zip code is ignored when its state contradicts the listing's state.
+        """
+        point = self.zips.get((zip_code or "").strip()[:5])
+        if point and (not state or point[2] == _place_key(state)):
+            return point[0], point[1], "zip"
+        point = self.places.get(_place_key(city, state)) or self.cities.get(_place_key(city))
+        if point:
+            return point[0], point[1], "city"
+        return None
+
+
+def get_gazetteer(app=None) -> Gazetteer:
+    """The app's gazetteer, loaded once per process."""
+    app = app or current_app
+    if "gazetteer" not in app.extensions:
+        app.extensions["gazetteer"] = Gazetteer.from_csv(app.config.get("GAZETTEER_PATH") or GAZETTEER_FILE)
+    return app.extensions["gazetteer"]
+
+
+def grid_cell(lat, lon):
+    """Grid cell number of each point (scalars or arrays)."""
+    row = np.clip(np.floor((np.asarray(lat) + 90) / CELL_DEGREES), 0, GRID_ROWS - 1).astype(np.int64)
+    col = (np.floor((np.asarray(lon) + 180) / CELL_DEGREES).astype(np.int64)) % GRID_COLUMNS
+    return row * GRID_COLUMNS + col
+
+
+def _add_to_cells(located: List[Dict], sign: int = 1):
+    """Fold locations into the per-cell counts and sums (``sign=-1`` takes them out).
+
+    One atomic upsert adds the deltas, so concurrent ingests neither lose
+    increments nor collide inserting the same new cell.
+    """
+    totals: Dict[int, List[float]] = {}
+    for location in located:
+        total = totals.setdefault(location["cell"], [0, 0.0, 0.0])
+        total[0] += sign
+        total[1] += sign * location["lat"]
+        total[2] += sign * location["lon"]
+    if not totals:
+        return
+
+    connection = db.session.connection()
+    table = LocationCell.__table__
+    statement = upsert_insert(connection, table)
+    statement = statement.on_conflict_do_update(
+        index_elements=["cell"],
+        set_={name: table.c[name] + statement.excluded[name] for name in ("count", "lat_sum", "lon_sum")},
+    )
+    connection.execute(
+        statement,
+        [{"cell": cell, "count": count, "lat_sum": lat_sum, "lon_sum": lon_sum}
+         for cell, (count, lat_sum, lon_sum) in totals.items()],
+    )
+
+
+def _locate(rows) -> List[Dict]:
+    """Geocode (id, zip, city, state) rows; unknown places are skipped."""
+    gazetteer = get_gazetteer()
+    located = []
+    for property_id, zip_code, city, state in rows:
+        point = gazetteer.geocode(zip_code, city, state)
+        if point:
+            lat, lon, precision = point
+            located.append(
+                {"property_id": property_id, "lat": lat, "lon": lon, "precision": precision, "cell": int(grid_cell(lat, lon))}
+            )
+    return located
+
+
+def geocode_properties(property_ids: List[int]):
+    """Ingest hook: geocode new listings and update the cell counts."""
+    known = {i for (i,) in db.session.query(PropertyLocation.property_id).filter(PropertyLocation.property_id.in_(property_ids))}
+    rows = db.session.query(Property.id, Property.zip_code, Property.city, Property.state).filter(
+        Property.id.in_([i for i in property_ids if i not in known])
+    )
+    located = _locate(rows)
+    if located:
+        db.session.execute(insert(PropertyLocation), located)
+        _add_to_cells(located)
+    db.session.commit()
+
+
+def regeocode_properties(previous: Dict[int, Dict]):
+    """Update hook: geocode listings again when their zip code, city or state changed."""
+    ids = changed_ids(previous, ("zip_code", "city", "state"))
+    if not ids:
+        return
+    stale = PropertyLocation.query.filter(PropertyLocation.property_id.in_(ids))
+    _add_to_cells([{"cell": row.cell, "lat": row.lat, "lon": row.lon} for row in stale], sign=-1)
+    stale.delete(synchronize_session=False)
+    geocode_properties(ids)
+
+
+def rebuild_locations():
+    """Geocode every property again, in chunks."""
+    PropertyLocation.query.delete()
+    LocationCell.query.delete()
+    db.session.commit()
+
+    columns = (Property.id, Property.zip_code, Property.city, Property.state)
+    result = db.session.execute(select(*columns).execution_options(yield_per=CHUNK_SIZE))
+    total = 0
+    for partition in result.partitions():
+        located = _locate(partition)
+        if located:
+            db.session.execute(insert(PropertyLocation), located)
+            _add_to_cells(located)
+            db.session.flush()
+            total += len(located)
+    db.session.commit()
+    logger.info(f"Geocoded {total} properties")
+
+
+def _use_rtree() -> bool:
+    """Whether this app has an R*Tree over the locations."""
+    return current_app.extensions.get("geo_rtree", False)
+
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    """Parse ``south,west,north,east`` in degrees."""
+    try:
+        south, west, north, east = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be south,west,north,east")
+    if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+        raise ValueError("bbox must satisfy south <= north and west <= east within lat/lon bounds")
+    return south, west, north, east
+
+
+def resolve_point(value: str) -> Tuple[float, float]:
+    """``lat,lon``, a zip code or ``City, ST`` as coordinates."""
+    parts = [part.strip() for part in value.split(",")]
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except (IndexError, ValueError):
+        point = get_gazetteer().geocode(parts[0] if parts[0].isdigit() else None, parts[0], parts[1] if len(parts) > 1 else None)
+        if not point:
+            raise ValueError(f"unknown location {value!r}")
+        return point[0], point[1]
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("near must be a valid lat,lon")
+    return lat, lon
+
+
+def _cells_in_bbox(south: float, west: float, north: float, east: float) -> Optional[List[int]]:
+    """Grid cells covering a box, or None when there are too many to list."""
+    r0, c0 = divmod(int(grid_cell(south, west)), GRID_COLUMNS)
+    r1, c1 = divmod(int(grid_cell(north, east)), GRID_COLUMNS)
+    if (r1 - r0 + 1) * (c1 - c0 + 1) > MAX_GRID_CELLS:
+        return None
+    return [row * GRID_COLUMNS + col for row in range(r0, r1 + 1) for col in range(c0, c1 + 1)]
+
+
+def _bbox_query(south: float, west: float, north: float, east: float):
+    """(property_id, lat, lon) of locations inside a box.
+
+    Boxes spanning up to MAX_GRID_CELLS cells are read from the covering
+    cell index alone; the R*Tree serves larger ones.
+    """
+    query = db.session.query(PropertyLocation.property_id, PropertyLocation.lat, PropertyLocation.lon)
+    cells = _cells_in_bbox(south, west, north, east)
+    if cells is not None:
+        query = query.filter(PropertyLocation.cell.in_(cells))
+    elif _use_rtree():
+        query = query.join(_rtree, _rtree.c.id == PropertyLocation.property_id).filter(
+            _rtree.c.min_lat >= south - RTREE_SLACK,
+            _rtree.c.max_lat <= north + RTREE_SLACK,
+            _rtree.c.min_lon >= west - RTREE_SLACK,
+            _rtree.c.max_lon <= east + RTREE_SLACK,
+        )
+    return query.filter(
+        PropertyLocation.lat.between(south, north), PropertyLocation.lon.between(west, east)
+    )
+
+
+def locations_in_bbox(bbox: Tuple[float, float, float, float], limit: int) -> List[Dict]:
+    """Up to ``limit`` locations inside ``bbox``, by property id."""
+    rows = _bbox_query(*bbox).order_by(PropertyLocation.property_id).limit(limit)
+    return [{"id": i, "lat": lat, "lon": lon} for i, lat, lon in rows]
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances from one point to many."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def locations_near(lat: float, lon: float, radius_km: float, limit: int) -> List[Dict]:
+    """Up to ``limit`` locations within ``radius_km``, nearest first.
+
+    The box around the circle is ordered and limited in SQL by a flat-earth
+    squared distance; great-circle distances are computed for the fetched
+    rows only, and more are fetched while too many fall outside the radius.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(180.0, dlat / cos_lat)
+    bbox = (max(-90.0, lat - dlat), max(-180.0, lon - dlon), min(90.0, lat + dlat), min(180.0, lon + dlon))
+
+    north_south = PropertyLocation.lat - lat
+    east_west = (PropertyLocation.lon - lon) * cos_lat
+    query = _bbox_query(*bbox).order_by(north_south * north_south + east_west * east_west, PropertyLocation.property_id)
+    fetch = limit
+    while True:
+        rows = query.limit(fetch).all()
+        if not rows:
+            return []
+        ids, lats, lons = (np.array(values) for values in zip(*rows))
+        distances = haversine_km(lat, lon, lats, lons)
+        inside = np.flatnonzero(distances <= radius_km)
+        if len(inside) >= limit or len(rows) < fetch:
+            break
+        fetch *= 4
+    nearest = inside[np.lexsort((ids[inside], distances[inside]))][:limit]
+    return [
+        {"id": int(ids[i]), "lat": float(lats[i]), "lon": float(lons[i]), "distance_km": round(float(distances[i]), 3)}
+        for i in nearest
+    ]
+
+
+def _group(keys: np.ndarray, counts: np.ndarray, lat_sums: np.ndarray, lon_sums: np.ndarray) -> List[Dict]:
+    """Merge rows sharing a cluster key into count-weighted centroids."""
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    count = np.bincount(inverse, weights=counts, minlength=len(unique))
+    lat = np.bincount(inverse, weights=lat_sums, minlength=len(unique)) / count
+    lon = np.bincount(inverse, weights=lon_sums, minlength=len(unique)) / count
+    return [{"lat": float(a), "lon": float(o), "count": int(c)} for a, o, c in zip(lat, lon, count)]
+
+
+def _cluster_index(shifted, size: float):
+    """SQL floor of a non-negative coordinate over the cluster size."""
+    if db.session.get_bind().dialect.name == "postgresql":
+        # PostgreSQL rounds when casting to integer
+        return func.floor(shifted / size)
+    # SQLite may lack floor(); its integer cast truncates, which floors non-negative values
+    return cast(shifted / size, Integer)
+
+
+def cluster_bbox(bbox: Tuple[float, float, float, float], zoom: int) -> List[Dict]:
+    """Clusters of listings in ``bbox`` sized for a web map at ``zoom``.
+
+    Clusters at least one grid cell wide are merged from ``location_cells``;
+    finer clusters group the individual locations in SQL. Single-listing clusters
+    carry the property id.
+    """
+    zoom = max(0, min(zoom, MAX_ZOOM))
+    size = 360.0 / (2 ** zoom) / CLUSTERS_PER_TILE
+    south, west, north, east = bbox
+
+    if size >= CELL_DEGREES:
+        span = max(1, int(size / CELL_DEGREES))
+        r0, c0 = divmod(int(grid_cell(south, west)), GRID_COLUMNS)
+        r1, c1 = divmod(int(grid_cell(north, east)), GRID_COLUMNS)
+        rows = LocationCell.query.with_entities(
+            LocationCell.cell, LocationCell.count, LocationCell.lat_sum, LocationCell.lon_sum
+        ).filter(
+            LocationCell.cell >= r0 * GRID_COLUMNS, LocationCell.cell < (r1 + 1) * GRID_COLUMNS, LocationCell.count > 0
+        ).all()
+        if not rows:
+            return []
+        cells, counts, lat_sums, lon_sums = (np.array(values) for values in zip(*rows))
+        grid_row, grid_col = np.divmod(cells, GRID_COLUMNS)
+        keep = (grid_col >= c0) & (grid_col <= c1)
+        if not keep.any():
+            return []
+        keys = np.column_stack((grid_row[keep] // span, grid_col[keep] // span))
+        clusters = _group(keys, counts[keep].astype(float), lat_sums[keep], lon_sums[keep])
+        # Edge cells overlap the box; keep clusters whose centre is inside
+        return [c for c in clusters if south <= c["lat"] <= north and west <= c["lon"] <= east]
+
+    key_lat = _cluster_index(PropertyLocation.lat + 90, size)
+    key_lon = _cluster_index(PropertyLocation.lon + 180, size)
+    rows = _bbox_query(south, west, north, east).with_entities(
+        func.count(), func.sum(PropertyLocation.lat), func.sum(PropertyLocation.lon), func.min(PropertyLocation.property_id)
+    ).group_by(key_lat, key_lon).order_by(key_lat, key_lon)
+    clusters = []
+    for count, lat_sum, lon_sum, first_id in rows:
+        cluster = {"lat": lat_sum / count, "lon": lon_sum / count, "count": count}
+        if count == 1:
+            cluster["property_id"] = first_id
+        clusters.append(cluster)
+    return clusters
+
+
+def init_geo(app):
+    """Create the R*Tree (SQLite), register the ingest hook and geocode once."""
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            created = not inspect(db.engine).has_table(RTREE_TABLE)
+            try:
+                with db.engine.begin() as conn:
+                    for statement in SQLITE_DDL:
+                        conn.execute(text(statement))
+                    if created:
+                        conn.execute(
+                            text(f"INSERT INTO {RTREE_TABLE} SELECT property_id, lat, lat, lon, lon FROM property_locations")
+                        )
+                app.extensions["geo_rtree"] = True
+            except OperationalError as e:
+                # SQLite built without the R*Tree module: the grid cell index is used
+                logger.warning(f"R*Tree unavailable, using grid index: {e}")
+        # Tables created before the covering index existed
+        for index in PropertyLocation.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    register_ingest_hook(app, geocode_properties)
+    register_update_hook(app, regeocode_properties)
+
+    with app.app_context():
+        if PropertyLocation.query.first() is None and Property.query.first() is not None:
+            rebuild_locations()
@@ -0,0 +1,282 @@
+"""Price history compaction, retention tiers and cold-partition archival.
+
+Compaction rewrites ``price_history`` one block of properties at a time:
+
+* rows older than ``PRICE_HISTORY_DAILY_AFTER_DAYS`` keep the last price of
+  each day, rows older than ``PRICE_HISTORY_WEEKLY_AFTER_DAYS`` the last
+  price of each week;
+* rows that repeat the previous price are dropped, so only change points stay;
+* whole months older than ``PRICE_HISTORY_ARCHIVE_AFTER_DAYS`` move to
+  ``PRICE_HISTORY_ARCHIVE_DIR``, one file per month and run (Parquet when
+  pyarrow is installed, compressed NumPy otherwise).
+
+The archive's ``ARCHIVED_BEFORE`` file is the boundary between the two
+stores: the hot table answers for later rows and archive files for earlier
+ones, so ``read_price_history`` never double counts, even when a run stops
+between writing files and deleting rows.
+
+Usage:
+    python -m src.database.history
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import delete, func, select
+
+from src.app import db
+from src.database.models import PriceHistory
+
+try:  # optional: Parquet archives when pyarrow is installed
+    import pyarrow  # noqa: F401
+
+    ARCHIVE_SUFFIX = ".parquet"
+except ImportError:  # pragma: no cover
+    ARCHIVE_SUFFIX = ".npz"
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["id", "property_id", "price", "recorded_at"]
+WATERMARK_FILE = "ARCHIVED_BEFORE"
+# Properties per compaction transaction
+PROPERTY_BLOCK = 5000
+DELETE_CHUNK = 900
+
+
+def compact_frame(frame: pd.DataFrame, daily_before: datetime, weekly_before: datetime) -> pd.DataFrame:
+    """Rows of ``frame`` that survive downsampling and change-point filtering."""
+    if frame.empty:
+        return frame
+    frame = frame.sort_values(["property_id", "recorded_at", "id"])
+    recorded = frame["recorded_at"]
+    day = recorded.dt.normalize()
+    week = day - pd.to_timedelta(day.dt.dayofweek, unit="D")
+    bucket = recorded.where(recorded >= daily_before, day).where(recorded >= weekly_before, week)
+
+    frame = frame.assign(bucket=bucket).drop_duplicates(["property_id", "bucket"], keep="last")
+    previous = frame.groupby("property_id")["price"].shift()
+    return frame.loc[previous.isna() | (frame["price"] != previous), COLUMNS]
+
+
+def _load_frame(*criteria) -> pd.DataFrame:
+    """Load price history rows as a frame."""
+    rows = db.session.execute(select(*(getattr(PriceHistory, c) for c in COLUMNS)).where(*criteria)).all()
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    frame["recorded_at"] = pd.to_datetime(frame["recorded_at"])
+    return frame
+
+
+def _delete_ids(ids: Iterable[int]) -> int:
+    """Delete rows by id in parameter-sized chunks."""
+    ids = list(ids)
+    for start in range(0, len(ids), DELETE_CHUNK):
+        db.session.execute(delete(PriceHistory).where(PriceHistory.id.in_(ids[start:start + DELETE_CHUNK])))
+    return len(ids)
+
+
+def read_watermark(archive_dir: Optional[str]) -> Optional[datetime]:
+    """Everything recorded before this time lives in the archive."""
+    path = os.path.join(archive_dir, WATERMARK_FILE) if archive_dir else None
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return datetime.fromisoformat(f.read().strip())
+
+
+def _write_watermark(archive_dir: str, when: datetime):
+    """Atomically move the archive boundary."""
+    tmp = os.path.join(archive_dir, f".{WATERMARK_FILE}.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(when.isoformat())
+    os.replace(tmp, os.path.join(archive_dir, WATERMARK_FILE))
+
+
+def _partition_files(archive_dir: str) -> List[str]:
+    """All archive files, e.g. ``month=2024-03/before-20250101.parquet``."""
+    return sorted(glob.glob(os.path.join(archive_dir, "month=*", "before-*.*")))
+
+
+def _file_boundary(path: str) -> datetime:
+    """The watermark a file was written for."""
+    stamp = os.path.basename(path).split(".")[0][len("before-"):]
+    return datetime.strptime(stamp, "%Y%m%d")
+
+
+def _write_partition(path: str, frame: pd.DataFrame):
+    """Write one archive file atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    if path.endswith(".parquet"):
+        frame.to_parquet(tmp, index=False)
+    else:
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                id=frame["id"].to_numpy(np.int64),
+                property_id=frame["property_id"].to_numpy(np.int64),
+                price=frame["price"].to_numpy(float),
+                recorded_at=frame["recorded_at"].to_numpy("datetime64[ns]"),
+            )
+    os.replace(tmp, path)
+
+
+def _read_partition(path: str) -> pd.DataFrame:
+    """Read one archive file."""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    with np.load(path) as data:
+        return pd.DataFrame({column: data[column] for column in COLUMNS})
+
+
+def _month_start(moment: datetime) -> datetime:
+    """Midnight on the first of the month."""
+    return datetime(moment.year, moment.month, 1)
+
+
+def _next_month(moment: datetime) -> datetime:
+    """First of the following month."""
+    return _month_start(moment + timedelta(days=32))
+
+
+def archive_cold_months(archive_dir: str, before: datetime) -> Dict:
+    """Move whole months recorded before ``before`` from the table to files."""
+    before = _month_start(before)
+    watermark = read_watermark(archive_dir)
+    os.makedirs(archive_dir, exist_ok=True)
+    # Files from a run that never moved the watermark would be read twice
+    for path in _partition_files(archive_dir):
+        if watermark is None or _file_boundary(path) > watermark:
+            os.remove(path)
+    if watermark:
+        # Rows a previous run archived but failed to delete; readers already skip them
+        db.session.execute(delete(PriceHistory).where(PriceHistory.recorded_at < watermark))
+        db.session.commit()
+    if watermark and before <= watermark:
+        return {"archived": 0, "months": 0}
+
+    criteria = [PriceHistory.recorded_at < before]
+    if watermark:
+        criteria.append(PriceHistory.recorded_at >= watermark)
+    oldest = db.session.scalar(select(func.min(PriceHistory.recorded_at)).where(*criteria))
+
+    archived = months = 0
+    month = _month_start(oldest) if oldest else before
+    while month < before:
+        following = _next_month(month)
+        frame = _load_frame(PriceHistory.recorded_at >= month, PriceHistory.recorded_at < following)
+        if not frame.empty:
+            name = f"before-{before:%Y%m%d}{ARCHIVE_SUFFIX}"
+            _write_partition(os.path.join(archive_dir, f"month={month:%Y-%m}", name), frame)
+            archived += len(frame)
+            months += 1
+        month = following
+
+    _write_watermark(archive_dir, before)
+    db.session.execute(delete(PriceHistory).where(PriceHistory.recorded_at < before))
+    db.session.commit()
+    logger.info(f"Archived {archived} price history rows from {months} months before {before:%Y-%m-%d}")
+    return {"archived": archived, "months": months}
+
+
+def compact_price_history(now: Optional[datetime] = None, archive_dir: Optional[str] = None) -> Dict:
+    """Downsample and deduplicate the hot table, then archive cold months.
+
+    Tier ages come from the ``PRICE_HISTORY_*_AFTER_DAYS`` settings; the
+    archive step runs only when an archive directory is configured.
+    """
+    config = current_app.config
+    now = now or datetime.utcnow()
+    daily_before = now - timedelta(days=config["PRICE_HISTORY_DAILY_AFTER_DAYS"])
+    weekly_before = now - timedelta(days=config["PRICE_HISTORY_WEEKLY_AFTER_DAYS"])
+    archive_dir = archive_dir or config.get("PRICE_HISTORY_ARCHIVE_DIR")
+    if config["PRICE_HISTORY_ARCHIVE_AFTER_DAYS"] < config["PRICE_HISTORY_WEEKLY_AFTER_DAYS"]:
+        raise ValueError("price history must be downsampled to weekly before it is archived")
+
+    before = db.session.query(func.count(PriceHistory.id)).scalar()
+    low, high = db.session.query(func.min(PriceHistory.property_id), func.max(PriceHistory.property_id)).one()
+    removed = 0
+    for start in range(low or 0, (high or -1) + 1, PROPERTY_BLOCK):
+        frame = _load_frame(PriceHistory.property_id >= start, PriceHistory.property_id < start + PROPERTY_BLOCK)
+        kept = compact_frame(frame, daily_before, weekly_before)
+        removed += _delete_ids(frame.loc[~frame["id"].isin(kept["id"]), "id"].tolist())
+        db.session.commit()
+
+    result = {"rows_before": before, "removed": removed, "archived": 0, "months": 0}
+    if archive_dir:
+        archive_before = now - timedelta(days=config["PRICE_HISTORY_ARCHIVE_AFTER_DAYS"])
+        result.update(archive_cold_months(archive_dir, archive_before))
+    result["rows_after"] = db.session.query(func.count(PriceHistory.id)).scalar()
+    logger.info(f"Compacted price history: {result}")
+    return result
+
+
+def read_price_history(
+    property_ids: Optional[List[int]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    archive_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """Price history from the hot table and the archive as one frame.
+
+    Rows are ``property_id, price, recorded_at`` ordered by property and time;
+    ``start`` is inclusive and ``end`` exclusive.
+    """
+    archive_dir = archive_dir or current_app.config.get("PRICE_HISTORY_ARCHIVE_DIR")
+    watermark = read_watermark(archive_dir)
+
+    criteria = []
+    if property_ids is not None:
+        criteria.append(PriceHistory.property_id.in_(property_ids))
+    if start:
+        criteria.append(PriceHistory.recorded_at >= start)
+    if end:
+        criteria.append(PriceHistory.recorded_at < end)
+    if watermark:
+        criteria.append(PriceHistory.recorded_at >= watermark)
+    frames = [_load_frame(*criteria)]
+
+    if watermark and (start is None or start < watermark):
+        for path in _partition_files(archive_dir):
+            month = datetime.strptime(os.path.basename(os.path.dirname(path))[len("month="):], "%Y-%m")
+            if _file_boundary(path) > watermark or (end and month >= end) or (start and _next_month(month) <= start):
+                continue
+            frame = _read_partition(path)
+            mask = np.ones(len(frame), dtype=bool)
+            if property_ids is not None:
+                mask &= frame["property_id"].isin(property_ids).to_numpy()
+            if start:
+                mask &= (frame["recorded_at"] >= start).to_numpy()
+            if end:
+                mask &= (frame["recorded_at"] < end).to_numpy()
+            frames.append(frame[mask])
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS[1:])
+    combined = pd.concat(frames, ignore_index=True)
+    return combined.sort_values(["property_id", "recorded_at", "id"])[COLUMNS[1:]].reset_index(drop=True)
+
+
+def main(argv=None):
+    """Run one compaction pass against the configured database."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", help="archive directory (default: PRICE_HISTORY_ARCHIVE_DIR)")
+    args = parser.parse_args(argv)
+
+    from src.app import create_app
+
+    app = create_app()
+    with app.app_context():
+        print(json.dumps(compact_price_history(archive_dir=args.archive), indent=2))
+
+
+if __name__ == "__main__":
+    main()
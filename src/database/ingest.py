@@ -0,0 +1,137 @@
+"""Listing ingestion and post-commit ingest hooks."""
+
+import logging
+from typing import Callable, Dict, List, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from src.app import db
+from src.database.models import Property
+
+logger = logging.getLogger(__name__)
+
+
+def register_ingest_hook(app, hook: Callable[[List[int]], None]):
+    """Register a callable run with the new property ids after each ingest commit."""
+    app.extensions.setdefault("ingest_hooks", []).append(hook)
+    return hook
+
+
+def run_ingest_hooks(property_ids: List[int]):
+    """Run the current app's ingest hooks; failures are logged, not raised."""
+    for hook in current_app.extensions.get("ingest_hooks", []):
+        try:
+            hook(property_ids)
+        except Exception as e:
+            # A failed flush would otherwise leave every later hook with a dead transaction
+            db.session.rollback()
+            logger.error(f"Ingest hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+
+def register_update_hook(app, hook: Callable[[Dict[int, Dict]], None]):
+    """Register a callable run after each commit that updates existing properties.
+
+    The hook gets ``{property id: {column: value before the update}}`` with
+    only the columns that changed; current values are in the table.
+    """
+    app.extensions.setdefault("update_hooks", []).append(hook)
+    return hook
+
+
+def run_update_hooks(previous: Dict[int, Dict]):
+    """Run the current app's update hooks; failures are logged, not raised."""
+    for hook in current_app.extensions.get("update_hooks", []):
+        try:
+            hook(previous)
+        except Exception as e:
+            # A failed flush would otherwise leave every later hook with a dead transaction
+            db.session.rollback()
+            logger.error(f"Update hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+
+def changed_ids(previous: Dict[int, Dict], columns) -> List[int]:
+    """Ids whose update touched any of ``columns``."""
+    return [property_id for property_id, old in previous.items() if any(c in old for c in columns)]
+
+
+def group_criteria(city: str, property_type: str):
+    """SQL filter selecting one (city, property type) group (empty type matches NULL)."""
+    if property_type:
+        return and_(Property.city == city, Property.property_type == property_type)
+    return and_(
+        Property.city == city,
+        or_(Property.property_type.is_(None), Property.property_type == ""),
+    )
+
+
+def affected_groups(previous: Dict[int, Dict], columns) -> Set[Tuple[str, str]]:
+    """(city, property type) groups updated rows left or joined, when ``columns`` changed."""
+    ids = changed_ids(previous, columns)
+    groups = set()
+    if not ids:
+        return groups
+    for property_id, city, property_type in db.session.query(
+        Property.id, Property.city, Property.property_type
+    ).filter(Property.id.in_(ids)):
+        old = previous[property_id]
+        groups.add((city, property_type or ""))
+        groups.add((old.get("city", city), old.get("property_type", property_type) or ""))
+    return groups
+
+
+def property_from_listing(listing: Dict) -> Property:
+    """Build a Property from a scraped listing dictionary."""
+    property_obj = Property(
+        url=listing.get("url"),
+        address=listing.get("address"),
+        city=listing.get("city"),
+        state=listing.get("state"),
+        zip_code=listing.get("zip_code"),
+        price=listing.get("price"),
+        bedrooms=listing.get("bedrooms"),
+        bathrooms=listing.get("bathrooms"),
+        square_feet=listing.get("square_feet"),
+        property_type=listing.get("property_type"),
+        description=listing.get("description"),
+        image_url=listing.get("image_url"),
+        source=listing.get("source"),
+    )
+    if listing.get("scraped_at"):
+        property_obj.scraped_at = listing["scraped_at"]
+    # Handle multiple images
+    images = listing.get("images", [])
+    if images:
+        property_obj.set_images(images)
+        if not property_obj.image_url and images:
+            property_obj.image_url = images[0]
+    return property_obj
+
+
+def ingest_listings(listings: List[Dict]) -> Dict:
+    """Save new listings in one transaction and run ingest hooks.
+
+    Existing listings are matched by URL with a single query.
+    """
+    urls = [listing.get("url") for listing in listings if listing.get("url")]
+    known = {
+        url for (url,) in db.session.query(Property.url).filter(Property.url.in_(urls))
+    } if urls else set()
+
+    new_properties = []
+    for listing in listings:
+        url = listing.get("url")
+        if url in known:
+            continue
+        known.add(url)
+        property_obj = property_from_listing(listing)
+        db.session.add(property_obj)
+        new_properties.append(property_obj)
+
+    db.session.commit()
+
+    property_ids = [p.id for p in new_properties]
+    if property_ids:
+        run_ingest_hooks(property_ids)
+
+    return {"saved": len(property_ids), "property_ids": property_ids}
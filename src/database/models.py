@@ -116,3 +116,283 @@ class MarketReport(db.Model):
                 self.generated_at.isoformat() if self.generated_at else None
             ),
         }
+
+
+class ScrapeRun(db.Model):
+    """Timing and outcome ledger for a single scraper run."""
+
+    __tablename__ = "scrape_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(100), nullable=False, index=True)
+    location = db.Column(db.String(100))
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    duration_ms = db.Column(db.Float)
+    phases = db.Column(db.JSON)  # {phase: {"ms": total, "calls": n}}
+    cards_found = db.Column(db.Integer, default=0)
+    listings_count = db.Column(db.Integer, default=0)
+    used_fallback = db.Column(db.Boolean, default=False)
+    errors = db.Column(db.JSON)
+
+    def __repr__(self):
+        return f"<ScrapeRun {self.source} {self.location}>"
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            "id": self.id,
+            "source": self.source,
+            "location": self.location,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_ms": self.duration_ms,
+            "phases": self.phases or {},
+            "cards_found": self.cards_found,
+            "listings_count": self.listings_count,
+            "used_fallback": self.used_fallback,
+            "errors": self.errors or [],
+        }
+
+
+class PriceSketch(db.Model):
+    """Persisted price aggregate (moments + t-digest) per city and property type."""
+
+    __tablename__ = "price_sketches"
+    __table_args__ = (db.UniqueConstraint("city", "property_type", name="uq_price_sketch_group"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(100), nullable=False, index=True)
+    property_type = db.Column(db.String(50), nullable=False, default="")
+    count = db.Column(db.Integer, default=0)
+    state = db.Column(db.JSON, nullable=False)  # PriceAggregate.to_dict()
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f"<PriceSketch {self.city}/{self.property_type} n={self.count}>"
+
+
+class AnomalyBaseline(db.Model):
+    """Cached robust price-per-square-foot baseline per city and property type."""
+
+    __tablename__ = "anomaly_baselines"
+    __table_args__ = (db.UniqueConstraint("city", "property_type", name="uq_anomaly_baseline_group"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(100), nullable=False)
+    property_type = db.Column(db.String(50), nullable=False, default="")
+    median_ppsf = db.Column(db.Float, nullable=False)
+    mad_ppsf = db.Column(db.Float, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    pending = db.Column(db.Integer, default=0)  # rows scored since the last fit
+    fitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AnomalyBaseline {self.city}/{self.property_type}>"
+
+
+class AnomalyScore(db.Model):
+    """Robust z-score of a property's price per square foot within its group."""
+
+    __tablename__ = "anomaly_scores"
+
+    property_id = db.Column(db.Integer, db.ForeignKey("properties.id"), primary_key=True)
+    city = db.Column(db.String(100), index=True)
+    property_type = db.Column(db.String(50))
+    price_per_sqft = db.Column(db.Float)
+    score = db.Column(db.Float, nullable=False)
+    abs_score = db.Column(db.Float, nullable=False, index=True)
+    scored_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            "id": self.property_id,
+            "score": self.score,
+            "price_per_sqft": self.price_per_sqft,
+        }
+
+
+class PriceRollup(db.Model):
+    """Daily, weekly and monthly price aggregates per city and property type."""
+
+    __tablename__ = "price_rollups"
+    __table_args__ = (
+        db.UniqueConstraint("period", "bucket", "city", "property_type", name="uq_price_rollup"),
+        db.Index("ix_price_rollup_city_bucket", "period", "city", "bucket"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False)  # "day", "week" or "month"
+    bucket = db.Column(db.Date, nullable=False)  # first day of the period
+    city = db.Column(db.String(100), nullable=False)
+    property_type = db.Column(db.String(50), nullable=False, default="")
+    count = db.Column(db.Integer, default=0)
+    state = db.Column(db.JSON, nullable=False)  # PriceAggregate.to_dict()
+
+    def __repr__(self):
+        return f"<PriceRollup {self.period} {self.bucket} {self.city}/{self.property_type}>"
+
+
+class ValuationModel(db.Model):
+    """Cached hedonic regression coefficients for one city."""
+
+    __tablename__ = "valuation_models"
+
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(100), unique=True, nullable=False)
+    coefficients = db.Column(db.JSON, nullable=False)  # one per DESIGN_COLUMNS entry
+    medians = db.Column(db.JSON, nullable=False)  # imputation values for missing features
+    smearing = db.Column(db.Float, nullable=False, default=1.0)
+    r_squared = db.Column(db.Float)
+    count = db.Column(db.Integer, nullable=False)
+    pending = db.Column(db.Integer, default=0)  # rows scored since the last fit
+    fitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ValuationModel {self.city}>"
+
+
+class Valuation(db.Model):
+    """Fair value estimate of a property from its city's valuation model."""
+
+    __tablename__ = "valuations"
+
+    property_id = db.Column(db.Integer, db.ForeignKey("properties.id"), primary_key=True)
+    city = db.Column(db.String(100), index=True)
+    fair_value = db.Column(db.Float, nullable=False)
+    price_gap = db.Column(db.Float, nullable=False)  # price / fair_value - 1
+    flag = db.Column(db.String(10), nullable=False, index=True)  # "over", "under" or "fair"
+    valued_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            "id": self.property_id,
+            "city": self.city,
+            "fair_value": self.fair_value,
+            "price_gap": self.price_gap,
+            "flag": self.flag,
+        }
+
+
+class PropertyLink(db.Model):
+    """Entity-resolution link from a property to its canonical listing."""
+
+    __tablename__ = "property_links"
+
+    property_id = db.Column(db.Integer, db.ForeignKey("properties.id"), primary_key=True)
+    canonical_id = db.Column(db.Integer, nullable=False, index=True)
+    block_key = db.Column(db.String(255), index=True)  # city|normalized street
+    address_key = db.Column(db.String(255))  # normalized street plus unit
+    match = db.Column(db.String(20))  # "address", "description" or None for canonical rows
+    linked_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            "id": self.property_id,
+            "canonical_id": self.canonical_id,
+            "match": self.match,
+        }
+
+
+class MinHashBand(db.Model):
+    """LSH bucket of one band of a property description's MinHash signature."""
+
+    __tablename__ = "minhash_bands"
+
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey("properties.id"), nullable=False, index=True)
+    bucket = db.Column(db.BigInteger, nullable=False, index=True)  # hash of city, band number and band values
+
+
+class TableVersion(db.Model):
+    """Write counter per table, bumped in the transaction that changes it."""
+
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ChangeLog(db.Model):
+    """Append-only feed of inserts, updates and deletes of tracked tables."""
+
+    __tablename__ = "change_log"
+    # Never reuse a sequence number, even after the newest entry is deleted
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(100), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # insert, update or delete
+    data = db.Column(db.JSON)  # full row for inserts, changed columns for updates
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            "seq": self.seq,
+            "table": self.table_name,
+            "id": self.row_id,
+            "op": self.op,
+            "data": self.data,
+            "changed_at": self.changed_at.isoformat() if self.changed_at else None,
+        }
+
+
+class PropertyLocation(db.Model):
+    """Geocoded position of a property from the offline gazetteer."""
+
+    __tablename__ = "property_locations"
+    # Covers box queries over grid cells without reading the table rows
+    __table_args__ = (db.Index("ix_property_locations_cell_lat_lon", "cell", "lat", "lon"),)
+
+    property_id = db.Column(db.Integer, db.ForeignKey("properties.id"), primary_key=True)
+    lat = db.Column(db.Float, nullable=False)
+    lon = db.Column(db.Float, nullable=False)
+    precision = db.Column(db.String(10), nullable=False)  # zip or city centroid
+    cell = db.Column(db.Integer, nullable=False)  # fixed-size lat/lon grid cell
+
+
+class LocationCell(db.Model):
+    """Running count and coordinate sums of the properties in one grid cell."""
+
+    __tablename__ = "location_cells"
+
+    cell = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    lat_sum = db.Column(db.Float, nullable=False, default=0.0)
+    lon_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class MarketActivity(db.Model):
+    """Weekly listing-velocity counters for one city."""
+
+    __tablename__ = "market_activity"
+    __table_args__ = (db.UniqueConstraint("city", "week", name="uq_market_activity"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(100), nullable=False)
+    week = db.Column(db.Date, nullable=False)  # Monday of the week
+    new_listings = db.Column(db.Integer, nullable=False, default=0)
+    delistings = db.Column(db.Integer, nullable=False, default=0)
+    price_cuts = db.Column(db.Integer, nullable=False, default=0)
+    price_increases = db.Column(db.Integer, nullable=False, default=0)
+    dom_days = db.Column(db.Float, nullable=False, default=0.0)  # days on market of this week's delistings
+    active = db.Column(db.Integer, nullable=False, default=0)  # listings first seen this week still listed
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            "city": self.city,
+            "week": self.week.isoformat(),
+            "new_listings": self.new_listings,
+            "delistings": self.delistings,
+            "price_cuts": self.price_cuts,
+            "price_increases": self.price_increases,
+            "dom_days": self.dom_days,
+            "active": self.active,
+        }
@@ -0,0 +1,104 @@
+"""Full-text search over property address, city and description.
+
+SQLite uses an external-content FTS5 table kept in sync by triggers and
+ranked with BM25. PostgreSQL uses a GIN expression index on a tsvector of
+the same columns, ranked with ts_rank_cd. Both stay current on every
+insert, update and delete without application code.
+"""
+
+import logging
+import re
+
+from sqlalchemy import column, inspect, table, text
+
+from src.app import db
+from src.database.models import Property
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "properties_fts"
+_fts = table(FTS_TABLE, column("rowid"))
+# BM25 column weights for address, city and description
+BM25_WEIGHTS = (4.0, 2.0, 1.0)
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        address, city, description,
+        content='properties', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_fts_insert AFTER INSERT ON properties BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, address, city, description)
+        VALUES (new.id, new.address, new.city, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_fts_delete AFTER DELETE ON properties BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, address, city, description)
+        VALUES ('delete', old.id, old.address, old.city, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_fts_update
+        AFTER UPDATE OF address, city, description ON properties BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, address, city, description)
+        VALUES ('delete', old.id, old.address, old.city, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, address, city, description)
+        VALUES (new.id, new.address, new.city, new.description);
+    END""",
+]
+
+TSVECTOR = (
+    "to_tsvector('english', coalesce(properties.address, '') || ' ' || "
+    "coalesce(properties.city, '') || ' ' || coalesce(properties.description, ''))"
+)
+POSTGRES_DDL = [f"CREATE INDEX IF NOT EXISTS ix_properties_fts ON properties USING GIN ({TSVECTOR})"]
+
+
+def fts_query(q: str) -> str:
+    """FTS5 MATCH expression: every word required, the last one as a prefix."""
+    words = re.findall(r"\w+", q.lower())
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_properties(query, q: str):
+    """Restrict a Property query to matches for ``q``, best first."""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        match = fts_query(q)
+        if not match:
+            return query.filter(text("0"))
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        return (
+            query.join(_fts, _fts.c.rowid == Property.id)
+            .filter(text(f"{FTS_TABLE} MATCH :match").bindparams(match=match))
+            .order_by(text(f"bm25({FTS_TABLE}, {weights})"))
+        )
+    if dialect == "postgresql":
+        tsquery = "websearch_to_tsquery('english', :q)"
+        return query.filter(text(f"{TSVECTOR} @@ {tsquery}").bindparams(q=q)).order_by(
+            text(f"ts_rank_cd({TSVECTOR}, {tsquery}) DESC").bindparams(q=q)
+        )
+
+    # Other engines: unindexed fallback
+    pattern = f"%{q}%"
+    return query.filter(
+        Property.address.ilike(pattern) | Property.city.ilike(pattern) | Property.description.ilike(pattern)
+    )
+
+
+def init_search(app):
+    """Create the full-text index and its triggers; index existing rows once."""
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if dialect == "sqlite":
+            created = not inspect(db.engine).has_table(FTS_TABLE)
+            with db.engine.begin() as conn:
+                for statement in SQLITE_DDL:
+                    conn.execute(text(statement))
+                if created and conn.execute(text("SELECT 1 FROM properties LIMIT 1")).first():
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                    logger.info("Built full-text index over existing properties")
+        elif dialect == "postgresql":
+            with db.engine.begin() as conn:
+                for statement in POSTGRES_DDL:
+                    conn.execute(text(statement))
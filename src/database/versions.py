@@ -0,0 +1,73 @@
+"""Per-table write counters for cheap change detection.
+
+Session hooks bump ``table_versions`` in the same transaction as every
+ORM flush and every bulk insert/update/delete statement, so readers can
+tell whether a table changed with one primary-key lookup.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Set, Tuple
+
+from sqlalchemy import event, insert, update
+
+from src.app import db
+from src.database.models import TableVersion
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = TableVersion.__tablename__
+
+
+def bump_versions(connection, tables: Set[str]):
+    """Increment the counters of ``tables`` on ``connection``."""
+    tables = tables - {VERSION_TABLE}
+    if not tables:
+        return
+    connection.execute(
+        update(TableVersion.__table__)
+        .where(TableVersion.__table__.c.name.in_(tables))
+        .values(version=TableVersion.__table__.c.version + 1, updated_at=datetime.utcnow())
+    )
+
+
+def _after_flush(session, flush_context):
+    """Bump the tables of objects written in this flush."""
+    tables = {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if hasattr(obj, "__table__") and (obj in session.new or obj in session.deleted or session.is_modified(obj))
+    }
+    bump_versions(session.connection(), tables)
+
+
+def _do_orm_execute(state):
+    """Bump the table targeted by a bulk insert, update or delete."""
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    if table is not None and getattr(table, "name", None):
+        bump_versions(state.session.connection(), {table.name})
+
+
+def table_versions(tables: Iterable[str]) -> Dict[str, Tuple[int, datetime]]:
+    """Current (version, updated_at) of each table."""
+    rows = db.session.query(TableVersion.name, TableVersion.version, TableVersion.updated_at).filter(
+        TableVersion.name.in_(list(tables))
+    )
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def init_versions(app):
+    """Seed a counter row for every table and install the session hooks."""
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+        event.listen(db.session, "do_orm_execute", _do_orm_execute)
+
+    with app.app_context():
+        known = {name for (name,) in db.session.query(TableVersion.name)}
+        missing = [name for name in db.metadata.tables if name not in known]
+        if missing:
+            now = datetime.utcnow()
+            db.session.execute(insert(TableVersion), [{"name": n, "version": 0, "updated_at": now} for n in missing])
+            db.session.commit()
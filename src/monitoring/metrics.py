@@ -0,0 +1,234 @@
+"""Request, SQL and cache instrumentation exported in Prometheus text format."""
+
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+from flask import g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Default histogram buckets (seconds) for request and query latency
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets (bytes) for response payload sizes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Buckets for the number of SQL statements issued by one request
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        """Initialize counter."""
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0):
+        """Increment the counter for the given label values."""
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> str:
+        """Render counter in Prometheus exposition format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    """Cumulative bucket histogram keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        """Initialize histogram."""
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.values: Dict[Tuple, Dict] = {}
+
+    def observe(self, value: float, *label_values):
+        """Record a single observation."""
+        state = self.values.get(label_values)
+        if state is None:
+            state = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            self.values[label_values] = state
+        state["counts"][bisect_left(self.buckets, value)] += 1
+        state["sum"] += value
+        state["count"] += 1
+
+    def render(self) -> str:
+        """Render histogram in Prometheus exposition format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, state in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state["counts"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _labels(self.labels + ("le",), label_values + (le,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            base_labels = _labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{base_labels} {state['sum']}")
+            lines.append(f"{self.name}_count{base_labels} {state['count']}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics guarded by a single lock."""
+
+    def __init__(self):
+        """Initialize the standard application metrics."""
+        self._lock = threading.Lock()
+        self.request_latency = Histogram(
+            "http_request_duration_seconds", "Request latency by endpoint.", ("endpoint", "method")
+        )
+        self.requests = Counter(
+            "http_requests_total", "Requests by endpoint and status.", ("endpoint", "method", "status")
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes", "Response body size by endpoint.", ("endpoint",), SIZE_BUCKETS
+        )
+        self.request_sql = Histogram(
+            "http_request_sql_statements", "SQL statements issued per request.", ("endpoint",), COUNT_BUCKETS
+        )
+        self.sql_latency = Histogram(
+            "sql_statement_duration_seconds", "SQL statement latency by endpoint.", ("endpoint",)
+        )
+        self.cache = Counter("cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+        self._metrics = [
+            self.request_latency,
+            self.requests,
+            self.response_size,
+            self.request_sql,
+            self.sql_latency,
+            self.cache,
+        ]
+
+    def observe_request(self, endpoint: str, method: str, status: int, duration: float, size: int, statements: int):
+        """Record one completed request."""
+        with self._lock:
+            self.request_latency.observe(duration, endpoint, method)
+            self.requests.inc(endpoint, method, str(status))
+            self.response_size.observe(size, endpoint)
+            self.request_sql.observe(statements, endpoint)
+
+    def observe_sql(self, endpoint: str, duration: float):
+        """Record one executed SQL statement."""
+        with self._lock:
+            self.sql_latency.observe(duration, endpoint)
+
+    def record_cache(self, cache: str, hit: bool):
+        """Record a cache lookup outcome."""
+        with self._lock:
+            self.cache.inc(cache, "hit" if hit else "miss")
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus exposition format."""
+        with self._lock:
+            return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def record_cache(cache: str, hit: bool):
+    """Record a cache hit or miss against the process registry."""
+    REGISTRY.record_cache(cache, hit)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    """Format label pairs for exposition."""
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _current_endpoint() -> str:
+    """Return the endpoint name for the active request, if any."""
+    try:
+        return request.endpoint or "unmatched"
+    except RuntimeError:
+        return "background"
+
+
+def _register_sql_hooks(engine):
+    """Attach statement timing hooks to a SQLAlchemy engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        REGISTRY.observe_sql(_current_endpoint(), duration)
+        try:
+            g.sql_statements = g.get("sql_statements", 0) + 1
+        except RuntimeError:
+            pass
+
+
+def _profile_response(app, profiler, response):
+    """Replace a response with the cProfile breakdown of the request."""
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(app.config.get("PROFILING_SORT", "cumulative"))
+    stats.print_stats(app.config.get("PROFILING_LIMIT", 40))
+    profiled = app.response_class(stream.getvalue(), mimetype="text/plain")
+    profiled.headers["X-Profiled-Status"] = str(response.status_code)
+    return profiled
+
+
+def init_metrics(app, engine):
+    """Register request timing, SQL hooks, profiling and the /metrics endpoint."""
+    _register_sql_hooks(engine)
+
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+        g.sql_statements = 0
+        if app.config.get("PROFILING_ENABLED") and request.args.get("profile") == "1":
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def _record_request(response):
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            response = _profile_response(app, profiler, response)
+
+        start = g.pop("request_start", None)
+        if start is not None:
+            size = response.calculate_content_length()
+            REGISTRY.observe_request(
+                _current_endpoint(),
+                request.method,
+                response.status_code,
+                time.perf_counter() - start,
+                size or 0,
+                g.get("sql_statements", 0),
+            )
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        """Prometheus metrics endpoint."""
+        return app.response_class(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+    logger.info("Metrics instrumentation enabled")
@@ -1 +1,44 @@
-"""Scraper package initialization."""
+"""Scraper package initialization.
+
+Scrapers are registered by name and imported on first use, so web workers
+only load selenium, webdriver_manager, requests and bs4 when a scrape runs.
+"""
+
+import importlib
+from typing import Callable, Dict, List, Optional, Set
+
+# Scraper name -> "module:ClassName"
+SCRAPER_REGISTRY = {
+    "zillow": "src.scraper.scraper:ZillowScraper",
+    "demo": "src.scraper.scraper:DemoScraper",
+    "redfin": "src.scraper.scraper:RedffinScraper",
+}
+
+# Sources tried in order by scrape_all_sources
+DEFAULT_SOURCES = ["zillow", "demo"]
+
+
+def register_scraper(name: str, target: str):
+    """Register a scraper class by import path ("module:ClassName")."""
+    SCRAPER_REGISTRY[name] = target
+
+
+def load_scraper(name: str):
+    """Import and return the scraper class registered under ``name``."""
+    try:
+        module_name, class_name = SCRAPER_REGISTRY[name].split(":")
+    except KeyError:
+        raise ValueError(f"Unknown scraper: {name}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def scrape_all_sources(
+    location: str,
+    runs: Optional[List[Dict]] = None,
+    sources: Optional[List[str]] = None,
+    known_urls: Optional[Callable[[List[str]], Set[str]]] = None,
+) -> List[Dict]:
+    """Scrape listings from all configured sources, importing scrapers lazily."""
+    from src.scraper.scraper import scrape_all_sources as _scrape_all_sources
+
+    return _scrape_all_sources(location, runs=runs, sources=sources, known_urls=known_urls)
@@ -0,0 +1,106 @@
+"""Timing spans and counters for a single scrape run."""
+
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeRunRecorder:
+    """Collect per-phase durations, counters and errors for one scrape run."""
+
+    def __init__(self, source: str, location: str = ""):
+        """Initialize an empty run for a source and location."""
+        self.source = source
+        self.location = location
+        self.started_at = datetime.utcnow()
+        self.phases: Dict[str, Dict] = {}
+        self.counters: Dict[str, int] = {}
+        self.errors: List[str] = []
+        self.used_fallback = False
+        self.duration_ms = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase; repeated phases (e.g. per-card extraction) accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            span = self.phases.setdefault(name, {"ms": 0.0, "calls": 0})
+            span["ms"] += elapsed_ms
+            span["calls"] += 1
+            logger.debug(
+                "scrape span",
+                extra={"source": self.source, "phase": name, "elapsed_ms": round(elapsed_ms, 3)},
+            )
+
+    def count(self, name: str, amount: int = 1):
+        """Increment a run counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def error(self, message: str):
+        """Record an error raised during the run."""
+        self.errors.append(str(message))
+
+    def finish(self):
+        """Stop the run clock."""
+        if self.duration_ms is None:
+            self.duration_ms = (time.perf_counter() - self._start) * 1000
+        return self
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary."""
+        self.finish()
+        return {
+            "source": self.source,
+            "location": self.location,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "phases": {name: dict(span) for name, span in self.phases.items()},
+            "cards_found": self.counters.get("cards_found", 0),
+            "listings_count": self.counters.get("listings", 0),
+            "used_fallback": self.used_fallback,
+            "errors": list(self.errors),
+            "counters": dict(self.counters),
+        }
+
+
+def summarize_runs(runs: List[Dict], percentiles=(50, 90, 99)) -> Dict:
+    """Summarize run dictionaries into per-source duration percentiles."""
+    by_source: Dict[str, List[Dict]] = {}
+    for run in runs:
+        by_source.setdefault(run["source"], []).append(run)
+
+    summary = {}
+    for source, source_runs in by_source.items():
+        phase_samples: Dict[str, List[float]] = {}
+        for run in source_runs:
+            for name, span in (run.get("phases") or {}).items():
+                phase_samples.setdefault(name, []).append(span["ms"])
+
+        summary[source] = {
+            "runs": len(source_runs),
+            "fallback_rate": sum(1 for r in source_runs if r.get("used_fallback")) / len(source_runs),
+            "error_rate": sum(1 for r in source_runs if r.get("errors")) / len(source_runs),
+            "avg_cards_found": float(np.mean([r.get("cards_found") or 0 for r in source_runs])),
+            "avg_listings": float(np.mean([r.get("listings_count") or 0 for r in source_runs])),
+            "duration_ms": _percentiles([r.get("duration_ms") or 0.0 for r in source_runs], percentiles),
+            "phases_ms": {
+                name: _percentiles(samples, percentiles) for name, samples in sorted(phase_samples.items())
+            },
+        }
+    return summary
+
+
+def _percentiles(samples: List[float], percentiles) -> Dict[str, float]:
+    """Compute named percentiles over a list of samples."""
+    values = np.percentile(np.asarray(samples, dtype=float), percentiles)
+    return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
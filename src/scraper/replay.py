@@ -0,0 +1,323 @@
+"""Record/replay of rendered Zillow search pages.
+
+``ZillowScraper(record_dir=...)`` saves each rendered search page into a
+fixture archive (``manifest.json`` plus one HTML file per page). Replay
+feeds archived pages to the scraper's own parsing code through a fake
+WebDriver backed by BeautifulSoup, so ``_parse_listings_selenium``,
+``_extract_listing_selenium`` and ``_get_price_from_element`` can be
+benchmarked offline and checked against a golden corpus
+(``golden.json``: page id -> expected address, url and price per card).
+
+Usage:
+    python -m src.scraper.replay record "Austin, TX" --archive fixtures/zillow
+    python -m src.scraper.replay golden --archive fixtures/zillow
+    python -m src.scraper.replay replay --archive fixtures/zillow --rounds 20
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from src.scraper.instrumentation import ScrapeRunRecorder
+
+MANIFEST = "manifest.json"
+GOLDEN = "golden.json"
+GOLDEN_FIELDS = ("address", "url", "price")
+SCROLL_HEIGHT = 4000
+
+
+def _read_json(path: str, default):
+    """Load a JSON file, or ``default`` when it does not exist."""
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data):
+    """Write JSON atomically."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def save_page(archive_dir: str, url: str, html: str, location: str) -> Dict:
+    """Add one rendered page to the archive and return its manifest entry."""
+    os.makedirs(archive_dir, exist_ok=True)
+    manifest = _read_json(os.path.join(archive_dir, MANIFEST), {"pages": []})
+    slug = re.sub(r"[^a-z0-9]+", "-", location.lower()).strip("-") or "page"
+    page_id = f"{slug}-{len(manifest['pages']) + 1}"
+    filename = f"{page_id}.html.gz"
+    with gzip.open(os.path.join(archive_dir, filename), "wt", encoding="utf-8") as f:
+        f.write(html)
+
+    entry = {
+        "id": page_id,
+        "url": url,
+        "location": location,
+        "file": filename,
+        "captured_at": datetime.utcnow().isoformat(),
+    }
+    manifest["pages"].append(entry)
+    _write_json(os.path.join(archive_dir, MANIFEST), manifest)
+    return entry
+
+
+def load_archive(archive_dir: str) -> List[Dict]:
+    """Manifest entries with their HTML loaded."""
+    pages = []
+    for entry in _read_json(os.path.join(archive_dir, MANIFEST), {"pages": []})["pages"]:
+        path = os.path.join(archive_dir, entry["file"])
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            pages.append(dict(entry, html=f.read()))
+    return pages
+
+
+def _find_all(root, by: str, value: str):
+    """Resolve a Selenium locator against a BeautifulSoup node."""
+    if by == By.CSS_SELECTOR:
+        return root.select(value)
+    if by == By.TAG_NAME:
+        return root.find_all(value)
+    if by == By.CLASS_NAME:
+        return root.select(f".{value}")
+    if by == By.ID:
+        return root.select(f"#{value}")
+    if by == By.LINK_TEXT:
+        return [a for a in root.find_all("a") if a.get_text(strip=True) == value]
+    raise InvalidSelectorException(f"replay does not support {by} locators")
+
+
+class FakeElement:
+    """The parts of a Selenium WebElement the scraper uses."""
+
+    def __init__(self, node, base_url: str):
+        """Wrap a BeautifulSoup node."""
+        self._node = node
+        self._base_url = base_url
+
+    @property
+    def text(self) -> str:
+        """Visible text, one line per text block."""
+        return self._node.get_text("\n", strip=True)
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        """Attribute value; links resolve to absolute URLs as in a browser."""
+        value = self._node.get(name)
+        if isinstance(value, list):
+            value = " ".join(value)
+        if value is not None and name in ("href", "src"):
+            return urljoin(self._base_url, value)
+        return value
+
+    def find_elements(self, by: str = By.ID, value: str = None) -> List["FakeElement"]:
+        """All matching descendants."""
+        return [FakeElement(node, self._base_url) for node in _find_all(self._node, by, value)]
+
+    def find_element(self, by: str = By.ID, value: str = None) -> "FakeElement":
+        """First matching descendant."""
+        found = _find_all(self._node, by, value)
+        if not found:
+            raise NoSuchElementException(f"no element for {by}={value}")
+        return FakeElement(found[0], self._base_url)
+
+
+class _SwitchTo:
+    """``driver.switch_to`` for FakeDriver tabs."""
+
+    def __init__(self, driver: "FakeDriver"):
+        """Bind to a driver."""
+        self._driver = driver
+
+    def window(self, handle: str):
+        """Make a tab current."""
+        self._driver._activate(handle)
+
+
+class FakeDriver(FakeElement):
+    """WebDriver stand-in serving archived pages by URL, with tabs.
+
+    URLs missing from ``pages`` load an empty page, like a result page past
+    the last one.
+    """
+
+    def __init__(self, pages: Dict[str, str], url: Optional[str] = None):
+        """``pages`` maps URL to HTML; ``url`` is the page loaded first."""
+        self.pages = pages
+        self.switch_to = _SwitchTo(self)
+        self.opened: List[str] = []
+        self._tabs: Dict[str, str] = {}
+        self._activate(self._open(url or next(iter(pages))))
+
+    def _open(self, url: str) -> str:
+        """Add a tab showing ``url``."""
+        handle = f"tab-{len(self.opened)}"
+        self.opened.append(url)
+        self._tabs[handle] = url
+        return handle
+
+    def _activate(self, handle: str):
+        """Switch to a tab and parse its page."""
+        self.current_window_handle = handle
+        self.current_url = self._tabs[handle]
+        self.page_source = self.pages.get(self.current_url, "<html><body></body></html>")
+        super().__init__(BeautifulSoup(self.page_source, "html.parser"), self.current_url)
+
+    @property
+    def window_handles(self) -> List[str]:
+        """Open tabs in creation order."""
+        return list(self._tabs)
+
+    def get(self, url: str):
+        """Load an archived page in the current tab."""
+        self._tabs[self.current_window_handle] = url
+        self._activate(self.current_window_handle)
+
+    def close(self):
+        """Close the current tab."""
+        del self._tabs[self.current_window_handle]
+
+    def execute_script(self, script: str, *args):
+        """Scrolling scripts see a fixed page height; ``window.open`` adds a tab."""
+        if "window.open" in script:
+            self._open(args[0])
+            return None
+        return SCROLL_HEIGHT if "scrollHeight" in script else None
+
+    def execute(self, command: str, params: Optional[Dict] = None):
+        """Accept raw commands such as pointer actions."""
+        return {"value": None}
+
+    def execute_cdp_cmd(self, cmd: str, params: Dict):
+        """No-op."""
+        return {}
+
+    def quit(self):
+        """No-op."""
+
+
+def without_waits(scraper):
+    """Turn off a ZillowScraper's selector waits, scroll pauses and delays."""
+    scraper.wait_timeout = 0
+    scraper.wait_poll = 0.001
+    scraper.scroll_pause = (0.0, 0.0)
+    scraper.human_delay = (0.0, 0.0)
+    return scraper
+
+
+def replay_page(html: str, url: str, location: str, scraper=None) -> List[Dict]:
+    """Run the scraper's parsing path over one archived page."""
+    from src.scraper.scraper import ZillowScraper
+
+    scraper = without_waits(scraper or ZillowScraper())
+    scraper.record_dir = None
+    scraper.driver = FakeDriver({url: html}, url)
+    scraper.last_run = ScrapeRunRecorder(scraper.source_name, location)
+
+    parts = location.split(",")
+    city = parts[0].strip()
+    state = parts[1].strip() if len(parts) > 1 else ""
+    return scraper._parse_listings_selenium(city, state)
+
+
+def compare_to_golden(extracted: List[Dict], expected: List[Dict]) -> Dict:
+    """Per-field match counts between extracted and expected cards, by position."""
+    matched = {field: 0 for field in GOLDEN_FIELDS}
+    for got, want in zip(extracted, expected):
+        for field in GOLDEN_FIELDS:
+            matched[field] += got.get(field) == want.get(field)
+    exact = sum(
+        all(got.get(f) == want.get(f) for f in GOLDEN_FIELDS) for got, want in zip(extracted, expected)
+    )
+    return {"expected": len(expected), "extracted": len(extracted), "matched": matched, "exact": exact}
+
+
+def replay_archive(archive_dir: str, rounds: int = 1) -> Dict:
+    """Replay every archived page; report pages/sec and golden-corpus accuracy."""
+    pages = load_archive(archive_dir)
+    golden = _read_json(os.path.join(archive_dir, GOLDEN), {})
+
+    elapsed = 0.0
+    results = {}
+    for _ in range(rounds):
+        for page in pages:
+            start = time.perf_counter()
+            listings = replay_page(page["html"], page["url"], page["location"])
+            elapsed += time.perf_counter() - start
+            results[page["id"]] = listings
+
+    report = {
+        "pages": len(pages) * rounds,
+        "seconds": elapsed,
+        "pages_per_sec": len(pages) * rounds / elapsed if elapsed else None,
+        "listings": sum(len(listings) for listings in results.values()) * rounds,
+    }
+    if golden:
+        totals = {"expected": 0, "extracted": 0, "exact": 0, "matched": {f: 0 for f in GOLDEN_FIELDS}}
+        for page_id, expected in golden.items():
+            comparison = compare_to_golden(results.get(page_id, []), expected)
+            for key in ("expected", "extracted", "exact"):
+                totals[key] += comparison[key]
+            for field in GOLDEN_FIELDS:
+                totals["matched"][field] += comparison["matched"][field]
+        expected_total = totals["expected"] or 1
+        report["accuracy"] = {
+            "cards_expected": totals["expected"],
+            "cards_extracted": totals["extracted"],
+            "exact": totals["exact"] / expected_total,
+            "fields": {f: totals["matched"][f] / expected_total for f in GOLDEN_FIELDS},
+        }
+    return report
+
+
+def write_golden(archive_dir: str) -> Dict:
+    """Snapshot current extraction as the golden corpus (review before committing)."""
+    golden = {
+        page["id"]: [{f: listing.get(f) for f in GOLDEN_FIELDS} for listing in replay_page(page["html"], page["url"], page["location"])]
+        for page in load_archive(archive_dir)
+    }
+    _write_json(os.path.join(archive_dir, GOLDEN), golden)
+    return golden
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["record", "golden", "replay"])
+    parser.add_argument("location", nargs="?", help='"City, ST" to record')
+    parser.add_argument("--archive", required=True, help="fixture archive directory")
+    parser.add_argument("--rounds", type=int, default=1, help="replay passes over the archive")
+    parser.add_argument("--headed", action="store_true", help="record with a visible browser")
+    parser.add_argument("--max-pages", type=int, default=1, help="result pages to record")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        if not args.location:
+            parser.error("record needs a location")
+        from src.scraper.scraper import ZillowScraper
+
+        scraper = ZillowScraper(headless=not args.headed, record_dir=args.archive, max_pages=args.max_pages)
+        listings = scraper.scrape_listings(args.location)
+        print(f"Recorded {scraper.last_run.counters.get('pages', 0)} pages with {len(listings)} listings into {args.archive}")
+    elif args.command == "golden":
+        golden = write_golden(args.archive)
+        print(f"Wrote {sum(len(v) for v in golden.values())} golden cards for {len(golden)} pages")
+    else:
+        print(json.dumps(replay_archive(args.archive, args.rounds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
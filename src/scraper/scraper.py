@@ -7,7 +7,7 @@ import random
 import hashlib
 import re
 import time
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Set
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -16,6 +16,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from webdriver_manager.chrome import ChromeDriverManager
+from src.scraper.instrumentation import ScrapeRunRecorder
 
 logger = logging.getLogger(__name__)
 
@@ -41,9 +42,14 @@ PROPERTY_TYPES = ["house", "studio", "apartment", "townhouse", "condo"]
 class PropertyScraper:
     """Base class for property scraping."""
 
+    source_name = "base"
+
     def __init__(self, timeout=10):
         """Initialize scraper with timeout."""
         self.timeout = timeout
+        self.last_run = ScrapeRunRecorder(self.source_name)
+        # Optional callable returning the subset of the given URLs already stored
+        self.known_urls: Optional[Callable[[List[str]], Set[str]]] = None
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         }
@@ -66,6 +72,8 @@ class PropertyScraper:
 class DemoScraper(PropertyScraper):
     """Demo scraper with realistic sample data generation."""
 
+    source_name = "demo"
+
     def _generate_address(self, seed: int) -> str:
         """Generate a realistic street address."""
         random.seed(seed)
@@ -132,6 +140,7 @@ class DemoScraper(PropertyScraper):
     def scrape_listings(self, location: str) -> List[Dict]:
         """Generate demo property listings for any location."""
         logger.info(f"Generating demo listings for {location}")
+        self.last_run = ScrapeRunRecorder(self.source_name, location)
 
         # Parse location to extract city and potentially country/state
         parts = location.split(",")
@@ -145,11 +154,14 @@ class DemoScraper(PropertyScraper):
         num_listings = random.randint(5, 8)
         listings = []
         
-        for i in range(num_listings):
-            seed = location_seed + i * 1000
-            listing = self._generate_property(city, state_country, seed)
-            listings.append(listing)
+        with self.last_run.phase("generate"):
+            for i in range(num_listings):
+                seed = location_seed + i * 1000
+                listing = self._generate_property(city, state_country, seed)
+                listings.append(listing)
         
+        self.last_run.count("listings", len(listings))
+        self.last_run.finish()
         return listings
 
     def _get_property_images(self) -> List[str]:
@@ -168,15 +180,37 @@ class DemoScraper(PropertyScraper):
 class ZillowScraper(PropertyScraper):
     """Real scraper for Zillow using Selenium with stealth anti-bot bypass."""
 
-    def __init__(self, timeout=10, headless=True):
-        """Initialize scraper with Selenium."""
+    source_name = "zillow"
+
+    # Crawl limits: result pages, listings, and pages loading at once in tabs
+    MAX_PAGES = 5
+    MAX_LISTINGS = 200
+    PARALLEL_TABS = 3
+
+    def __init__(self, timeout=10, headless=True, record_dir=None, max_pages=None, max_listings=None, tabs=None):
+        """Initialize scraper with Selenium.
+
+        With ``record_dir`` set, each rendered search page is saved to that
+        fixture archive for offline replay (see ``src.scraper.replay``).
+        ``max_pages``, ``max_listings`` and ``tabs`` override the crawl limits.
+        """
         super().__init__(timeout)
         self.headless = headless
+        self.record_dir = record_dir
         self.driver = None
+        self.max_pages = max_pages or self.MAX_PAGES
+        self.max_listings = max_listings or self.MAX_LISTINGS
+        self.tabs = tabs or self.PARALLEL_TABS
+        # Selector waits, scroll pauses and the first-page delay; replay sets these to zero
+        self.wait_timeout = 15
+        self.wait_poll = 0.5
+        self.scroll_pause = (1.0, 3.0)
+        self.human_delay = (2.0, 5.0)
 
     def scrape_listings(self, location: str) -> List[Dict]:
         """Scrape real property listings from Zillow using Selenium."""
         logger.info(f"Scraping real Zillow listings for {location}")
+        run = self.last_run = ScrapeRunRecorder(self.source_name, location)
         try:
             parts = location.split(",")
             city = parts[0].strip()
@@ -186,34 +220,37 @@ class ZillowScraper(PropertyScraper):
             self.driver = self._get_driver()
             
             # Inject stealth JS to hide automation
-            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-                "source": """
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => false,
-                    });
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5],
-                    });
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['en-US', 'en'],
-                    });
-                """
-            })
+            with run.phase("stealth"):
+                self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                    "source": """
+                        Object.defineProperty(navigator, 'webdriver', {
+                            get: () => false,
+                        });
+                        Object.defineProperty(navigator, 'plugins', {
+                            get: () => [1, 2, 3, 4, 5],
+                        });
+                        Object.defineProperty(navigator, 'languages', {
+                            get: () => ['en-US', 'en'],
+                        });
+                    """
+                })
             
             # Build and navigate to Zillow URL
             url = self._build_zillow_url(city, state)
             logger.info(f"Navigating to: {url}")
-            self.driver.get(url)
+            with run.phase("navigate"):
+                self.driver.get(url)
             
-            # Random delay to mimic human behavior
-            time.sleep(random.uniform(2, 5))
-            
-            # Move mouse randomly
-            actions = ActionChains(self.driver)
-            actions.move_by_offset(random.randint(0, 100), random.randint(0, 100)).perform()
+            with run.phase("human_delay"):
+                # Random delay to mimic human behavior
+                time.sleep(random.uniform(*self.human_delay))
+                
+                # Move mouse randomly
+                actions = ActionChains(self.driver)
+                actions.move_by_offset(random.randint(0, 100), random.randint(0, 100)).perform()
             
-            # Parse listings
-            listings = self._parse_listings_selenium(city, state)
+            # Parse the first page, then later result pages in parallel tabs
+            listings = self._crawl_pages(city, state)
             
             if listings:
                 logger.info(f"✓ Found {len(listings)} real listings from Zillow")
@@ -224,16 +261,19 @@ class ZillowScraper(PropertyScraper):
                 
         except Exception as e:
             logger.error(f"Error scraping Zillow: {e}, using demo data")
+            run.error(e)
             parts = location.split(",")
             city = parts[0].strip()
             state = parts[1].strip() if len(parts) > 1 else ""
             return self._get_demo_fallback(city, state)
         finally:
             if self.driver:
-                try:
-                    self.driver.quit()
-                except:
-                    pass
+                with run.phase("driver_quit"):
+                    try:
+                        self.driver.quit()
+                    except:
+                        pass
+            run.finish()
 
     def _get_driver(self):
         """Create and return a Selenium WebDriver with Brave and stealth options."""
@@ -266,52 +306,123 @@ class ZillowScraper(PropertyScraper):
         options.add_experimental_option("useAutomationExtension", False)
         
         try:
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
+            with self.last_run.phase("driver_install"):
+                service = Service(ChromeDriverManager().install())
+            with self.last_run.phase("driver_start"):
+                driver = webdriver.Chrome(service=service, options=options)
             logger.info("✓ WebDriver initialized with Brave")
             
             # Inject stealth scripts
-            driver.execute_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => false,
-                });
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3, 4, 5],
-                });
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['en-US', 'en'],
-                });
-            """)
+            with self.last_run.phase("stealth"):
+                driver.execute_script("""
+                    Object.defineProperty(navigator, 'webdriver', {
+                        get: () => false,
+                    });
+                    Object.defineProperty(navigator, 'plugins', {
+                        get: () => [1, 2, 3, 4, 5],
+                    });
+                    Object.defineProperty(navigator, 'languages', {
+                        get: () => ['en-US', 'en'],
+                    });
+                """)
             
             return driver
         except Exception as e:
+            # Recorded once, by the caller that handles the failure
             logger.error(f"Error initializing WebDriver: {e}")
             raise
 
-    def _build_zillow_url(self, city: str, state: str) -> str:
-        """Build Zillow search URL for a city/state."""
+    def _build_zillow_url(self, city: str, state: str, page: int = 1) -> str:
+        """Build Zillow search URL for a city/state and result page."""
         city_slug = city.lower().replace(" ", "-")
         state_slug = state.lower().replace(" ", "-")
+        page_slug = f"{page}_p/" if page > 1 else ""
         # Use sort by date (newest first) to prioritize recent listings
-        return f"https://www.zillow.com/homes/for_sale/{city_slug}-{state_slug}/?sort=days&status=ForSale"
+        return f"https://www.zillow.com/homes/for_sale/{city_slug}-{state_slug}/{page_slug}?sort=days&status=ForSale"
+
+    def _crawl_pages(self, city: str, state: str) -> List[Dict]:
+        """Parse the open first page, then later pages in batches of tabs.
+
+        Results are sorted newest first, so the crawl stops at the first page
+        with no unseen listing or with only already-stored listings
+        (``known_urls``), and at ``max_pages`` or ``max_listings``.
+        """
+        run = self.last_run
+        listings: List[Dict] = []
+        seen: Set[str] = set()
+        run.count("pages")
+        if not self._take_page(self._parse_listings_selenium(city, state), listings, seen):
+            return listings[:self.max_listings]
+
+        main = self.driver.current_window_handle
+        page = 2
+        while page <= self.max_pages and len(listings) < self.max_listings:
+            batch = list(range(page, min(page + self.tabs, self.max_pages + 1)))
+            handles = self._open_tabs([self._build_zillow_url(city, state, number) for number in batch])
+            more = True
+            try:
+                for handle in handles:
+                    if not more or len(listings) >= self.max_listings:
+                        break
+                    self.driver.switch_to.window(handle)
+                    run.count("pages")
+                    more = self._take_page(self._parse_listings_selenium(city, state), listings, seen)
+            finally:
+                for handle in handles:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                self.driver.switch_to.window(main)
+            if not more:
+                break
+            page += len(batch)
+        return listings[:self.max_listings]
+
+    def _open_tabs(self, urls: List[str]) -> List[str]:
+        """Start loading each URL in a new tab; returns the tab handles in order."""
+        before = set(self.driver.window_handles)
+        with self.last_run.phase("open_tabs"):
+            for url in urls:
+                self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+        return [handle for handle in self.driver.window_handles if handle not in before]
+
+    def _take_page(self, page_listings: List[Dict], listings: List[Dict], seen: Set[str]) -> bool:
+        """Add a page's unseen listings; False when the crawl should stop."""
+        fresh = [listing for listing in page_listings if listing["url"] not in seen]
+        seen.update(listing["url"] for listing in fresh)
+        listings.extend(fresh)
+        if not fresh:
+            return False
+        if self.known_urls is not None:
+            known = self.known_urls([listing["url"] for listing in fresh])
+            self.last_run.count("known_listings", len(known))
+            if len(known) == len(fresh):
+                return False
+        return True
 
     def _parse_listings_selenium(self, city: str, state: str) -> List[Dict]:
         """Parse listings using Selenium with improved selectors."""
         listings = []
+        run = self.last_run
         
         try:
             # Wait for page to fully load and scroll to trigger lazy loading
-            wait = WebDriverWait(self.driver, 15)
+            wait = WebDriverWait(self.driver, self.wait_timeout, poll_frequency=self.wait_poll)
             
             # Scroll down to load more listings
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
-            for _ in range(3):
-                self.driver.execute_script("window.scrollBy(0, window.innerHeight);")
-                time.sleep(random.uniform(1, 3))
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
-                    break
-                last_height = new_height
+            with run.phase("scroll"):
+                last_height = self.driver.execute_script("return document.body.scrollHeight")
+                for _ in range(3):
+                    self.driver.execute_script("window.scrollBy(0, window.innerHeight);")
+                    time.sleep(random.uniform(*self.scroll_pause))
+                    new_height = self.driver.execute_script("return document.body.scrollHeight")
+                    if new_height == last_height:
+                        break
+                    last_height = new_height
+            
+            if self.record_dir:
+                from src.scraper.replay import save_page
+
+                save_page(self.record_dir, self.driver.current_url, self.driver.page_source, f"{city}, {state}")
             
             # Try multiple selectors for Zillow listings (Zillow changes their HTML structure)
             selectors = [
@@ -325,32 +436,43 @@ class ZillowScraper(PropertyScraper):
             ]
             
             cards = []
-            for selector in selectors:
-                try:
-                    cards = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector)))
-                    if len(cards) > 2:
-                        logger.info(f"✓ Found {len(cards)} listings with selector: {selector}")
-                        break
-                except:
-                    continue
+            with run.phase("selector_probe"):
+                for selector in selectors:
+                    run.count("selectors_tried")
+                    try:
+                        cards = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector)))
+                        if len(cards) > 2:
+                            logger.info(f"✓ Found {len(cards)} listings with selector: {selector}")
+                            break
+                    except:
+                        continue
+            run.count("cards_found", len(cards))
             
             # Extract data from each listing card
-            for i, card in enumerate(cards[:20]):  # Limit to 20 listings
+            for i, card in enumerate(cards):
                 try:
                     listing = self._extract_listing_selenium(card, city, state)
                     if listing:
                         listings.append(listing)
                 except Exception as e:
                     logger.debug(f"Error extracting listing {i}: {e}")
+                    run.count("extract_errors")
                     continue
             
+            run.count("listings", len(listings))
             return listings
         except Exception as e:
             logger.error(f"Error parsing listings with Selenium: {e}")
+            run.error(e)
             return []
 
     def _extract_listing_selenium(self, element, city: str, state: str) -> Dict:
         """Extract listing data from a Selenium element."""
+        with self.last_run.phase("extract"):
+            return self._extract_listing_fields(element, city, state)
+
+    def _extract_listing_fields(self, element, city: str, state: str) -> Dict:
+        """Read address, URL and price fields from a listing card."""
         try:
             # Get address and URL
             address = ""
@@ -410,11 +532,14 @@ class ZillowScraper(PropertyScraper):
     def _get_demo_fallback(self, city: str, state: str) -> List[Dict]:
         """Generate demo listings as fallback."""
         logger.info(f"Using demo data for {city}, {state}")
+        self.last_run.used_fallback = True
         demo = DemoScraper()
         location = f"{city}, {state}" if state else city
-        listings = demo.scrape_listings(location)
+        with self.last_run.phase("fallback"):
+            listings = demo.scrape_listings(location)
         for listing in listings:
             listing["source"] = "demo (zillow unavailable)"
+        self.last_run.count("fallback_listings", len(listings))
         return listings
 
     def _get_property_images(self) -> List[str]:
@@ -440,23 +565,39 @@ class RedffinScraper(PropertyScraper):
         return []
 
 
-def scrape_all_sources(location: str) -> List[Dict]:
-    """Scrape listings from all configured sources."""
+def scrape_all_sources(
+    location: str,
+    runs: Optional[List[Dict]] = None,
+    sources: Optional[List[str]] = None,
+    known_urls: Optional[Callable[[List[str]], Set[str]]] = None,
+) -> List[Dict]:
+    """Scrape listings from all configured sources.
+
+    When ``runs`` is given, each scraper's run record is appended to it.
+    ``known_urls`` lets crawling scrapers stop once they reach stored listings.
+    """
+    from src.scraper import DEFAULT_SOURCES, load_scraper
+
     all_listings = []
 
-    scrapers = [
-        ZillowScraper(),  # Real estate scraper (primary)
-        DemoScraper(),    # Fallback demo data
-    ]
+    # Zillow is the primary source, demo data the fallback
+    scrapers = [load_scraper(name)() for name in (sources or DEFAULT_SOURCES)]
 
     for scraper in scrapers:
+        scraper.known_urls = known_urls
         try:
             listings = scraper.scrape_listings(location)
             if listings:
                 all_listings.extend(listings)
-                if len(all_listings) >= 3:
-                    break
         except Exception as e:
             logger.error(f"Error with {scraper.__class__.__name__}: {e}")
+            scraper.last_run.error(e)
+        finally:
+            if runs is not None:
+                run = scraper.last_run.to_dict()
+                run["location"] = location
+                runs.append(run)
+        if len(all_listings) >= 3:
+            break
 
     return all_listings
@@ -0,0 +1,166 @@
+"""Compact Plotly figure specs built from pre-aggregated data.
+
+Specs are plain ``{"data": [...], "layout": {...}}`` dictionaries that
+Plotly.js renders directly, so building them needs NumPy but not Plotly.
+Rendered specs are cached per app as JSON keyed by a hash of their input
+data.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from src.monitoring.metrics import record_cache
+
+DEFAULT_BINS = 50
+MAX_BINS = 500
+DEFAULT_MAX_POINTS = 500
+CACHE_SIZE = 256
+
+
+def histogram_spec(prices: Sequence[float], bins: int = DEFAULT_BINS, title: str = "Property Price Distribution") -> Dict:
+    """Bar chart of server-side ``numpy.histogram`` bins."""
+    prices = np.asarray(prices, dtype=float)
+    prices = prices[np.isfinite(prices)]
+    counts, edges = np.histogram(prices, bins=bins) if len(prices) else (np.empty(0), np.empty(1))
+    return {
+        "data": [
+            {
+                "type": "bar",
+                "x": ((edges[:-1] + edges[1:]) / 2).round(2).tolist(),
+                "y": counts.astype(int).tolist(),
+                "width": np.diff(edges).round(2).tolist(),
+                "name": "Listings",
+            }
+        ],
+        "layout": {
+            "title": {"text": title},
+            "xaxis": {"title": {"text": "Price ($)"}},
+            "yaxis": {"title": {"text": "Number of Properties"}},
+            "bargap": 0,
+        },
+    }
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def trend_spec(series: Dict[str, Dict], max_points: int = DEFAULT_MAX_POINTS) -> Dict:
+    """Line chart of ``price_trend`` series, each downsampled with LTTB."""
+    data = []
+    for name, values in series.items():
+        points = [p for p in values["points"] if p["avg_price"] is not None]
+        if not points:
+            continue
+        x = np.array([np.datetime64(p["period"], "D").astype(np.int64) for p in points])
+        y = np.array([p["avg_price"] for p in points], dtype=float)
+        keep = lttb(x, y, max_points)
+        data.append(
+            {
+                "type": "scatter",
+                "mode": "lines",
+                "name": name,
+                "x": [points[i]["period"] for i in keep],
+                "y": y[keep].round(2).tolist(),
+            }
+        )
+    return {
+        "data": data,
+        "layout": {
+            "title": {"text": "Price Trends Over Time"},
+            "xaxis": {"title": {"text": "Date"}, "type": "date"},
+            "yaxis": {"title": {"text": "Average Price ($)"}},
+        },
+    }
+
+
+def group_bar_spec(groups: List[Dict], title: str, axis_title: str) -> Dict:
+    """Average price bars (and listing counts on a second axis) per group."""
+    names = [g["name"] for g in groups]
+    return {
+        "data": [
+            {"type": "bar", "name": "Average Price", "x": names, "y": [g["avg_price"] for g in groups]},
+            {"type": "bar", "name": "Listings", "x": names, "y": [g["count"] for g in groups], "yaxis": "y2"},
+        ],
+        "layout": {
+            "title": {"text": title},
+            "xaxis": {"title": {"text": axis_title}},
+            "yaxis": {"title": {"text": "Average Price ($)"}},
+            "yaxis2": {"title": {"text": "Number of Listings"}, "overlaying": "y", "side": "right"},
+        },
+    }
+
+
+def data_key(name: str, *parts) -> str:
+    """Hash of a chart name and its input data (arrays hashed by content)."""
+    digest = hashlib.blake2b(name.encode(), digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(str(part.dtype).encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class SpecCache:
+    """LRU cache of serialized specs keyed by ``data_key``."""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        """Initialize an empty cache."""
+        self.size = size
+        self._specs: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: str, build: Callable[[], Dict]) -> str:
+        """Return the cached JSON for ``key``, building and storing it on a miss."""
+        with self._lock:
+            cached = self._specs.get(key)
+            if cached is not None:
+                self._specs.move_to_end(key)
+        record_cache("chart_specs", cached is not None)
+        if cached is not None:
+            return cached
+
+        rendered = json.dumps(build(), separators=(",", ":"))
+        with self._lock:
+            self._specs[key] = rendered
+            while len(self._specs) > self.size:
+                self._specs.popitem(last=False)
+        return rendered
+
+
+def get_spec_cache(app) -> SpecCache:
+    """Return the app's spec cache."""
+    return app.extensions["chart_specs"]
+
+
+def init_spec_cache(app):
+    """Give the app its own spec cache so apps never share rendered data."""
+    app.extensions["chart_specs"] = SpecCache()
@@ -0,0 +1,59 @@
+"""Shared test fixtures."""
+
+import numpy as np
+import pytest
+from src.app import create_app, db
+
+# Cities (and states) that generated listings alternate between
+CITIES = (("Austin", "TX"), ("Denver", "CO"))
+
+
+@pytest.fixture
+def app():
+    """Create and configure a test app."""
+    app = create_app("testing")
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Test client."""
+    return app.test_client()
+
+
+@pytest.fixture
+def make_listings():
+    """Factory for listing dicts to pass to ``ingest_listings``.
+
+    Rows alternate between Austin and Denver. Each keyword column is a
+    constant, a per-row list or array, or a function of the row index.
+    """
+
+    def make(n, prefix="a", **columns):
+        listings = []
+        for i in range(n):
+            city, state = CITIES[i % len(CITIES)]
+            listing = {
+                "url": f"https://example.com/{prefix}-{i}",
+                "address": f"{i} Main St",
+                "city": city,
+                "state": state,
+                "price": 400000.0 + i * 1000,
+            }
+            for name, value in columns.items():
+                if callable(value):
+                    value = value(i)
+                elif isinstance(value, np.ndarray):
+                    value = value[i].item()
+                elif isinstance(value, (list, tuple)):
+                    value = value[i]
+                listing[name] = value
+            listings.append(listing)
+        return listings
+
+    return make
@@ -0,0 +1,125 @@
+"""Test mergeable aggregates against exact pandas results."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import insert
+
+from src.analysis.aggregates import GroupedAggregates, MomentState, PriceAggregate, TDigest
+from src.analysis.analyzer import MarketAnalyzer
+from src.app import create_app, db
+from src.database.models import Property
+
+
+def _prices(n=20000, seed=0):
+    """Lognormal prices centred near $440k."""
+    return np.random.default_rng(seed).lognormal(13, 0.4, n)
+
+
+def test_moments_merge_matches_pandas():
+    """Merging chunk states gives the same mean and std as one pass."""
+    prices = _prices()
+    left, right = MomentState(), MomentState()
+    left.update(prices[:7000])
+    right.update(prices[7000:])
+    left.merge(right)
+
+    assert left.count == len(prices)
+    assert left.mean == pytest.approx(pd.Series(prices).mean())
+    assert left.std == pytest.approx(pd.Series(prices).std())
+
+
+@pytest.mark.parametrize("q", [0.1, 0.25, 0.5, 0.75, 0.9])
+def test_tdigest_quantiles_close_to_exact(q):
+    """Quantile estimates stay within half a percentile rank of exact."""
+    prices = _prices()
+    digest = TDigest()
+    for chunk in np.array_split(prices, 13):
+        digest.update(chunk)
+
+    estimate = digest.quantile(q)
+    rank = (prices <= estimate).mean()
+    assert abs(rank - q) < 0.005
+
+
+def test_tdigest_merge_and_roundtrip():
+    """Merged and serialized digests keep their estimates."""
+    prices = _prices()
+    parts = [TDigest() for _ in range(4)]
+    for part, chunk in zip(parts, np.array_split(prices, 4)):
+        part.update(chunk)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    restored = TDigest.from_dict(merged.to_dict())
+    assert len(restored) == len(prices)
+    assert restored.quantile(0.5) == pytest.approx(np.median(prices), rel=0.01)
+    assert restored.quantile(0.0) == prices.min()
+    assert restored.quantile(1.0) == prices.max()
+
+
+def test_grouped_report_matches_analyzer():
+    """Grouped state agrees with MarketAnalyzer.analyze_by_location."""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(
+        {"city": rng.choice(["Austin", "Denver", "Boston"], 6000), "price": _prices(6000)}
+    )
+    exact = MarketAnalyzer(df).analyze_by_location()
+
+    grouped = GroupedAggregates(("city",))
+    for chunk in np.array_split(df, 5):
+        grouped.update_frame(chunk)
+    report = grouped.report()
+
+    for city, stats in exact.items():
+        assert report[city]["count"] == stats["count"]
+        assert report[city]["avg_price"] == pytest.approx(stats["avg_price"])
+        assert report[city]["median_price"] == pytest.approx(stats["median_price"], rel=0.01)
+
+
+def test_table_report_streaming_and_parallel(tmp_path, monkeypatch):
+    """Chunked streaming and a process pool give the same report."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'agg.db'}")
+    app = create_app("development")
+    prices = _prices(3000)
+    with app.app_context():
+        db.session.execute(
+            insert(Property),
+            [
+                {
+                    "url": f"https://example.com/{i}",
+                    "address": f"{i} Main St",
+                    "city": ["Austin", "Denver"][i % 2],
+                    "state": ["TX", "CO"][i % 2],
+                    "price": float(price),
+                }
+                for i, price in enumerate(prices)
+            ],
+        )
+        db.session.commit()
+
+        streamed = MarketAnalyzer.table_report(db.session, by=("state",))
+        parallel = MarketAnalyzer.table_report(
+            database_uri=app.config["SQLALCHEMY_DATABASE_URI"], by=("state",), workers=3
+        )
+        uri_only = MarketAnalyzer.table_report(database_uri=app.config["SQLALCHEMY_DATABASE_URI"], by=("state",))
+        db.engine.dispose()
+
+    assert streamed["TX"]["count"] == parallel["TX"]["count"] == uri_only["TX"]["count"] == 1500
+    assert parallel["CO"]["avg_price"] == pytest.approx(prices[1::2].mean())
+    assert parallel["TX"]["median_price"] == pytest.approx(np.median(prices[::2]), rel=0.01)
+
+
+def test_table_report_needs_a_source():
+    """Without a session or a URI there is nothing to report on."""
+    with pytest.raises(ValueError):
+        MarketAnalyzer.table_report(by=("state",))
+
+
+def test_price_aggregate_roundtrip():
+    """Aggregates survive serialization."""
+    aggregate = PriceAggregate()
+    aggregate.update(_prices(500))
+    restored = PriceAggregate.from_dict(aggregate.to_dict())
+    assert restored.summary() == aggregate.summary()
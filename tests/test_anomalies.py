@@ -0,0 +1,57 @@
+"""Test grouped robust anomaly detection."""
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.analyzer import MarketAnalyzer
+from src.database.ingest import ingest_listings
+from src.database.models import AnomalyBaseline
+
+
+def _market(n=200, seed=0):
+    """San Francisco houses cost ~4x Austin houses per square foot."""
+    rng = np.random.default_rng(seed)
+    sf = np.arange(n) % 2 == 0
+    ppsf = np.where(sf, 1200, 300) * rng.normal(1, 0.05, n)
+    sqft = rng.integers(1200, 2500, n)
+    return {
+        "city": np.where(sf, "San Francisco", "Austin"),
+        "state": np.where(sf, "CA", "TX"),
+        "property_type": "house",
+        "square_feet": sqft,
+        "price": np.round(ppsf * sqft, -2),
+    }
+
+
+def test_grouped_detector_flags_local_outliers_only(make_listings):
+    """Expensive cities are not outliers; a local overprice is."""
+    df = pd.DataFrame(make_listings(200, **_market()))
+    df["id"] = range(1, len(df) + 1)
+    df.loc[df.index[1], "price"] = df.loc[df.index[1], "square_feet"] * 900  # Austin house at 3x
+
+    anomalies = MarketAnalyzer(df).find_price_anomalies()
+    ids = [a["id"] for a in anomalies]
+
+    assert ids[0] == 2
+    assert anomalies[0]["score"] > 3.5
+    flagged_cities = set(df[df["id"].isin(ids)]["city"])
+    assert flagged_cities == {"Austin"}
+
+
+def test_new_rows_scored_against_cached_baseline(client, app, make_listings):
+    """Small ingests reuse the cached baseline and show up in the endpoint."""
+    ingest_listings(make_listings(200, **_market()))
+    baseline = AnomalyBaseline.query.filter_by(city="Austin", property_type="house").first()
+    fitted_at = baseline.fitted_at
+
+    (outlier,) = make_listings(1, prefix="b", property_type="house", square_feet=2000, price=1800000)
+    saved = ingest_listings([outlier])
+
+    baseline = AnomalyBaseline.query.filter_by(city="Austin", property_type="house").first()
+    assert baseline.fitted_at == fitted_at
+    assert baseline.pending == 1
+
+    data = client.get("/api/market/anomalies?city=Austin&per_page=5").json
+    assert data["total"] >= 1
+    assert data["anomalies"][0]["id"] == saved["property_ids"][0]
+    assert set(data["anomalies"][0]) == {"id", "score", "price_per_sqft"}
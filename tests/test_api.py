@@ -2,7 +2,7 @@
 
 import pytest
 from src.app import create_app, db
-from src.database.models import Property
+from src.database.models import PriceSketch, Property, PropertyLocation
 
 
 @pytest.fixture
@@ -57,6 +57,23 @@ def test_create_property(client, app):
     assert response.json["address"] == "123 Main St"
 
 
+def test_failing_ingest_hook_does_not_break_later_hooks(client, app):
+    """A hook whose flush fails is rolled back; the listing and other hooks still land."""
+
+    def broken_hook(property_ids):
+        db.session.add(Property(url=None, address="x", city="x", state="x", price=1))
+        db.session.flush()
+
+    app.extensions["ingest_hooks"].insert(0, broken_hook)
+    data = {"url": "http://example.com/p1", "address": "1 Main St", "city": "Austin", "state": "TX", "price": 400000}
+    response = client.post("/api/properties", json=data)
+    assert response.status_code == 201
+
+    property_id = response.json["id"]
+    assert db.session.get(PropertyLocation, property_id) is not None
+    assert PriceSketch.query.filter_by(city="Austin").count() == 1
+
+
 def test_market_summary(client, app):
     """Test market summary endpoint."""
     # Create a test property
@@ -0,0 +1,150 @@
+"""Test the bulk property import endpoint."""
+
+import json
+
+from src.database.bulk import READ_SIZE
+from src.database.models import PriceHistory, Property
+
+
+def _row(i, **fields):
+    row = {
+        "url": f"https://partner.com/{i}",
+        "address": f"{i} Main St",
+        "city": "Austin",
+        "state": "TX",
+        "price": 300000 + i,
+    }
+    row.update(fields)
+    return row
+
+
+def test_bulk_json_array_reports_row_errors(client):
+    """Valid rows are inserted in batches; bad rows are reported by number."""
+    rows = [_row(i) for i in range(25)]
+    rows[3] = _row(3, price="cheap")
+    rows[7].pop("city")
+    rows[9] = _row(0)  # duplicate url
+
+    response = client.post("/api/properties/bulk?batch_size=10", data=json.dumps(rows), content_type="application/json")
+    assert response.status_code == 200
+    result = json.loads(response.data)
+
+    assert result["received"] == 25
+    assert result["inserted"] == 22
+    assert result["error_count"] == 3
+    assert [e["row"] for e in result["errors"]] == [4, 8, 10]
+    assert result["errors"][1]["error"] == "missing city"
+    assert Property.query.count() == 22
+
+
+def test_bulk_ndjson_and_csv_upsert(client):
+    """NDJSON inserts; a CSV re-upload with upsert updates prices and records history."""
+    ndjson = "\n".join(json.dumps(_row(i)) for i in range(3)) + "\n{not json}\n"
+    result = json.loads(client.post("/api/properties/bulk", data=ndjson, content_type="application/x-ndjson").data)
+    assert result["inserted"] == 3
+    assert result["errors"][0]["row"] == 4
+
+    csv_body = "url,address,city,state,price,bedrooms\n" "https://partner.com/1,1 Main St,Austin,TX,250000,3\n" "https://partner.com/9,9 Main St,Austin,TX,410000,\n"
+    response = client.post("/api/properties/bulk?upsert=true", data=csv_body, content_type="text/csv")
+    result = json.loads(response.data)
+    assert (result["inserted"], result["updated"]) == (1, 1)
+
+    updated = Property.query.filter_by(url="https://partner.com/1").one()
+    assert (updated.price, updated.bedrooms) == (250000, 3)
+    assert [h.price for h in PriceHistory.query.filter_by(property_id=updated.id)] == [250000]
+
+    skipped = json.loads(client.post("/api/properties/bulk", data=csv_body, content_type="text/csv").data)
+    assert (skipped["inserted"], skipped["skipped"]) == (0, 2)
+
+
+def test_bulk_rejects_unparseable_uploads(client):
+    """Unknown content types and broken JSON stop the import."""
+    assert client.post("/api/properties/bulk", data="x", content_type="text/plain").status_code == 415
+
+    body = "[" + json.dumps(_row(1)) + ", {broken"
+    response = client.post("/api/properties/bulk", data=body, content_type="application/json")
+    result = json.loads(response.data)
+    assert response.status_code == 200
+    assert result["inserted"] == 1
+    assert result["aborted"] is True
+
+
+def test_bulk_aborts_on_invalid_utf8_and_csv(client):
+    """Undecodable NDJSON and malformed CSV end the import as aborted, keeping earlier rows."""
+    # Enough rows that text before the bad byte is decoded in earlier chunks
+    body = "".join(json.dumps(_row(i)) + "\n" for i in range(200)).encode() + b'{"a": "\xff"}\n'
+    response = client.post("/api/properties/bulk?batch_size=10", data=body, content_type="application/x-ndjson")
+    result = json.loads(response.data)
+    assert response.status_code == 200
+    assert result["inserted"] > 0 and result["aborted"] is True
+    assert result["errors"][-1]["row"] == result["received"] + 1
+    assert "UTF-8" in result["errors"][-1]["error"]
+
+    csv_body = "url,address,city,state,price\n" + "x" * 200000 + ",a,b,c,1\n"
+    response = client.post("/api/properties/bulk", data=csv_body, content_type="text/csv")
+    result = json.loads(response.data)
+    assert response.status_code == 400
+    assert result["aborted"] is True
+    assert "invalid CSV" in result["errors"][-1]["error"]
+
+
+def test_bulk_json_multibyte_character_across_read_chunks(client):
+    """A character split between two stream reads decodes intact."""
+    def payload(pad):
+        return json.dumps([_row(0, description="x" * pad + "é"), _row(1)], ensure_ascii=False).encode("utf-8")
+
+    pad = READ_SIZE - 1 - payload(0).index("é".encode("utf-8"))
+    data = payload(pad)
+    assert data[READ_SIZE - 1:READ_SIZE + 1] == "é".encode("utf-8")
+
+    response = client.post("/api/properties/bulk", data=data, content_type="application/json")
+    assert response.status_code == 200
+    assert json.loads(response.data)["inserted"] == 2
+    assert Property.query.filter_by(url=_row(0)["url"]).one().description.endswith("xé")
+
+
+def test_bulk_upsert_writes_and_logs_only_changes(client):
+    """Unchanged rows are skipped; changed rows log only the columns that differ."""
+    from src.database.models import ChangeLog
+
+    rows = [_row(i, bedrooms=3) for i in range(4)]
+    client.post("/api/properties/bulk", data=json.dumps(rows), content_type="application/json")
+    before = ChangeLog.query.count()
+
+    rows[1]["price"] = 123456
+    rows[2]["bedrooms"] = 4
+    result = json.loads(
+        client.post("/api/properties/bulk?upsert=true", data=json.dumps(rows), content_type="application/json").data
+    )
+    assert (result["updated"], result["skipped"]) == (2, 2)
+
+    updates = ChangeLog.query.filter(ChangeLog.seq > before, ChangeLog.table_name == "properties").all()
+    assert sorted(key for entry in updates for key in entry.data if key != "updated_at") == ["bedrooms", "price"]
+    assert PriceHistory.query.count() == 1
+
+
+def test_bulk_upsert_refreshes_derived_tables(client):
+    """Updated rows reach the update hooks: sketches, rollups, scores and locations follow them."""
+    from src.analysis.sketches import sketch_summary
+    from src.analysis.trends import price_trend
+    from src.app import db
+    from src.database.models import AnomalyScore, PriceSketch, PropertyLocation, Valuation
+
+    rows = [_row(i, zip_code="78704", square_feet=1500 + i) for i in range(6)]
+    client.post("/api/properties/bulk", data=json.dumps(rows), content_type="application/json")
+    moved = Property.query.filter_by(url=rows[0]["url"]).one()
+    austin_lat = db.session.get(PropertyLocation, moved.id).lat
+
+    rows[0].update(city="Denver", state="CO", zip_code="80202", price=900000)
+    client.post("/api/properties/bulk?upsert=true", data=json.dumps(rows), content_type="application/json")
+
+    assert PriceSketch.query.filter_by(city="Austin").one().count == 5
+    assert sketch_summary("Denver")["median_price"] == 900000
+    austin_points = price_trend("day", city="Austin")["series"]["all"]["points"]
+    assert sum(point["count"] for point in austin_points) == 5
+    # One Denver listing is too few to fit a baseline or model: old results are dropped
+    assert db.session.get(AnomalyScore, moved.id) is None
+    assert db.session.get(Valuation, moved.id) is None
+    assert AnomalyScore.query.filter_by(city="Austin").count() == 5
+    location = db.session.get(PropertyLocation, moved.id)
+    assert location.lat != austin_lat and abs(location.lat - 39.75) < 0.01
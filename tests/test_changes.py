@@ -0,0 +1,54 @@
+"""Test the change-data feed."""
+
+import json
+
+from src.app import db
+from src.database.models import ChangeLog, Property
+
+
+def _property(n, price=400000):
+    """Build a property."""
+    return Property(url=f"https://example.com/c/{n}", address=f"{n} Oak St", city="Austin", state="TX", price=price)
+
+
+def test_orm_writes_are_logged_in_order(client):
+    """Inserts, updates and deletes each append an entry with a rising sequence."""
+    first, second = _property(1), _property(2)
+    db.session.add_all([first, second])
+    db.session.commit()
+    first.price = 390000
+    db.session.commit()
+    db.session.delete(second)
+    db.session.commit()
+
+    page = client.get("/api/changes?since=0&limit=2").get_json()
+    assert [c["op"] for c in page["changes"]] == ["insert", "insert"]
+    assert page["has_more"] is True
+
+    rest = client.get(f"/api/changes?since={page['next']}").get_json()
+    assert [(c["op"], c["id"]) for c in rest["changes"]] == [("update", first.id), ("delete", second.id)]
+    assert rest["changes"][0]["data"] == {"price": 390000}
+    assert rest["has_more"] is False
+    assert client.get(f"/api/changes?since={rest['next']}").get_json()["changes"] == []
+
+
+def test_rolled_back_writes_leave_no_entries(app):
+    """Entries are written in the same transaction as the change."""
+    db.session.add(_property(3))
+    db.session.flush()
+    db.session.rollback()
+    assert ChangeLog.query.count() == 0
+
+
+def test_bulk_upsert_logs_price_changes(client):
+    """Bulk statements log inserts, updates and new price history rows."""
+    rows = [{"url": "https://example.com/c/4", "address": "4 Oak St", "city": "Austin", "state": "TX", "price": 300000}]
+    client.post("/api/properties/bulk", data=json.dumps(rows), content_type="application/json")
+    rows[0]["price"] = 290000
+    client.post("/api/properties/bulk?upsert=true", data=json.dumps(rows), content_type="application/json")
+
+    changes = client.get("/api/changes").get_json()["changes"]
+    assert [(c["table"], c["op"]) for c in changes] == [
+        ("properties", "insert"), ("properties", "update"), ("price_history", "insert"),
+    ]
+    assert changes[2]["data"]["price"] == 290000
@@ -0,0 +1,79 @@
+"""Test chart spec endpoints, LTTB downsampling and the spec cache."""
+
+import json
+
+import numpy as np
+
+from src.app import create_app, db
+from src.database.ingest import ingest_listings
+from src.visualization.specs import get_spec_cache, lttb
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    """Downsampling keeps the first, last and extreme points."""
+    x = np.arange(10000)
+    y = np.sin(x / 500.0)
+    y[4321] = 50.0
+
+    keep = lttb(x, y, 200)
+    assert len(keep) == 200
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert 4321 in keep
+    assert np.all(np.diff(keep) > 0)
+    assert len(lttb(x[:50], y[:50], 200)) == 50
+
+
+def test_price_distribution_spec_is_binned_and_cached(app, client):
+    """The histogram covers every listing in a few bins; repeats hit the cache."""
+    ingest_listings(
+        [
+            {
+                "url": f"https://example.com/{i}",
+                "address": f"{i} Main St",
+                "city": "Austin",
+                "state": "TX",
+                "price": 100000 + i * 1000,
+            }
+            for i in range(500)
+        ]
+    )
+
+    response = client.get("/api/charts/price-distribution?bins=20")
+    assert response.status_code == 200
+    spec = json.loads(response.data)
+    trace = spec["data"][0]
+    assert len(trace["x"]) == 20
+    assert sum(trace["y"]) == 500
+
+    cached = len(get_spec_cache(app)._specs)
+    assert client.get("/api/charts/price-distribution?bins=20").data == response.data
+    assert len(get_spec_cache(app)._specs) == cached
+
+    # A write bumps the properties counter, so the next request rebins
+    ingest_listings(
+        [{"url": "https://example.com/new", "address": "1 Elm St", "city": "Austin", "state": "TX", "price": 1}]
+    )
+    rebinned = json.loads(client.get("/api/charts/price-distribution?bins=20").data)
+    assert sum(rebinned["data"][0]["y"]) == 501
+
+    assert json.loads(client.get("/api/charts/locations").data)["data"][0]["x"] == ["Austin"]
+    assert client.get("/api/charts/price-trend?granularity=day").status_code == 200
+    assert client.get("/api/charts/price-trend?granularity=hour").status_code == 400
+
+
+def test_spec_cache_is_per_app(client):
+    """Apps over different databases with equal write counters never share specs."""
+    listing = {"url": "https://example.com/a", "address": "1 Main St", "city": "Austin", "state": "TX", "price": 1}
+    ingest_listings([listing])
+    first = json.loads(client.get("/api/charts/price-distribution").data)
+
+    other = create_app("testing")
+    with other.app_context():
+        db.create_all()
+        ingest_listings([dict(listing, url=f"https://example.com/{i}") for i in range(3)])
+        second = json.loads(other.test_client().get("/api/charts/price-distribution").data)
+        db.session.remove()
+        db.drop_all()
+
+    assert sum(first["data"][0]["y"]) == 1
+    assert sum(second["data"][0]["y"]) == 3
@@ -0,0 +1,70 @@
+"""Test memory-mapped columnar snapshots."""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.analysis.analyzer import MarketAnalyzer
+from src.analysis.columnar import current_version, init_snapshots, load_snapshot
+from src.scraper.scraper import DemoScraper
+
+
+@pytest.fixture
+def snapshot_dir(app, tmp_path, monkeypatch):
+    """Enable snapshots for the test app and stub scraping with demo data."""
+    directory = str(tmp_path / "snapshots")
+    app.config["COLUMNAR_SNAPSHOT_DIR"] = directory
+    # Long enough that tests control exports through flush()
+    app.config["COLUMNAR_SNAPSHOT_DELAY"] = 60
+    init_snapshots(app)
+    monkeypatch.setattr(
+        "src.api.routes.scrape_all_sources",
+        lambda location, **kwargs: DemoScraper().scrape_listings(location),
+    )
+    yield directory
+    app.extensions["columnar_snapshots"].flush()
+
+
+def test_snapshot_refreshed_after_ingest(app, client, snapshot_dir):
+    """Ingestion commits within the delay share one background export."""
+    empty = load_snapshot(snapshot_dir)
+    assert len(empty.properties) == 0
+
+    saved = client.post("/api/scrape", json={"location": "Austin, TX"}).json["saved"]
+    saved += client.post("/api/scrape", json={"location": "Denver, CO"}).json["saved"]
+    assert current_version(snapshot_dir) == empty.version
+
+    app.extensions["columnar_snapshots"].flush()
+    assert current_version(snapshot_dir) != empty.version
+    snapshot = load_snapshot(snapshot_dir)
+    assert len(snapshot.properties) == saved
+    assert set(snapshot.properties.column("city").dropna()) == {"Austin", "Denver"}
+    assert load_snapshot(snapshot_dir) is snapshot
+
+
+def test_background_export_runs_after_delay(app, client, snapshot_dir):
+    """Without a flush the pending export runs on its own timer."""
+    app.extensions["columnar_snapshots"].delay = 0.05
+    empty = current_version(snapshot_dir)
+    client.post("/api/scrape", json={"location": "Austin, TX"})
+
+    deadline = time.monotonic() + 10
+    while current_version(snapshot_dir) == empty and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert len(load_snapshot(snapshot_dir).properties) > 0
+
+
+def test_analyzer_reads_mapped_columns(app, client, snapshot_dir):
+    """MarketAnalyzer accepts the mapped view without copying numeric columns."""
+    client.post("/api/scrape", json={"location": "Austin, TX"})
+    client.post("/api/scrape", json={"location": "Denver, CO"})
+    app.extensions["columnar_snapshots"].flush()
+    snapshot = load_snapshot(snapshot_dir)
+
+    analyzer = MarketAnalyzer(snapshot)
+    assert np.shares_memory(analyzer.df["price"].to_numpy(), snapshot.properties.arrays["price"])
+    assert set(analyzer.analyze_by_location()) == {"Austin", "Denver"}
+
+    prices = np.asarray(snapshot.properties.arrays["price"])
+    assert analyzer.calculate_price_statistics()["mean"] == pytest.approx(prices.mean())
@@ -0,0 +1,82 @@
+"""Test the per-city comparables index."""
+
+import json
+
+import numpy as np
+from flask import current_app
+
+from src.analysis.comparables import get_comparables_index
+from src.database.ingest import ingest_listings
+from src.database.models import Property
+
+
+def _features(n=200, seed=0):
+    """Random prices, sizes and room counts; every third listing is a condo."""
+    rng = np.random.default_rng(seed)
+    return {
+        "property_type": lambda i: "condo" if i % 3 == 0 else "house",
+        "price": rng.uniform(200000, 900000, n),
+        "square_feet": rng.uniform(600, 3500, n).astype(int),
+        "bedrooms": rng.integers(1, 6, n),
+        "bathrooms": rng.integers(1, 4, n).astype(float),
+    }
+
+
+def _brute_force(target, k):
+    """Exact neighbours using the partition's own feature scaling."""
+    partition = get_comparables_index(current_app).partitions[target.city]
+    others = Property.query.filter(Property.city == target.city, Property.id != target.id).all()
+    raw = np.array([[p.price, p.square_feet, p.bedrooms, p.bathrooms] for p in others], dtype=float)
+    points = partition.features(raw, [p.property_type for p in others])
+    point = partition.features(
+        np.array([[target.price, target.square_feet, target.bedrooms, target.bathrooms]], dtype=float),
+        [target.property_type],
+    )[0]
+    distances = np.sqrt(((points - point) ** 2).sum(axis=1))
+    return [others[i].id for i in np.argsort(distances)[:k]]
+
+
+def test_comparables_match_brute_force(app, client, make_listings):
+    """The endpoint returns the exact k nearest listings in the same city."""
+    ingest_listings(make_listings(200, **_features()))
+    target = Property.query.filter_by(city="Denver").first()
+
+    response = client.get(f"/api/properties/{target.id}/comparables?k=5")
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    ids = [c["id"] for c in data["comparables"]]
+    assert len(ids) == 5
+    assert target.id not in ids
+    assert all(c["city"] == "Denver" for c in data["comparables"])
+    assert ids == _brute_force(target, 5)
+
+
+def test_new_listings_are_searchable_after_ingest(app, client, make_listings):
+    """Listings ingested after the index is built are found via the delta buffer."""
+    ingest_listings(make_listings(200, **_features()))
+    target = Property.query.filter_by(city="Austin").first()
+    client.get(f"/api/properties/{target.id}/comparables")
+
+    twin = {
+        "url": "https://example.com/twin",
+        "address": "1 Twin Ln",
+        "city": "Austin",
+        "state": "TX",
+        "price": target.price,
+        "square_feet": target.square_feet,
+        "bedrooms": target.bedrooms,
+        "bathrooms": target.bathrooms,
+        "property_type": target.property_type,
+    }
+    twin_id = ingest_listings([twin])["property_ids"][0]
+    assert twin_id in get_comparables_index(current_app).partitions["Austin"].delta_ids
+
+    data = json.loads(client.get(f"/api/properties/{target.id}/comparables?k=1").data)
+    assert data["comparables"][0]["id"] == twin_id
+    assert data["comparables"][0]["distance"] == 0
+
+
+def test_comparables_missing_property(client):
+    """Unknown property ids return 404."""
+    assert client.get("/api/properties/999/comparables").status_code == 404
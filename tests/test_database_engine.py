@@ -0,0 +1,98 @@
+"""Test config-driven engine profiles, .env loading and SQLite concurrency."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.exc import OperationalError
+
+from src.app import create_app, db
+from src.database.engine import engine_options, normalize_database_uri
+from src.database.models import Property
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """App backed by a temporary SQLite file."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'wal.db'}")
+    app = create_app("development")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_testing_profile_uses_memory_database(app):
+    """create_app honours its config_name argument."""
+    assert app.config["TESTING"] is True
+    assert app.config["SQLALCHEMY_DATABASE_URI"] == "sqlite:///:memory:"
+
+
+def test_postgres_profile_is_pooled():
+    """Server databases get pre-ping and pool sizing."""
+    options = engine_options(
+        {"SQLALCHEMY_DATABASE_URI": "postgresql://u:p@db/real_estate", "DB_POOL_SIZE": 5}
+    )
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] == 5
+    assert normalize_database_uri("postgres://u:p@db/x") == "postgresql://u:p@db/x"
+
+
+def test_sqlite_pragmas_applied(file_app):
+    """File databases run in WAL mode with synchronous=NORMAL."""
+    with db.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def _count(conn):
+    """Number of rows in properties."""
+    return conn.execute(text("SELECT COUNT(*) FROM properties")).scalar()
+
+
+def test_readers_proceed_while_writer_holds_lock(file_app):
+    """Under WAL a reader sees the last commit while a writer holds an exclusive lock."""
+    engine = db.engine
+    row = {"url": "https://example.com/0", "address": "1 Main St", "city": "Austin", "state": "TX", "price": 1}
+    with engine.begin() as conn:
+        conn.execute(insert(Property), [row])
+
+    with engine.connect() as writer, engine.connect() as reader, engine.connect() as other:
+        writer.exec_driver_sql("BEGIN EXCLUSIVE")
+        writer.execute(insert(Property), [dict(row, url="https://example.com/1")])
+
+        # Without waiting, a second writer is refused but a reader is not
+        for conn in (reader, other):
+            conn.exec_driver_sql("PRAGMA busy_timeout = 0")
+        with pytest.raises(OperationalError, match="locked"):
+            other.exec_driver_sql("BEGIN IMMEDIATE")
+        assert _count(reader) == 1
+        reader.rollback()
+
+        writer.commit()
+        assert _count(reader) == 2
+
+
+ENV_PROBE = """
+import os, dotenv
+dotenv.load_dotenv = lambda *args, **kwargs: os.environ.update(COMPRESS_MIN_SIZE="5", PROFILING_ENABLED="true")
+from src.app import create_app
+from config import Config
+print(Config.COMPRESS_MIN_SIZE, Config.PROFILING_ENABLED)
+"""
+
+
+def test_dotenv_loaded_before_config():
+    """Settings from .env reach the config classes."""
+    env = {k: v for k, v in os.environ.items() if k not in ("COMPRESS_MIN_SIZE", "PROFILING_ENABLED")}
+    result = subprocess.run(
+        [sys.executable, "-c", ENV_PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split() == ["5", "True"]
@@ -0,0 +1,72 @@
+"""Test cross-source duplicate detection."""
+
+import json
+
+from src.database.dedup import normalize_address, rebuild_links
+from src.database.ingest import ingest_listings
+from src.database.models import PropertyLink
+
+DESCRIPTION = (
+    "Sunny corner unit on the third floor with a renovated kitchen, quartz counters, "
+    "two walk-in closets, in-unit laundry and a private balcony overlooking the park"
+)
+
+
+def _listing(url, address, **fields):
+    listing = {
+        "url": url,
+        "address": address,
+        "city": "Austin",
+        "state": "TX",
+        "price": 500000,
+        "bedrooms": 2,
+        "square_feet": 1100,
+    }
+    listing.update(fields)
+    return listing
+
+
+def test_normalize_address():
+    """Suffixes, directions and unit markers are normalized."""
+    assert normalize_address("123 North Main Street Apt #4B, Austin, TX") == ("123 n main st", "4b")
+    assert normalize_address("123 N. Main St., Unit 4B") == ("123 n main st", "4b")
+    assert normalize_address("123 N Main St") == ("123 n main st", "")
+
+
+def test_ingest_links_duplicates_across_sources(client):
+    """Address and description matches share the oldest listing's id."""
+    ids = ingest_listings(
+        [
+            _listing("https://zillow.com/1", "123 Main Street", zip_code="78701", source="zillow"),
+            _listing("https://demo.com/1", "123 Main St.", zip_code="78701", source="demo"),
+            _listing("https://zillow.com/2", "123 Main St Apt 2", zip_code="78701"),
+            _listing("https://zillow.com/3", "123 Main St", zip_code="78702"),
+            _listing("https://zillow.com/4", "9 Oak Ave", description=DESCRIPTION),
+            _listing("https://zillow.com/5", "5 Elm Street", zip_code="78701"),
+            _listing("https://demo.com/5", "5 Elm St", source="demo"),
+        ]
+    )["property_ids"]
+    later = ingest_listings(
+        [_listing("https://redfin.com/9", "Hidden address", square_feet=1120, description=DESCRIPTION + ".")]
+    )["property_ids"]
+
+    links = {link.property_id: link for link in PropertyLink.query}
+    assert links[ids[1]].canonical_id == ids[0]
+    assert links[ids[1]].match == "address"
+    assert links[ids[2]].canonical_id == ids[2]  # different unit
+    assert links[ids[3]].canonical_id == ids[3]  # different zip
+    assert links[ids[6]].canonical_id == ids[5]  # missing zip still matches
+    assert links[later[0]].canonical_id == ids[4]
+    assert links[later[0]].match == "description"
+
+    data = json.loads(client.get(f"/api/properties/{ids[1]}/duplicates").data)
+    assert data["canonical_id"] == ids[0]
+    assert [p["id"] for p in data["duplicates"]] == [ids[0]]
+
+    data = json.loads(client.get("/api/properties?distinct=true").data)
+    assert data["total"] == 5
+
+    rebuild_links()
+    assert {l.property_id: l.canonical_id for l in PropertyLink.query} == {
+        i: link.canonical_id for i, link in links.items()
+    }
@@ -0,0 +1,67 @@
+"""Test offline geocoding and spatial queries."""
+
+from src.database.ingest import ingest_listings
+from src.database.models import LocationCell, PropertyLocation
+
+LISTINGS = [
+    ("1", "Austin", "TX", "78701"),
+    ("2", "Austin", "TX", "78704"),
+    ("3", "Austin", "TX", None),
+    ("4", "Dallas", "TX", "75201"),
+    ("5", "Nowhere", "ZZ", None),
+]
+
+
+def _ingest():
+    """Save listings in Austin, Dallas and an unknown place."""
+    ingest_listings([
+        {"url": f"https://example.com/g/{n}", "address": f"{n} Congress Ave", "city": city, "state": state,
+         "zip_code": zip_code, "price": 400000}
+        for n, city, state, zip_code in LISTINGS
+    ])
+
+
+def test_ingest_geocodes_by_zip_then_city(app, client):
+    """Zip centroids win over city centroids; unknown places are skipped."""
+    _ingest()
+    precision = {row.property_id: row.precision for row in PropertyLocation.query}
+    assert precision == {1: "zip", 2: "zip", 3: "city", 4: "city"}
+
+    near = client.get("/api/properties/within?near=78701&radius=3").get_json()["properties"]
+    assert [p["id"] for p in near] == [1, 3, 2]
+    assert near[0]["distance_km"] == 0
+    assert client.get("/api/properties/within?near=30.27,-97.74&radius=300&unit=km").get_json()["count"] == 4
+
+
+def test_bbox_and_clusters_with_and_without_rtree(app, client):
+    """Viewport queries agree between the R*Tree and the grid index."""
+    _ingest()
+    austin = client.get("/api/properties/within?bbox=30.0,-98.0,30.5,-97.5").get_json()
+    assert [p["id"] for p in austin["properties"]] == [1, 2, 3]
+
+    # Boxes too large to list their grid cells use the R*Tree
+    url = "/api/properties/within?bbox=25.8,-106.6,36.5,-93.5"
+    with_rtree = client.get(url).get_json()
+    app.extensions["geo_rtree"] = False
+    assert client.get(url).get_json() == with_rtree
+    assert [p["id"] for p in with_rtree["properties"]] == [1, 2, 3, 4]
+
+    texas = url + "&zoom="
+    state_level = client.get(texas + "5").get_json()["clusters"]
+    assert sorted(c["count"] for c in state_level) == [1, 3]
+    street_level = client.get(texas + "14").get_json()["clusters"]
+    assert sorted(c.get("property_id", 0) for c in street_level) == [1, 2, 3, 4]
+
+    assert client.get("/api/properties/within?bbox=1,2,3").status_code == 400
+    assert client.get("/api/properties/within?near=Atlantis").status_code == 400
+
+
+def test_cell_counters_accumulate_across_ingests(app):
+    """Each ingest adds to the existing cell row instead of replacing it."""
+    _ingest()
+    ingest_listings([{"url": "https://example.com/g/6", "address": "6 Congress Ave", "city": "Dallas",
+                      "state": "TX", "price": 400000}])
+    dallas = PropertyLocation.query.filter_by(property_id=4).one()
+    cell = LocationCell.query.filter_by(cell=dallas.cell).one()
+    assert cell.count == 2
+    assert cell.lat_sum == 2 * dallas.lat
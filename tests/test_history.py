@@ -0,0 +1,68 @@
+"""Test price history compaction and archival."""
+
+from datetime import datetime, timedelta
+
+from src.app import db
+from src.database.history import archive_cold_months, compact_price_history, read_price_history
+from src.database.models import PriceHistory, Property
+
+NOW = datetime(2026, 6, 15, 12, 0)
+
+
+def _property_with_history(prices):
+    """Create a property with (days ago, price) history rows."""
+    property_obj = Property(url="https://example.com/h/1", address="1 Main St", city="Austin", state="TX", price=500000)
+    db.session.add(property_obj)
+    db.session.flush()
+    for days_ago, price in prices:
+        db.session.add(PriceHistory(property_id=property_obj.id, price=price, recorded_at=NOW - timedelta(days=days_ago)))
+    db.session.commit()
+    return property_obj
+
+
+def test_compaction_keeps_change_points(app):
+    """Unchanged prices are dropped and old rows keep one price per day."""
+    _property_with_history([
+        (60.3, 510000), (60, 500000), (59, 500000),   # daily tier: last price of each day
+        (10, 490000), (9, 490000), (8, 490000), (2, 480000),  # hot tier: change points only
+    ])
+
+    result = compact_price_history(now=NOW)
+
+    prices = [row.price for row in PriceHistory.query.order_by(PriceHistory.recorded_at)]
+    assert prices == [500000, 490000, 480000]
+    assert result["removed"] == 4
+
+
+def test_archived_months_read_back_with_hot_rows(app, client, tmp_path):
+    """Cold months move to files and the reader unions them with the table."""
+    property_obj = _property_with_history([(500, 450000), (420, 460000), (5, 470000)])
+
+    result = compact_price_history(now=NOW, archive_dir=str(tmp_path))
+
+    assert result["archived"] == 2
+    assert PriceHistory.query.count() == 1
+    history = read_price_history([property_obj.id], archive_dir=str(tmp_path))
+    assert history["price"].tolist() == [450000, 460000, 470000]
+    recent = read_price_history([property_obj.id], start=NOW - timedelta(days=30), archive_dir=str(tmp_path))
+    assert recent["price"].tolist() == [470000]
+
+    app.config["PRICE_HISTORY_ARCHIVE_DIR"] = str(tmp_path)
+    response = client.get(f"/api/properties/{property_obj.id}/price-history")
+    assert [p["price"] for p in response.get_json()["history"]] == [450000, 460000, 470000]
+
+
+def test_archival_deletes_rows_left_behind_a_moved_watermark(app, tmp_path):
+    """Rows below the watermark that a failed run left in the table are removed."""
+    property_obj = _property_with_history([(500, 450000), (5, 470000)])
+    compact_price_history(now=NOW, archive_dir=str(tmp_path))
+
+    # As if the previous run's delete had not been committed
+    db.session.add(PriceHistory(property_id=property_obj.id, price=450000, recorded_at=NOW - timedelta(days=500)))
+    db.session.commit()
+
+    result = archive_cold_months(str(tmp_path), NOW - timedelta(days=400))
+    assert result["archived"] == 0
+    assert PriceHistory.query.count() == 1
+    history = read_price_history([property_obj.id], archive_dir=str(tmp_path))
+    assert history["price"].tolist() == [450000, 470000]
@@ -0,0 +1,62 @@
+"""Test conditional GET and response compression."""
+
+import gzip
+import json
+
+from src.database.ingest import ingest_listings
+
+
+LISTING = {"city": "Austin", "state": "TX", "description": "Bright home near the park"}
+
+
+def test_unchanged_tables_return_304(client, make_listings):
+    """A matching ETag skips the view until the table is written."""
+    ingest_listings(make_listings(5, **LISTING))
+    first = client.get("/api/properties")
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+
+    again = client.get("/api/properties", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+    other_page = client.get("/api/properties?per_page=2", headers={"If-None-Match": etag})
+    assert other_page.status_code == 200
+
+    ingest_listings(make_listings(1, prefix="b", **LISTING))
+    changed = client.get("/api/properties", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert json.loads(changed.data)["total"] == 6
+
+    # Unrelated tables do not invalidate reports
+    reports_etag = client.get("/api/reports").headers["ETag"]
+    ingest_listings(make_listings(1, prefix="c", **LISTING))
+    assert client.get("/api/reports", headers={"If-None-Match": reports_etag}).status_code == 304
+
+
+def test_same_second_write_is_not_hidden_by_if_modified_since(client, make_listings):
+    """A write in the second named by Last-Modified still returns the new body."""
+    ingest_listings(make_listings(2, **LISTING))
+    last_modified = client.get("/api/properties").headers["Last-Modified"]
+    ingest_listings(make_listings(1, prefix="b", **LISTING))
+
+    response = client.get("/api/properties", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert json.loads(response.data)["total"] == 3
+
+
+def test_large_responses_are_gzipped(app, client, make_listings):
+    """Responses above the threshold are compressed for clients that accept it."""
+    ingest_listings(make_listings(50, **LISTING))
+
+    plain = client.get("/api/properties?per_page=50")
+    assert "Content-Encoding" not in plain.headers
+
+    compressed = client.get("/api/properties?per_page=50", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data) / 4
+
+    small = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
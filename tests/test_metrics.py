@@ -0,0 +1,49 @@
+"""Test metrics and profiling instrumentation."""
+
+from src.monitoring.metrics import Histogram, record_cache
+
+
+def test_metrics_endpoint_reports_latency(client):
+    """Requests show up as latency, size and SQL metrics."""
+    client.get("/api/properties")
+    response = client.get("/metrics")
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{endpoint="api.get_properties",method="GET"}' in body
+    assert 'http_requests_total{endpoint="api.get_properties",method="GET",status="200"}' in body
+    assert 'http_response_size_bytes_count{endpoint="api.get_properties"}' in body
+    assert 'sql_statement_duration_seconds_count{endpoint="api.get_properties"}' in body
+
+
+def test_cache_counter_exported(client):
+    """Cache lookups are exported by result."""
+    record_cache("test", True)
+    record_cache("test", False)
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'cache_requests_total{cache="test",result="hit"}' in body
+    assert 'cache_requests_total{cache="test",result="miss"}' in body
+
+
+def test_histogram_buckets_are_cumulative():
+    """Histogram buckets accumulate observations."""
+    histogram = Histogram("latency", "Latency.", ("endpoint",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "x")
+    rendered = histogram.render()
+    assert 'latency_bucket{endpoint="x",le="0.1"} 1' in rendered
+    assert 'latency_bucket{endpoint="x",le="1.0"} 2' in rendered
+    assert 'latency_bucket{endpoint="x",le="+Inf"} 3' in rendered
+    assert 'latency_count{endpoint="x"} 3' in rendered
+
+
+def test_profile_requires_opt_in(client, app):
+    """?profile=1 only returns a profile when profiling is enabled."""
+    response = client.get("/api/health?profile=1")
+    assert response.is_json
+
+    app.config["PROFILING_ENABLED"] = True
+    response = client.get("/api/health?profile=1")
+    assert response.mimetype == "text/plain"
+    assert "function calls" in response.get_data(as_text=True)
+    assert response.headers["X-Profiled-Status"] == "200"
@@ -0,0 +1,47 @@
+"""Test percentile ranks and the compare endpoint."""
+
+import json
+
+from src.database.ingest import ingest_listings
+
+
+# One group: Austin houses of equal size
+HOUSE = {"city": "Austin", "state": "TX", "property_type": "house", "square_feet": 1000}
+
+
+def test_compare_returns_percentile_ranks(client, make_listings):
+    """Ranks are mid-rank percentiles within the property's group."""
+    ids = ingest_listings(make_listings(4, price=[100000, 200000, 300000, 400000], **HOUSE))["property_ids"]
+    ingest_listings(make_listings(1, prefix="d", price=[900000], **dict(HOUSE, city="Denver")))
+
+    response = client.post("/api/properties/compare", json={"ids": [ids[3], ids[0], 999]})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    assert [p["id"] for p in data["properties"]] == [ids[3], ids[0]]
+    assert data["missing"] == [999]
+    top, bottom = data["properties"]
+    assert top["group_size"] == 4
+    assert top["percentiles"]["price"] == 87.5
+    assert bottom["percentiles"]["price"] == 12.5
+    assert top["percentiles"]["square_feet"] == 50.0
+    assert top["price_per_sqft"] == 400.0
+
+
+def test_compare_sees_new_listings(client, make_listings):
+    """Cached arrays are reloaded when a group gains rows."""
+    ids = ingest_listings(make_listings(2, price=[100000, 200000], **HOUSE))["property_ids"]
+    first = json.loads(client.post("/api/properties/compare", json={"ids": [ids[1]]}).data)
+    assert first["properties"][0]["percentiles"]["price"] == 75.0
+
+    ingest_listings(make_listings(2, prefix="b", price=[300000, 400000], **HOUSE))
+    second = json.loads(client.post("/api/properties/compare", json={"ids": [ids[1]]}).data)
+    assert second["properties"][0]["group_size"] == 4
+    assert second["properties"][0]["percentiles"]["price"] == 37.5
+
+
+def test_compare_validates_ids(client):
+    """Bad payloads return 400."""
+    assert client.post("/api/properties/compare", json={"ids": "1"}).status_code == 400
+    assert client.post("/api/properties/compare", json={"ids": [True]}).status_code == 400
+    assert client.post("/api/properties/compare", json={"ids": list(range(51))}).status_code == 400
@@ -0,0 +1,76 @@
+"""Test scrape run instrumentation and the run ledger."""
+
+from src.scraper.instrumentation import ScrapeRunRecorder, summarize_runs
+from src.scraper.scraper import ZillowScraper
+
+
+def _broken_driver(*args, **kwargs):
+    """Simulate a browser that fails to start."""
+    raise RuntimeError("no browser")
+
+
+def test_recorder_accumulates_repeated_phases():
+    """Repeated phases add up their durations and call counts."""
+    run = ScrapeRunRecorder("zillow", "Austin, TX")
+    for _ in range(3):
+        with run.phase("extract"):
+            pass
+    run.count("cards_found", 3)
+
+    data = run.to_dict()
+    assert data["phases"]["extract"]["calls"] == 3
+    assert data["cards_found"] == 3
+    assert data["duration_ms"] >= data["phases"]["extract"]["ms"]
+
+
+def test_summarize_runs_percentiles():
+    """Summaries report duration percentiles per source."""
+    runs = [
+        {"source": "zillow", "duration_ms": float(ms), "phases": {"navigate": {"ms": ms / 2, "calls": 1}}}
+        for ms in range(1, 101)
+    ]
+    summary = summarize_runs(runs)["zillow"]
+    assert summary["runs"] == 100
+    assert 50 <= summary["duration_ms"]["p50"] <= 51
+    assert summary["phases_ms"]["navigate"]["p99"] > summary["phases_ms"]["navigate"]["p50"]
+
+
+def test_zillow_fallback_is_recorded(monkeypatch):
+    """Driver failures are recorded as errors with fallback usage."""
+    monkeypatch.setattr(ZillowScraper, "_get_driver", _broken_driver)
+    scraper = ZillowScraper()
+    listings = scraper.scrape_listings("Austin, TX")
+
+    run = scraper.last_run.to_dict()
+    assert listings
+    assert run["used_fallback"] is True
+    assert run["errors"] == ["no browser"]
+    assert "fallback" in run["phases"]
+
+
+def test_driver_start_failure_recorded_once(monkeypatch):
+    """A browser that fails to start inside _get_driver is one error, not two."""
+    from src.scraper import scraper as scraper_module
+
+    monkeypatch.setattr(scraper_module.ChromeDriverManager, "install", lambda self: "/bin/true")
+    monkeypatch.setattr(scraper_module.webdriver, "Chrome", _broken_driver)
+    scraper = ZillowScraper()
+    scraper.scrape_listings("Austin, TX")
+
+    run = scraper.last_run.to_dict()
+    assert run["errors"] == ["no browser"]
+    assert "driver_start" in run["phases"]
+
+
+def test_scrape_persists_runs(client, monkeypatch):
+    """Scrape requests write runs that the summary endpoint aggregates."""
+    monkeypatch.setattr(ZillowScraper, "_get_driver", _broken_driver)
+    response = client.post("/api/scrape", json={"location": "Austin, TX"})
+    assert response.status_code == 200
+
+    runs = client.get("/api/scrape/runs").json
+    assert runs["total"] >= 1
+    assert runs["runs"][0]["source"] == "zillow"
+
+    summary = client.get("/api/scrape/runs/summary?source=zillow").json["sources"]
+    assert summary["zillow"]["fallback_rate"] == 1.0
@@ -0,0 +1,71 @@
+"""Test scraper record/replay against the fixture archive."""
+
+import os
+
+from src.scraper.replay import FakeDriver, load_archive, replay_archive, replay_page, save_page, without_waits
+from src.scraper.scraper import ZillowScraper
+
+ARCHIVE = os.path.join(os.path.dirname(__file__), "fixtures", "zillow")
+
+
+def test_replay_matches_golden_corpus():
+    """Every archived card is extracted with its address, URL and price."""
+    report = replay_archive(ARCHIVE)
+    assert report["pages"] == 2
+    assert report["accuracy"]["cards_extracted"] == report["accuracy"]["cards_expected"] == 9
+    assert report["accuracy"]["exact"] == 1.0
+
+
+def test_recorded_page_replays(tmp_path):
+    """Pages saved while scraping load back and parse the same way."""
+    page = load_archive(ARCHIVE)[0]
+    entry = save_page(str(tmp_path), page["url"], page["html"], page["location"])
+
+    (reloaded,) = load_archive(str(tmp_path))
+    assert reloaded["id"] == entry["id"]
+    listings = replay_page(reloaded["html"], reloaded["url"], reloaded["location"])
+    assert [l["price"] for l in listings] == [525000, 689900, 1150000, 239000, 449000]
+    assert all(l["url"].startswith("https://www.zillow.com/homedetails/") for l in listings)
+
+
+def _result_pages(pages, per_page=3):
+    """Synthetic Austin result pages keyed by their search URL."""
+    scraper = ZillowScraper()
+    html = {}
+    for page in range(1, pages + 1):
+        cards = "".join(
+            f'<div data-test="property-card-container"><a href="/homedetails/{page}-{n}_zpid/">'
+            f"{page}{n} Lamar Blvd, Austin, TX</a><span>${400 + page * 10 + n},000</span></div>"
+            for n in range(per_page)
+        )
+        html[scraper._build_zillow_url("Austin", "TX", page)] = f"<html><body>{cards}</body></html>"
+    return html
+
+
+def _crawl(monkeypatch, pages, known=(), **limits):
+    """Run scrape_listings against fake result pages."""
+    driver = FakeDriver(_result_pages(pages))
+    monkeypatch.setattr(ZillowScraper, "_get_driver", lambda self: driver)
+    scraper = without_waits(ZillowScraper(**limits))
+    scraper.known_urls = lambda urls: set(urls) & set(known)
+    return scraper.scrape_listings("Austin, TX"), driver, scraper.last_run.to_dict()
+
+
+def test_crawl_follows_pages_in_tabs_until_results_end(monkeypatch):
+    """Later pages load in batches of tabs; an empty page ends the crawl."""
+    listings, driver, run = _crawl(monkeypatch, pages=4, max_pages=10, tabs=2)
+
+    assert len(listings) == 12 and len({l["url"] for l in listings}) == 12
+    assert [url.split("/")[-2] for url in driver.opened] == ["austin-tx", "2_p", "3_p", "4_p", "5_p"]
+    assert driver.window_handles == ["tab-0"]
+    assert run["counters"]["pages"] == 5 and not run["used_fallback"]
+
+
+def test_crawl_stops_at_known_listings_and_limits(monkeypatch):
+    """Repeat crawls stop at a page of stored listings; limits cap the rest."""
+    known = [f"https://www.zillow.com/homedetails/2-{n}_zpid/" for n in range(3)]
+    listings, driver, _ = _crawl(monkeypatch, pages=4, known=known, max_pages=10, tabs=1)
+    assert len(listings) == 6 and len(driver.opened) == 2
+
+    listings, _, _ = _crawl(monkeypatch, pages=4, max_listings=4)
+    assert len(listings) == 4
@@ -0,0 +1,59 @@
+"""Test full-text property search."""
+
+import json
+
+from src.app import db
+from src.database.ingest import ingest_listings
+from src.database.models import Property
+
+
+def _listing(i, address, description, city="Austin", price=400000):
+    """One listing with the text fields the search index covers."""
+    return {
+        "url": f"https://example.com/{i}",
+        "address": address,
+        "city": city,
+        "state": "TX",
+        "price": price,
+        "description": description,
+    }
+
+
+def _ids(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return [p["id"] for p in json.loads(response.data)["properties"]]
+
+
+def test_search_ranks_and_filters(client):
+    """Matches are BM25-ranked, prefix-matched and combined with filters."""
+    ids = ingest_listings(
+        [
+            _listing(1, "12 Lake Shore Dr", "Lakefront house with a pool"),
+            _listing(2, "40 Hill Rd", "Short walk to the lake, remodeled pool house", price=900000),
+            _listing(3, "7 Pine St", "Downtown loft"),
+            _listing(4, "3 Lake View Ln", "Cabin", city="Denver"),
+        ]
+    )["property_ids"]
+
+    assert set(_ids(client, "/api/properties/search?q=lake")) == {ids[0], ids[1], ids[3]}
+    # Address hits outrank description hits
+    assert _ids(client, "/api/properties/search?q=lake&city=Austin") == [ids[0], ids[1]]
+    assert _ids(client, "/api/properties/search?q=pool&max_price=500000") == [ids[0]]
+    assert _ids(client, "/api/properties/search?q=remod") == [ids[1]]
+    assert client.get("/api/properties/search?q=").status_code == 400
+
+
+def test_search_index_follows_updates(client):
+    """Edited and deleted rows are re-indexed by triggers."""
+    property_id = ingest_listings([_listing(1, "1 Elm St", "Cozy bungalow")])["property_ids"][0]
+
+    property_obj = db.session.get(Property, property_id)
+    property_obj.description = "Modern farmhouse"
+    db.session.commit()
+    assert _ids(client, "/api/properties/search?q=bungalow") == []
+    assert _ids(client, "/api/properties/search?q=farmhouse") == [property_id]
+
+    db.session.delete(property_obj)
+    db.session.commit()
+    assert _ids(client, "/api/properties/search?q=farmhouse") == []
@@ -0,0 +1,70 @@
+"""Test incrementally maintained price sketches."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.sketches import rebuild_price_sketches, sketch_summary
+from src.database.ingest import ingest_listings
+from src.database.models import PriceSketch
+
+
+def _prices(n, seed=0):
+    """Lognormal listing prices."""
+    return np.random.default_rng(seed).lognormal(13, 0.4, n)
+
+
+def _property_type(i):
+    """Cycle listings through houses, condos and studios."""
+    return ("house", "condo", "studio")[i % 3]
+
+
+def _assert_close_rank(prices, estimate, q, tolerance=0.01):
+    """The estimate sits within ``tolerance`` percentile ranks of q."""
+    assert abs((prices <= estimate).mean() - q) < tolerance
+
+
+def test_sketches_track_exact_quantiles(app, make_listings):
+    """Incremental sketches agree with exact pandas quantiles."""
+    batches = [
+        make_listings(1500, prefix=seed, price=_prices(1500, seed), property_type=_property_type) for seed in range(4)
+    ]
+    for batch in batches:
+        ingest_listings(batch)
+
+    df = pd.DataFrame([listing for batch in batches for listing in batch])
+    austin = df[df["city"] == "Austin"]["price"].to_numpy()
+    summary = sketch_summary("Austin")
+
+    _assert_close_rank(austin, summary["median_price"], 0.5)
+    _assert_close_rank(austin, summary["p10_price"], 0.1)
+    _assert_close_rank(austin, summary["p90_price"], 0.9)
+    exact_iqr = np.percentile(austin, 75) - np.percentile(austin, 25)
+    assert summary["iqr"] == pytest.approx(exact_iqr, rel=0.03)
+
+    condos = df[(df["city"] == "Denver") & (df["property_type"] == "condo")]["price"].to_numpy()
+    _assert_close_rank(condos, sketch_summary("Denver", "condo")["median_price"], 0.5, 0.02)
+    assert PriceSketch.query.count() == 6
+
+
+def test_rebuild_matches_incremental(app, make_listings):
+    """A full rebuild yields the same counts as incremental updates."""
+    ingest_listings(make_listings(600, price=_prices(600), property_type=_property_type))
+    incremental = {(s.city, s.property_type): s.count for s in PriceSketch.query}
+
+    rebuild_price_sketches()
+    rebuilt = {(s.city, s.property_type): s.count for s in PriceSketch.query}
+    assert rebuilt == incremental
+    assert sum(rebuilt.values()) == 600
+
+
+def test_market_summary_includes_percentiles(client, app, make_listings):
+    """The summary endpoint serves median, p10/p90 and IQR."""
+    ingest_listings(make_listings(300, price=_prices(300), property_type=_property_type))
+    data = client.get("/api/market/summary?city=Austin&property_type=house").json
+    assert data["total_listings"] == 50
+    assert data["p10_price"] <= data["median_price"] <= data["p90_price"]
+    assert data["iqr"] > 0
+
+    empty = client.get("/api/market/summary?city=Nowhere").json
+    assert empty["median_price"] is None
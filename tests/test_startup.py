@@ -0,0 +1,33 @@
+"""Test that app startup does not import scraper or chart dependencies."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys
+from src.app import create_app
+create_app("testing")
+print(json.dumps(sorted(m for m in sys.modules if m.split(".")[0] in
+    ("selenium", "webdriver_manager", "bs4", "plotly"))))
+"""
+
+
+def test_create_app_does_not_import_heavy_dependencies():
+    """selenium, webdriver_manager, bs4 and plotly load only on demand."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+def test_scraper_registry_loads_on_demand():
+    """Registered scrapers resolve to their classes when requested."""
+    from src.scraper import load_scraper
+    from src.scraper.scraper import DemoScraper
+
+    assert load_scraper("demo") is DemoScraper
+
@@ -0,0 +1,81 @@
+"""Test the rollup-backed price trend engine."""
+
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.analyzer import MarketAnalyzer
+from src.analysis.trends import price_trend, rebuild_rollups
+from src.database.ingest import ingest_listings
+from src.database.models import PriceRollup
+
+
+def _features(n=600, seed=0):
+    """Scrape times over 90 days from 2024-01-01 with prices rising about 1% a week."""
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    hours = rng.integers(0, 24 * 90, n)
+    return {
+        "property_type": lambda i: "condo" if i % 3 == 0 else "house",
+        "price": rng.normal(400000 + hours * 25, 20000),
+        "scraped_at": [start + timedelta(hours=int(h)) for h in hours],
+    }
+
+
+def test_weekly_rollups_match_pandas(app, make_listings):
+    """Weekly counts and averages equal exact pandas results."""
+    listings = make_listings(600, **_features())
+    ingest_listings(listings[:300])
+    ingest_listings(listings[300:])
+
+    df = pd.DataFrame(listings)
+    austin = df[df["city"] == "Austin"]
+    weeks = austin["scraped_at"].dt.to_period("W").dt.start_time.dt.date
+    exact = austin.groupby(weeks.to_numpy())["price"].agg(["count", "mean", "median"])
+
+    points = price_trend("week", city="Austin")["series"]["all"]["points"]
+    assert [p["period"] for p in points] == [d.isoformat() for d in exact.index]
+    for point, (_, row) in zip(points, exact.iterrows()):
+        assert point["count"] == row["count"]
+        assert point["avg_price"] == pytest.approx(row["mean"])
+        assert point["median_price"] == pytest.approx(row["median"], rel=0.05)
+
+
+def test_grouped_monthly_series_and_rebuild(app, make_listings):
+    """Per-type monthly series survive a full rebuild unchanged."""
+    ingest_listings(make_listings(600, **_features()))
+    before = price_trend("month", group_by="property_type")
+    assert set(before["series"]) == {"house", "condo"}
+    assert len(before["series"]["house"]["points"]) == 3
+    assert before["series"]["house"]["trend"] == "up"
+
+    rebuild_rollups()
+    after = price_trend("month", group_by="property_type")
+    assert [p["count"] for p in after["series"]["house"]["points"]] == [
+        p["count"] for p in before["series"]["house"]["points"]
+    ]
+    assert PriceRollup.query.filter_by(period="month").count() == 2 * 2 * 3
+
+
+def test_analyzer_trend_is_json_serializable(make_listings):
+    """calculate_price_trend returns ISO keys and leaves the frame intact."""
+    df = pd.DataFrame(make_listings(100, **_features(100)))
+    columns = list(df.columns)
+    trend = MarketAnalyzer(df).calculate_price_trend(granularity="month")
+
+    json.dumps(trend)
+    assert list(trend["data"]) == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    assert list(df.columns) == columns
+
+
+def test_trends_endpoint(client, app, make_listings):
+    """The endpoint validates granularity and returns series."""
+    ingest_listings(make_listings(50, **_features(50)))
+    response = client.get("/api/market/trends?granularity=day&city=Denver&window=7")
+    assert response.status_code == 200
+    assert response.json["series"]["all"]["points"][0]["rolling_median_price"] > 0
+
+    assert client.get("/api/market/trends?granularity=hour").status_code == 400
@@ -0,0 +1,72 @@
+"""Test the per-city hedonic valuation model."""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.valuation import fit_city, score_frame
+from src.database.ingest import ingest_listings
+from src.database.models import Valuation, ValuationModel
+
+
+def _features(n=300, seed=0):
+    """Sizes, rooms and prices following a per-city hedonic model with noise."""
+    rng = np.random.default_rng(seed)
+    i = np.arange(n)
+    condo = i % 3 == 0
+    sqft = rng.uniform(600, 3500, n)
+    bedrooms = rng.integers(1, 6, n)
+    # Denver is pricier per square foot; condos trade at a discount
+    price = np.where(i % 2 == 1, 300, 200) * sqft * np.where(condo, 0.8, 1.0) * (1 + 0.03 * bedrooms)
+    return {
+        "property_type": np.where(condo, "condo", "house"),
+        "price": price * rng.lognormal(0, 0.05, n),
+        "square_feet": sqft,
+        "bedrooms": bedrooms,
+        "bathrooms": rng.integers(1, 4, n).astype(float),
+    }
+
+
+def test_fit_recovers_price_structure(make_listings):
+    """A noiseless log-linear city is fitted exactly."""
+    frame = pd.DataFrame(make_listings(100, **_features(100)))
+    frame = frame[frame["city"] == "Austin"]
+    frame["price"] = 200 * frame["square_feet"] * np.where(frame["property_type"] == "condo", 0.8, 1.0)
+
+    model = fit_city(frame)
+    assert model["r_squared"] > 0.999
+    assert np.isclose(model["coefficients"][1], 1.0)  # log price scales with log sqft
+    assert np.isclose(np.exp(model["coefficients"][4]), 0.8)  # condo discount
+
+    scored = score_frame(frame, {"Austin": model})
+    assert np.allclose(scored["fair_value"], frame["price"])
+    assert (scored["flag"] == "fair").all()
+
+
+def test_ingest_values_and_flags_listings(app, client, make_listings):
+    """Ingested listings are valued and mispriced ones flagged."""
+    listings = make_listings(300, **_features())
+    listings[0]["price"] *= 2
+    ingest_listings(listings)
+
+    assert Valuation.query.count() == len(listings)
+    data = json.loads(client.get("/api/market/valuations?flag=over").data)
+    assert data["valuations"][0]["id"] == 1
+    assert data["valuations"][0]["price_gap"] > 0.5
+
+
+def test_only_changed_cities_are_refitted(app, make_listings):
+    """A small ingest uses cached coefficients; other cities are untouched."""
+    ingest_listings(make_listings(300, **_features()))
+    fitted = {m.city: m.fitted_at for m in ValuationModel.query}
+
+    new = [l for l in make_listings(10, prefix="b", **_features(10, seed=1)) if l["city"] == "Austin"]
+    ingest_listings(new)
+
+    austin = ValuationModel.query.filter_by(city="Austin").one()
+    denver = ValuationModel.query.filter_by(city="Denver").one()
+    assert austin.pending == len(new)
+    assert austin.fitted_at == fitted["Austin"]
+    assert denver.pending == 0
+    assert Valuation.query.count() == 300 + len(new)
@@ -0,0 +1,93 @@
+"""Test the listing-velocity counters behind market heat."""
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.analysis.analyzer import MarketAnalyzer
+from src.analysis.velocity import market_heat, rebuild_market_activity
+from src.app import db
+from src.database.history import archive_cold_months
+from src.database.ingest import ingest_listings
+from src.database.models import MarketActivity, PriceHistory, Property
+
+
+def _days_ago(days):
+    """A UTC timestamp ``days`` before now."""
+    return datetime.utcnow() - timedelta(days=days)
+
+
+def _totals(city):
+    """Counters summed over every week of ``city``."""
+    rows = MarketActivity.query.filter_by(city=city).all()
+    names = ("new_listings", "delistings", "price_cuts", "active")
+    return {name: sum(getattr(row, name) for row in rows) for name in names}
+
+
+def test_counters_follow_listings_cuts_and_delistings(app, make_listings):
+    """Ingest, price cuts and deletes update the counters; heat ranks the cities."""
+    ingest_listings(make_listings(10, prefix="Austin", city="Austin", state="TX", scraped_at=_days_ago(3)))
+    ingest_listings(make_listings(10, prefix="Denver", city="Denver", state="CO", scraped_at=_days_ago(120)))
+
+    for prop in Property.query.filter_by(city="Denver").limit(5):
+        prop.price -= 20000
+    db.session.commit()
+    for prop in Property.query.filter_by(city="Austin").limit(2):
+        db.session.delete(prop)
+    db.session.commit()
+
+    assert _totals("Austin") == {"new_listings": 10, "delistings": 2, "price_cuts": 0, "active": 8}
+    assert _totals("Denver") == {"new_listings": 10, "delistings": 0, "price_cuts": 5, "active": 10}
+
+    heat = market_heat()
+    austin, denver = heat["cities"]
+    assert (austin["city"], austin["level"]) == ("Austin", "hot")
+    assert (denver["city"], denver["level"]) == ("Denver", "cool")
+    assert denver["price_cut_share"] == 0.5
+    assert denver["months_of_inventory"] is None
+    assert abs(denver["median_days_on_market"] - 120) <= 4  # weekly buckets
+
+    # A rebuild sees only surviving properties and recorded price history
+    rebuild_market_activity()
+    assert _totals("Austin") == {"new_listings": 8, "delistings": 0, "price_cuts": 0, "active": 8}
+
+
+def test_rebuild_counts_archived_price_cuts(app, tmp_path, make_listings):
+    """Price cuts in archived months survive a rebuild."""
+    ingest_listings(make_listings(1, prefix="Denver", city="Denver", state="CO", scraped_at=_days_ago(500)))
+    property_obj = Property.query.one()
+    for days_ago, price in ((480, 450000.0), (470, 430000.0)):
+        db.session.add(PriceHistory(
+            property_id=property_obj.id, price=price, recorded_at=datetime.utcnow() - timedelta(days=days_ago)
+        ))
+    db.session.commit()
+
+    app.config["PRICE_HISTORY_ARCHIVE_DIR"] = str(tmp_path)
+    archive_cold_months(str(tmp_path), datetime.utcnow() - timedelta(days=365))
+    assert PriceHistory.query.count() == 0
+
+    rebuild_market_activity()
+    assert _totals("Denver")["price_cuts"] == 1
+
+
+def test_heatmap_route_with_history(client, make_listings):
+    """The heatmap endpoint serves current heat and a weekly series."""
+    ingest_listings(make_listings(6, prefix="Austin", city="Austin", state="TX", scraped_at=_days_ago(10)))
+
+    response = client.get("/api/market/heatmap?city=Austin&weeks=2&history=3")
+    assert response.status_code == 200
+    (austin,) = response.get_json()["cities"]
+    assert austin["inventory"] == 6
+    assert austin["level"] in ("hot", "warm", "cool")
+    assert len(austin["history"]) == 3
+    assert austin["history"][-1]["inventory"] == 6
+    assert sum(point["new_listings"] for point in austin["history"]) >= 6
+
+
+def test_analyzer_heat_uses_days_on_market():
+    """Fresh listings read hot and stale ones cool, regardless of price."""
+    now = datetime(2024, 6, 1)
+    fresh = pd.DataFrame({"price": [150000.0] * 3, "scraped_at": [now - timedelta(days=d) for d in (1, 5, 9)]})
+    stale = pd.DataFrame({"price": [900000.0] * 3, "scraped_at": [now - timedelta(days=d) for d in (100, 150, 200)]})
+    assert MarketAnalyzer(fresh).calculate_market_heat(now=now) == "hot"
+    assert MarketAnalyzer(stale).calculate_market_heat(now=now) == "cool"